@@ -0,0 +1,177 @@
+import time
+import asyncio
+from typing import Optional
+
+from playwright.async_api import async_playwright
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.127 Safari/537.36'
+# 본문 추출에 필요 없는 리소스는 내려받지 않습니다.
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+
+class BrowserPool:
+    """
+    봇 Application이 소유하는 오래 유지되는 Chromium 브라우저 풀입니다.
+
+    - 브라우저는 한 번 실행해 두고 재사용하므로, 요청마다 Chromium을 띄우는 시간이 들지 않습니다.
+    - 페이지를 다 쓴 컨텍스트는 풀에 돌려놓고 재사용하며, max_pages_per_context번 사용하면 새로 만듭니다.
+    - 동시에 여는 페이지 수는 max_concurrency로 제한합니다.
+    - 이미지/폰트/미디어 요청은 차단하고, 페이지 로딩은 page_timeout_seconds로 제한합니다.
+    - idle_seconds 동안 사용하지 않으면 브라우저를 종료하고, 다음 요청 때 다시 실행합니다.
+
+    이벤트 루프 밖의 스레드(asyncio.to_thread 등)에서는 fetch_html_threadsafe()를 사용합니다.
+    """
+
+    def __init__(self, max_concurrency: int = 2, page_timeout_seconds: float = 20, idle_seconds: float = 600,
+                 max_pages_per_context: int = 50):
+        self.max_concurrency = max_concurrency
+        self.page_timeout_seconds = page_timeout_seconds
+        self.idle_seconds = idle_seconds
+        self.max_pages_per_context = max_pages_per_context
+        self._loop = None
+        self._semaphore = None
+        self._launch_lock = None
+        self._playwright = None
+        self._browser = None
+        self._idle_contexts = []    # [(context, 사용 횟수)]
+        self._active_pages = 0
+        self._last_used = time.monotonic()
+        self._idle_task = None
+        self.launches = 0
+        self.pages_loaded = 0
+
+    async def start(self, warm: bool = True):
+        """현재 이벤트 루프에 풀을 연결합니다. warm=True면 브라우저를 미리 실행해 둡니다."""
+        self._loop = asyncio.get_running_loop()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._launch_lock = asyncio.Lock()
+        self._idle_task = asyncio.create_task(self._recycle_when_idle())
+        if warm:
+            await self._ensure_browser()
+
+    async def _ensure_browser(self):
+        async with self._launch_lock:
+            if self._browser is None or not self._browser.is_connected():
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                self._idle_contexts = []
+                self._browser = await self._playwright.chromium.launch()
+                self.launches += 1
+        return self._browser
+
+    async def _block_resources(self, route):
+        if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _acquire_context(self):
+        browser = await self._ensure_browser()
+        if self._idle_contexts:
+            return self._idle_contexts.pop()
+        context = await browser.new_context(user_agent=USER_AGENT)
+        await context.route("**/*", self._block_resources)
+        return context, 0
+
+    async def _release_context(self, context, uses: int):
+        if uses >= self.max_pages_per_context or self._browser is None or not self._browser.is_connected():
+            try:
+                await context.close()
+            except Exception:
+                pass  # 브라우저가 이미 종료된 경우
+        else:
+            self._idle_contexts.append((context, uses))
+
+    async def fetch_html(self, url: str) -> Optional[str]:
+        """url의 렌더링된 HTML을 반환합니다. 실패하면 None."""
+        async with self._semaphore:
+            self._active_pages += 1
+            self._last_used = time.monotonic()
+            context, uses = await self._acquire_context()
+            page = None
+            try:
+                page = await context.new_page()
+                await page.goto(url, timeout=self.page_timeout_seconds * 1000, wait_until="domcontentloaded")
+                html = await page.content()
+                self.pages_loaded += 1
+                return html or None
+            except Exception as e:
+                print(f"[Warning] Browser failed to load {url}: {e}")
+                return None
+            finally:
+                if page is not None:
+                    await page.close()
+                await self._release_context(context, uses + 1)
+                self._active_pages -= 1
+                self._last_used = time.monotonic()
+
+    def fetch_html_threadsafe(self, url: str) -> Optional[str]:
+        """다른 스레드에서 호출합니다. 풀의 이벤트 루프에서 fetch_html()을 실행하고 결과를 기다립니다."""
+        future = asyncio.run_coroutine_threadsafe(self.fetch_html(url), self._loop)
+        try:
+            return future.result(timeout=self.page_timeout_seconds * 2)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    async def _close_browser(self):
+        contexts, self._idle_contexts = self._idle_contexts, []
+        for context, _ in contexts:
+            await context.close()
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+
+    async def _recycle_when_idle(self):
+        while True:
+            await asyncio.sleep(min(60, self.idle_seconds))
+            async with self._launch_lock:
+                idle_for = time.monotonic() - self._last_used
+                if self._browser is not None and self._active_pages == 0 and idle_for >= self.idle_seconds:
+                    print(f"Browser idle for {idle_for:.0f}s. Closing it until next use.")
+                    await self._close_browser()
+
+    async def close(self):
+        """브라우저와 Playwright를 종료합니다. (Application 종료 시 호출)"""
+        if self._idle_task is not None:
+            self._idle_task.cancel()
+            self._idle_task = None
+        await self._close_browser()
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def stats(self) -> dict:
+        return {
+            "running": self._browser is not None,
+            "launches": self.launches,
+            "pages_loaded": self.pages_loaded,
+            "idle_contexts": len(self._idle_contexts),
+            "active_pages": self._active_pages,
+        }
+
+_browser_pool: Optional[BrowserPool] = None
+
+def get_browser_pool() -> Optional[BrowserPool]:
+    """Application에 연결된 BrowserPool을 반환합니다. 봇 밖에서 실행 중이면 None."""
+    return _browser_pool
+
+async def start_browser_pool(app, **kwargs) -> BrowserPool:
+    """Application의 post_init에서 호출합니다. 풀을 만들어 bot_data["browser_pool"]에도 저장합니다."""
+    global _browser_pool
+    pool = BrowserPool(**kwargs)
+    try:
+        await pool.start()
+    except Exception as e:
+        # 브라우저를 미리 띄우지 못해도 봇은 시작합니다. (첫 요청 때 다시 시도)
+        print(f"[Warning] Failed to warm up browser: {e}")
+    app.bot_data["browser_pool"] = pool
+    _browser_pool = pool
+    return pool
+
+async def stop_browser_pool(app):
+    """Application의 post_shutdown에서 호출합니다."""
+    global _browser_pool
+    pool = app.bot_data.pop("browser_pool", None)
+    _browser_pool = None
+    if pool is not None:
+        await pool.close()
@@ -2,6 +2,13 @@ import telegram # pin: python-telegram-bot[job-queue]
 import telegram.ext # repin: python-telegram-bot[job-queue]
 from telegram import Update, ReplyKeyboardRemove
 from telegram.ext import ContextTypes, Application, CommandHandler, ConversationHandler
+from u.rapaellk.wmill_config import invalidate_all, lazy_variable
+
+# 봇 소유자의 채팅. 설정을 바꾸는 명령은 이 채팅에서만 실행합니다.
+MY_CHAT_ID = lazy_variable("u/rapaellk/telegram_chat_id")
+
+def _is_owner_chat(update: Update) -> bool:
+    return update.effective_chat is not None and str(update.effective_chat.id) == str(MY_CHAT_ID.get())
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """/start 명령어 핸들러"""
@@ -24,10 +31,21 @@ async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
     #        호출할 것이므로 END를 반환해야 합니다.
     return ConversationHandler.END
 
+async def reload_config_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    /reload_config 명령어 핸들러: 메모리에 보관 중인 Windmill 변수/리소스를 버리고 다음 사용 시 다시 가져옵니다.
+    봇 소유자의 채팅(MY_CHAT_ID)이 아니면 무시합니다.
+    """
+    if not _is_owner_chat(update):
+        print(f"Ignored /reload_config from chat {update.effective_chat.id if update.effective_chat else None}")
+        return
+    invalidate_all()
+    await update.message.reply_text("설정값을 다시 불러옵니다.")
 
 def register(app: Application):
     """공통 핸들러를 Application에 등록합니다."""
     app.add_handler(CommandHandler("start", start_command))
     # /cancel은 ConversationHandler의 fallbacks에서 주로 사용되지만,
     # 최상위 레벨에서도 등록해두면 좋습니다.
-    app.add_handler(CommandHandler("cancel", cancel))
\ No newline at end of file
+    app.add_handler(CommandHandler("cancel", cancel))
+    app.add_handler(CommandHandler("reload_config", reload_config_command))
\ No newline at end of file
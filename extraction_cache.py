@@ -0,0 +1,161 @@
+import time
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from u.rapaellk.persistent_cache import PersistentCache, cache_path, make_cache_key
+from u.rapaellk.http_client import get_session
+from u.rapaellk.extraction_executor import get_extraction_executor
+
+# 이 시간 안에 다시 요청된 URL은 네트워크 없이 캐시된 본문을 그대로 사용합니다.
+DEFAULT_FRESH_SECONDS = 24 * 3600
+# 이 시간이 지난 항목은 재검증 없이 버립니다.
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 2000
+
+# 같은 페이지를 가리키지만 추적용으로 붙는 쿼리 파라미터
+_TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid"}
+
+def canonicalize_url(url: str) -> str:
+    """
+    같은 문서를 가리키는 URL이 같은 캐시 키를 갖도록 정규화합니다.
+
+    - scheme과 host를 소문자로 바꾸고 기본 포트(:80, :443)를 제거합니다.
+    - fragment(#...)와 utm_* 등 추적용 쿼리 파라미터를 제거하고, 나머지 파라미터는 정렬합니다.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme == "http" and netloc.endswith(":80")) or (scheme == "https" and netloc.endswith(":443")):
+        netloc = netloc.rsplit(":", 1)[0]
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, netloc, parts.path or "/", urlencode(query), ""))
+
+def extract_article_text(html):
+    """HTML(str 또는 bytes)에서 본문 텍스트를 추출합니다. 큰 문서는 프로세스 풀에서 추출합니다. 내용이 없으면 None."""
+    return get_extraction_executor().extract(html, "article")
+
+class ExtractionCache:
+    """
+    정규화된 URL을 키로 추출된 본문 텍스트와 ETag / Last-Modified를 저장하는 캐시입니다.
+
+    - fresh_seconds 안의 재요청은 네트워크와 추출을 모두 건너뜁니다.
+    - 그 이후에는 조건부 GET으로 재검증하고, 304를 받으면 추출 없이 저장된 본문을 사용합니다.
+    - 저장 공간은 PersistentCache의 max_entries(LRU)와 ttl_seconds로 제한됩니다.
+    """
+
+    def __init__(self, path: str, fresh_seconds: float = DEFAULT_FRESH_SECONDS,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.fresh_seconds = fresh_seconds
+        self._cache = PersistentCache(path, ttl_seconds=ttl_seconds, max_entries=max_entries)
+        self._stats_lock = threading.Lock()
+        self.fresh_hits = 0
+        self.revalidated = 0
+        self.extracted = 0
+
+    def _key(self, url: str) -> str:
+        return make_cache_key("extraction", canonicalize_url(url))
+
+    def lookup(self, url: str):
+        """저장된 항목(dict: text, etag, last_modified, fetched_at, source)을 반환합니다. 없으면 None."""
+        return self._cache.get(self._key(url))
+
+    def store(self, url: str, text: str, etag: str = None, last_modified: str = None, source: str = "http") -> str:
+        """
+        본문을 저장하고, 캐시에 남은 본문을 반환합니다.
+        아직 신선한 Tavily 본문은 그보다 짧은 로컬 추출 결과로 덮어쓰지 않고, ETag / Last-Modified만 갱신합니다.
+        """
+        fetched_at = time.time()
+        existing = self.lookup(url)
+        if (existing and existing.get("source") == "tavily" and source != "tavily"
+                and fetched_at - existing["fetched_at"] < self.fresh_seconds
+                and len(text or "") < len(existing["text"] or "")):
+            text, source, fetched_at = existing["text"], existing["source"], existing["fetched_at"]
+        self._cache.set(self._key(url), {
+            "url": canonicalize_url(url),
+            "text": text,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": fetched_at,
+            "source": source,
+        })
+        return text
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def fetch_text(self, url: str, extract=extract_article_text, headers: dict = None, timeout: int = 10, fallback_html=None):
+        """
+        URL의 본문 텍스트를 반환합니다. 캐시가 신선하면 그대로, 아니면 (조건부) GET 후 extract(html)로 추출합니다.
+
+        Args:
+            extract (callable): HTML(bytes 또는 str)을 받아 본문 텍스트(또는 None)를 반환하는 함수.
+            fallback_html (callable): GET이 실패했을 때 url을 받아 HTML을 반환하는 함수. (예: 브라우저)
+
+        Returns:
+            추출된 텍스트. 가져오거나 추출하지 못했으면 이전에 저장된 본문, 그것도 없으면 None.
+        """
+        entry = self.lookup(url)
+        if entry and time.time() - entry["fetched_at"] < self.fresh_seconds:
+            self._count("fresh_hits")
+            return entry["text"]
+
+        request_headers = dict(headers or {})
+        if entry and entry.get("etag"):
+            request_headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            request_headers["If-Modified-Since"] = entry["last_modified"]
+
+        etag = last_modified = None
+        try:
+            response = get_session().get(url, headers=request_headers, timeout=timeout)
+            if response.status_code == 304 and entry:
+                self._count("revalidated")
+                self.store(url, entry["text"], entry.get("etag"), entry.get("last_modified"), entry.get("source", "http"))
+                return entry["text"]
+            if response.status_code != 200:
+                raise RuntimeError(f"Failed to get html (HTTP {response.status_code})")
+            # 인코딩 판별은 추출기에 맡기고 원본 바이트를 그대로 넘깁니다.
+            html = response.content
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+        except Exception as e:
+            if fallback_html is None:
+                print(e)
+                return entry["text"] if entry else None
+            print(f"Failed to get html: {e}. Try heavier way...")
+            html = fallback_html(url)
+
+        if not html:
+            print("Empty html")
+            return entry["text"] if entry else None
+        text = extract(html)
+        self._count("extracted")
+        if not text:
+            print("too short html")
+            return None
+        return self.store(url, text, etag, last_modified)
+
+    def stats(self) -> dict:
+        """신선한 캐시 적중, 304 재검증, 새로 추출한 횟수와 저장된 항목 수를 반환합니다."""
+        return {
+            "fresh_hits": self.fresh_hits,
+            "revalidated": self.revalidated,
+            "extracted": self.extracted,
+            "entries": len(self._cache),
+        }
+
+_extraction_cache = None
+_extraction_cache_lock = threading.Lock()
+
+def get_extraction_cache() -> ExtractionCache:
+    """프로세스 전체에서 공유하는 ExtractionCache를 반환합니다. (처음 사용할 때 생성)"""
+    global _extraction_cache
+    if _extraction_cache is None:
+        with _extraction_cache_lock:
+            if _extraction_cache is None:
+                _extraction_cache = ExtractionCache(cache_path("extraction_cache.sqlite3"))
+    return _extraction_cache
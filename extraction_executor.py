@@ -0,0 +1,158 @@
+import os
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from u.rapaellk.extraction_worker import run_extraction
+
+# 이보다 작은 문서만 현재 프로세스에서 바로 추출합니다. extraction_executor_benchmark로 재면
+# 프로세스 풀 왕복 비용은 1~2ms이고 trafilatura 추출은 KB당 약 0.45ms(16KB 7ms, 200KB 0.1초 이상)라,
+# 몇 KB를 넘는 문서는 워커로 보내는 편이 GIL을 덜 잡고 코어 수만큼 병렬로 처리됩니다.
+INLINE_MAX_BYTES = 8 * 1024
+RECENT_TIMINGS = 100
+# forkserver 서버가 미리 import할 모듈. extraction_forkserver가 먼저 와야 워커가 __main__을 다시 실행하지 않습니다.
+FORKSERVER_PRELOAD = ["u.rapaellk.extraction_forkserver", "u.rapaellk.extraction_worker"]
+
+def _to_bytes(html) -> bytes:
+    return html.encode("utf-8") if isinstance(html, str) else html
+
+def _mp_context():
+    """
+    워커를 만들 multiprocessing 컨텍스트. 봇은 여러 스레드를 사용하므로 fork 대신 forkserver를 씁니다.
+    forkserver가 없는 플랫폼(Windows 등)이면 None을 반환합니다. spawn은 워커마다 __main__을 다시 실행하므로 쓰지 않습니다.
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return None
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(FORKSERVER_PRELOAD)
+    return context
+
+class ExtractionExecutor:
+    """
+    trafilatura / BeautifulSoup 추출을 프로세스 풀에서 실행합니다.
+
+    두 추출기 모두 CPU를 많이 쓰면서 GIL을 잡고 있으므로, 스레드로는 병렬화되지 않고
+    봇의 asyncio.to_thread 워커도 막습니다. HTML 바이트를 워커 프로세스로 보내고 텍스트만 받아옵니다.
+
+    - inline_max_bytes 이하의 작은 문서(또는 워커가 1개이거나 forkserver를 쓸 수 없을 때)는 현재 프로세스에서 바로 추출합니다.
+    - 프로세스 풀은 처음 필요할 때 만들고, 풀이 깨지면 해당 문서는 현재 프로세스에서 추출한 뒤 다음 요청 때 다시 만듭니다.
+    - 문서별 추출 시간을 기록하며 stats()로 확인할 수 있습니다.
+    """
+
+    def __init__(self, max_workers: int = None, inline_max_bytes: int = INLINE_MAX_BYTES):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.inline_max_bytes = inline_max_bytes
+        self._mp_context = _mp_context()
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._timings = deque(maxlen=RECENT_TIMINGS)  # (kind, bytes, seconds, mode)
+        self._counts = {"inline": 0, "pool": 0}
+        self._total_seconds = 0.0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self._mp_context)
+            return self._pool
+
+    def _discard_pool(self, pool):
+        with self._pool_lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _record(self, kind: str, size: int, seconds: float, mode: str):
+        with self._stats_lock:
+            self._timings.append((kind, size, seconds, mode))
+            self._counts[mode] += 1
+            self._total_seconds += seconds
+
+    def submit(self, html, kind: str = "article") -> Future:
+        """
+        html(str 또는 bytes)에서 텍스트를 추출하는 작업을 제출하고 Future를 반환합니다.
+
+        Args:
+            kind: "article"(trafilatura 본문 추출) 또는 "text"(BeautifulSoup으로 태그 제거)
+        """
+        html = _to_bytes(html)
+        # 코어가 하나뿐이면 프로세스 풀로 얻는 이득 없이 전송 비용만 생기므로 항상 인라인으로 추출합니다.
+        if self.max_workers <= 1 or self._mp_context is None or len(html) <= self.inline_max_bytes:
+            return self._submit_inline(html, kind)
+
+        pool = self._get_pool()
+        result = Future()
+        try:
+            pool_future = pool.submit(run_extraction, kind, html)
+        except (BrokenProcessPool, RuntimeError):
+            self._discard_pool(pool)
+            return self._submit_inline(html, kind)
+
+        def on_done(f):
+            try:
+                text, seconds = f.result()
+            except BrokenProcessPool:
+                self._discard_pool(pool)
+                try:
+                    result.set_result(self._submit_inline(html, kind).result())
+                except Exception as e:
+                    result.set_exception(e)
+                return
+            except Exception as e:
+                result.set_exception(e)
+                return
+            self._record(kind, len(html), seconds, "pool")
+            result.set_result(text)
+
+        pool_future.add_done_callback(on_done)
+        return result
+
+    def _submit_inline(self, html: bytes, kind: str) -> Future:
+        future = Future()
+        try:
+            text, seconds = run_extraction(kind, html)
+            self._record(kind, len(html), seconds, "inline")
+            future.set_result(text)
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def extract(self, html, kind: str = "article"):
+        """submit(html, kind).result()와 같습니다."""
+        return self.submit(html, kind).result()
+
+    def stats(self) -> dict:
+        """인라인/프로세스 풀 추출 횟수, 문서당 평균/최대 시간, 최근 문서별 추출 시간을 반환합니다."""
+        with self._stats_lock:
+            timings = list(self._timings)
+            count = self._counts["inline"] + self._counts["pool"]
+            return {
+                "inline": self._counts["inline"],
+                "pool": self._counts["pool"],
+                "avg_seconds": (self._total_seconds / count) if count else 0.0,
+                "max_seconds": max((t[2] for t in timings), default=0.0),
+                "recent": [
+                    {"kind": kind, "bytes": size, "seconds": round(seconds, 4), "mode": mode}
+                    for kind, size, seconds, mode in timings
+                ],
+            }
+
+    def shutdown(self):
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+_extraction_executor = None
+_extraction_executor_lock = threading.Lock()
+
+def get_extraction_executor() -> ExtractionExecutor:
+    """프로세스 전체에서 공유하는 ExtractionExecutor를 반환합니다."""
+    global _extraction_executor
+    if _extraction_executor is None:
+        with _extraction_executor_lock:
+            if _extraction_executor is None:
+                _extraction_executor = ExtractionExecutor()
+    return _extraction_executor
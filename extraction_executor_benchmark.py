@@ -0,0 +1,89 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from u.rapaellk.extraction_executor import ExtractionExecutor, INLINE_MAX_BYTES
+from u.rapaellk.extraction_worker import run_extraction
+
+def _build_article_html(size_bytes: int) -> bytes:
+    """실제 기사 페이지와 비슷한 형태(메뉴, 스크립트, 본문 문단, 관련 기사 목록)의 HTML을 만듭니다."""
+    head = (
+        "<html><head><title>Benchmark article</title>"
+        "<script>window.dataLayer = window.dataLayer || []; function gtag(){dataLayer.push(arguments);}</script>"
+        "</head><body><nav><ul>" + "".join(f"<li><a href='/section/{i}'>Section {i}</a></li>" for i in range(20)) +
+        "</ul></nav><article><h1>Why the new release is 3.5x faster</h1>"
+    )
+    tail = "</article><aside><ul>" + "".join(f"<li><a href='/related/{i}'>Related {i}</a></li>" for i in range(10)) + "</ul></aside></body></html>"
+    parts = [head]
+    total = len(head) + len(tail)
+    index = 0
+    while total < size_bytes:
+        paragraph = (
+            f"<p>Paragraph {index}: the author explains how the <b>scheduler</b> avoids lock contention "
+            f"and why batching requests reduces tail latency. 저자는 스케줄러가 잠금 경합을 피하는 방법과 "
+            f"요청을 묶으면 지연 시간이 줄어드는 이유를 설명합니다. <a href='/ref/{index}'>reference</a></p>"
+        )
+        parts.append(paragraph)
+        total += len(paragraph.encode("utf-8"))
+        index += 1
+    parts.append(tail)
+    return "".join(parts).encode("utf-8")
+
+def _best(func, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def _measure_size(executor: ExtractionExecutor, size_kb: int, repeat: int) -> dict:
+    """문서 크기별 인라인 추출 시간과 프로세스 풀 왕복 비용(전송 + 대기, 추출 시간 제외)을 측정합니다."""
+    html = _build_article_html(size_kb * 1024)
+    inline_seconds = _best(lambda: run_extraction("article", html), repeat)
+    pool_seconds = _best(lambda: executor.extract(html, "article"), repeat)
+    return {
+        "size_kb": size_kb,
+        "inline_seconds": round(inline_seconds, 4),
+        "pool_overhead_seconds": round(max(pool_seconds - inline_seconds, 0.0), 4),
+    }
+
+def _measure_batch(executor: ExtractionExecutor, documents: list) -> float:
+    """봇처럼 여러 스레드에서 동시에 추출을 요청했을 때 전체 걸린 시간을 측정합니다."""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(documents)) as threads:
+        list(threads.map(lambda html: executor.extract(html, "article"), documents))
+    return time.perf_counter() - started
+
+def main(sizes_kb=(4, 8, 16, 32, 64, 128, 256), batch_size: int = 16, batch_kb: int = 200, repeat: int = 5, workers: int = None):
+    """
+    문서 크기별로 인라인 추출 시간과 프로세스 풀 왕복 비용을 비교하고(INLINE_MAX_BYTES를 정하는 근거),
+    batch_kb 크기 문서 batch_size개를 동시에 추출할 때 인라인만 쓰는 경우와 현재 설정의 전체 시간을 비교합니다.
+    workers를 지정하지 않으면 코어 수만큼 워커를 씁니다. (코어가 하나면 프로세스 풀을 쓰지 않으므로 2 이상을 지정)
+    """
+    pooled = ExtractionExecutor(max_workers=workers, inline_max_bytes=0)
+    inline_only = ExtractionExecutor(max_workers=workers, inline_max_bytes=float("inf"))
+    default = ExtractionExecutor(max_workers=workers)
+    try:
+        # 워커를 미리 띄워 첫 요청의 프로세스 시작 비용이 측정에 섞이지 않게 합니다.
+        _measure_batch(pooled, [_build_article_html(4 * 1024)] * pooled.max_workers)
+        _measure_batch(default, [_build_article_html(4 * 1024)] * default.max_workers)
+        documents = [_build_article_html(batch_kb * 1024) for _ in range(batch_size)]
+        _measure_batch(default, documents)
+        result = {
+            "workers": pooled.max_workers,
+            "inline_max_bytes": INLINE_MAX_BYTES,
+            "sizes": [_measure_size(pooled, size_kb, repeat) for size_kb in sizes_kb],
+            "batch": {
+                "documents": batch_size,
+                "size_kb": batch_kb,
+                "inline_only_seconds": round(_measure_batch(inline_only, documents), 3),
+                "default_seconds": round(_measure_batch(default, documents), 3),
+                "default_modes": {mode: default.stats()[mode] for mode in ("inline", "pool")},
+            },
+        }
+    finally:
+        pooled.shutdown()
+        default.shutdown()
+    print(result)
+    return result
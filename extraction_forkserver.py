@@ -0,0 +1,28 @@
+"""
+ExtractionExecutor의 forkserver 서버에서만 import하는 모듈입니다. (set_forkserver_preload)
+
+multiprocessing은 워커를 준비할 때(spawn.prepare) 부모의 __main__을 __mp_main__으로 다시 실행합니다.
+Windmill에서는 __main__이 봇 스크립트를 실행하는 래퍼이므로, 그대로 두면 워커마다 봇이 다시 시작됩니다.
+워커가 실행하는 함수는 모두 extraction_worker에 있어 __main__이 필요 없으므로, forkserver 서버에서
+spawn.prepare가 준비 데이터의 __main__ 항목을 무시하도록 바꿔 두고, 서버에서 fork된 워커가 이를 물려받습니다.
+
+CPython 3.4 이상의 구현에 의존합니다. (3.11에서 확인)
+- forkserver 서버는 preload 모듈을 import한 뒤 워커를 fork하고, 워커는 spawn._main()에서
+  모듈 전역 prepare()로 준비 데이터를 적용합니다.
+- 부모의 __main__ 정보는 준비 데이터의 init_main_from_name / init_main_from_path 키로 전달됩니다.
+봇 프로세스나 spawn으로 만든 자식에서 import하면 아무것도 바꾸지 않습니다.
+"""
+import sys
+from multiprocessing import spawn
+
+_MAIN_MODULE_KEYS = ("init_main_from_name", "init_main_from_path")
+
+def _in_forkserver() -> bool:
+    """forkserver 서버는 'python -c "from multiprocessing.forkserver import main; ..."'로 실행됩니다."""
+    return sys.argv[:1] == ["-c"] and "multiprocessing.forkserver" in sys.modules
+
+def _prepare_without_main(data, _prepare=spawn.prepare):
+    _prepare({key: value for key, value in data.items() if key not in _MAIN_MODULE_KEYS})
+
+if _in_forkserver():
+    spawn.prepare = _prepare_without_main
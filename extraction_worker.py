@@ -0,0 +1,33 @@
+"""
+ExtractionExecutor의 워커 프로세스가 실행하는 추출 함수입니다.
+
+forkserver 서버가 이 모듈을 미리 import(set_forkserver_preload)하고, 워커는 서버에서 fork되므로
+trafilatura, BeautifulSoup을 워커마다 다시 import하지 않습니다.
+"""
+import time
+
+import trafilatura
+from bs4 import BeautifulSoup
+
+def _extract_article(html: bytes):
+    return trafilatura.extract(
+        html,
+        output_format='txt',      # 'txt' (기본값), 'json', 'xml' 등
+        include_comments=False,   # 댓글 제외
+        include_tables=False,     # 표(테이블) 제외
+        no_fallback=False         # 기본 추출 실패 시 다른 방법 시도
+    )
+
+def _extract_plain_text(html: bytes):
+    return BeautifulSoup(html, 'html.parser').get_text()
+
+_EXTRACTORS = {
+    "article": _extract_article,
+    "text": _extract_plain_text,
+}
+
+def run_extraction(kind: str, html: bytes):
+    """워커 프로세스(또는 인라인으로 현재 프로세스)에서 실행됩니다. (추출 결과, 걸린 시간(초))를 반환합니다."""
+    started = time.perf_counter()
+    text = _EXTRACTORS[kind](html)
+    return text, time.perf_counter() - started
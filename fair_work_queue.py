@@ -0,0 +1,76 @@
+import asyncio
+from collections import OrderedDict, deque
+
+class FairWorkQueue:
+    """
+    사용자(owner)별로 공평하게 작업을 처리하는 asyncio 작업 큐입니다.
+
+    - workers개의 워커 태스크가 handler(job)을 동시에 실행합니다.
+    - 사용자별 대기열을 라운드로빈으로 돌며 꺼내므로, 한 사용자가 링크를 한꺼번에 많이 보내도
+      다른 사용자의 작업이 그 뒤에 모두 밀리지 않습니다.
+    - 워커는 처음 submit() 할 때 현재 이벤트 루프에서 시작됩니다.
+    """
+
+    def __init__(self, handler, workers: int = 2):
+        self.handler = handler
+        self.workers = workers
+        self._queues = OrderedDict()  # owner -> deque[job], 다음에 꺼낼 사용자가 앞쪽
+        self._condition = None
+        self._tasks = []
+
+    def _ensure_started(self):
+        if self._tasks:
+            return
+        self._condition = asyncio.Condition()
+        self._tasks = [asyncio.create_task(self._worker(), name=f"fair-work-queue-{i}") for i in range(self.workers)]
+
+    def waiting(self) -> list:
+        """대기 중인 작업을 실행될 순서대로 반환합니다."""
+        order = []
+        queues = [list(q) for q in self._queues.values()]
+        for round_index in range(max((len(q) for q in queues), default=0)):
+            order.extend(q[round_index] for q in queues if round_index < len(q))
+        return order
+
+    def position(self, job) -> int:
+        """대기 순번(1부터)을 반환합니다. 이미 시작했거나 없는 작업이면 0."""
+        for index, waiting_job in enumerate(self.waiting()):
+            if waiting_job is job:
+                return index + 1
+        return 0
+
+    async def submit(self, owner, job) -> int:
+        """작업을 owner의 대기열에 넣고 대기 순번을 반환합니다."""
+        self._ensure_started()
+        async with self._condition:
+            self._queues.setdefault(owner, deque()).append(job)
+            position = self.position(job)
+            self._condition.notify()
+        return position
+
+    async def _next_job(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._queues)
+            owner, jobs = next(iter(self._queues.items()))
+            job = jobs.popleft()
+            # 꺼낸 사용자는 맨 뒤로 보내고, 대기열이 비었으면 제거합니다.
+            del self._queues[owner]
+            if jobs:
+                self._queues[owner] = jobs
+            return job
+
+    async def _worker(self):
+        while True:
+            job = await self._next_job()
+            try:
+                await self.handler(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[Error] Work queue job failed: {e}")
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
@@ -0,0 +1,77 @@
+import feedparser
+
+from u.rapaellk.persistent_cache import PersistentCache, cache_path
+from u.rapaellk.http_client import get_session
+
+_validator_cache = None
+
+def get_validator_cache() -> PersistentCache:
+    """피드별 ETag / Last-Modified 값을 보관하는 캐시를 반환합니다. (처음 사용할 때 생성)"""
+    global _validator_cache
+    if _validator_cache is None:
+        _validator_cache = PersistentCache(cache_path("feed_validators.sqlite3"), ttl_seconds=None, max_entries=1000)
+    return _validator_cache
+
+class FeedFetchResult:
+    """fetch_feed()의 결과. 피드가 변경되지 않았으면(304) feed는 None입니다."""
+
+    def __init__(self, url, feed=None, not_modified=False, etag=None, last_modified=None, bytes_downloaded=0, bytes_saved=0):
+        self.url = url
+        self.feed = feed
+        self.not_modified = not_modified
+        self.etag = etag
+        self.last_modified = last_modified
+        self.bytes_downloaded = bytes_downloaded
+        self.bytes_saved = bytes_saved
+
+    @property
+    def entries(self):
+        return self.feed.entries if self.feed is not None else []
+
+def fetch_feed(url: str, verify: bool = True, timeout: int = 15) -> FeedFetchResult:
+    """
+    조건부 GET(If-None-Match / If-Modified-Since)으로 RSS 피드를 가져옵니다.
+
+    이전에 저장된 validator가 있고 서버가 304를 반환하면 파싱을 건너뛰고
+    not_modified=True인 결과를 반환합니다. 이때 bytes_saved는 마지막으로 받은 피드의 크기입니다.
+
+    validator는 자동으로 저장되지 않습니다. 피드 처리(전송)가 끝난 뒤
+    save_feed_validators()를 호출해야 다음 실행에서 304를 받을 수 있습니다.
+    """
+    stored = get_validator_cache().get(url) or {}
+    headers = {"User-Agent": feedparser.USER_AGENT}
+    if stored.get("etag"):
+        headers["If-None-Match"] = stored["etag"]
+    if stored.get("last_modified"):
+        headers["If-Modified-Since"] = stored["last_modified"]
+
+    response = get_session().get(url, headers=headers, timeout=timeout, verify=verify)
+    if response.status_code == 304:
+        bytes_saved = stored.get("content_length", 0)
+        print(f"[feed] {url}: 304 Not Modified (saved {bytes_saved} bytes)")
+        return FeedFetchResult(
+            url, not_modified=True,
+            etag=stored.get("etag"), last_modified=stored.get("last_modified"),
+            bytes_saved=bytes_saved,
+        )
+    response.raise_for_status()
+
+    content = response.content
+    print(f"[feed] {url}: {response.status_code} ({len(content)} bytes)")
+    return FeedFetchResult(
+        url,
+        feed=feedparser.parse(content, response_headers=dict(response.headers)),
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified"),
+        bytes_downloaded=len(content),
+    )
+
+def save_feed_validators(result: FeedFetchResult):
+    """피드 처리가 끝난 뒤 validator를 저장합니다. 서버가 validator를 주지 않았으면 아무것도 하지 않습니다."""
+    if result.not_modified or not (result.etag or result.last_modified):
+        return
+    get_validator_cache().set(result.url, {
+        "etag": result.etag,
+        "last_modified": result.last_modified,
+        "content_length": result.bytes_downloaded,
+    })
@@ -0,0 +1,138 @@
+import re
+import threading
+from typing import Optional
+
+import google.generativeai as genai
+from google.api_core.exceptions import ResourceExhausted
+
+from u.rapaellk.rate_limiter import TokenBucket, backoff_delay
+from u.rapaellk.wmill_config import lazy_variable
+
+GOOGLE_AI_API_KEY = lazy_variable("u/rapaellk/googleai_api_key_free")
+
+# 모델별 분당 요청 수(RPM)와 분당 토큰 수(TPM) 한도 (무료 티어 기준)
+MODEL_QUOTAS = {
+    "gemini-2.5-flash": {"rpm": 10, "tpm": 250_000},
+}
+DEFAULT_QUOTA = {"rpm": 10, "tpm": 250_000}
+
+# 서버가 재시도 힌트를 주지 않았을 때 사용하는 지수 백오프의 기본 간격(초)
+BACKOFF_BASE_SECONDS = 5.0
+
+_configured = False
+_configure_lock = threading.Lock()
+
+def ensure_configured():
+    """genai.configure()를 처음 Gemini를 호출할 때 한 번만 실행합니다. (import 시점에는 API 키를 가져오지 않음)"""
+    global _configured
+    if _configured:
+        return
+    with _configure_lock:
+        if not _configured:
+            genai.configure(api_key=GOOGLE_AI_API_KEY.get())
+            _configured = True
+
+class GeminiQuota:
+    """
+    한 모델에 대한 클라이언트 측 요청/토큰 한도입니다.
+    같은 프로세스의 모든 호출자가 하나의 GeminiQuota를 공유하므로,
+    병렬로 호출하더라도 한도 안에서 요청 간격이 조절됩니다.
+    """
+
+    def __init__(self, rpm: int, tpm: int):
+        self.requests = TokenBucket(rate=rpm / 60.0, capacity=rpm)
+        self.tokens = TokenBucket(rate=tpm / 60.0, capacity=tpm)
+
+    def acquire(self, estimated_tokens: int = 0):
+        """요청 하나를 보낼 수 있을 때까지 기다립니다."""
+        self.requests.acquire(1)
+        if estimated_tokens:
+            self.tokens.acquire(estimated_tokens)
+
+    def pause(self, seconds: float):
+        """서버가 요청을 거절했을 때, 모든 호출자가 seconds 동안 요청을 보내지 않도록 합니다."""
+        self.requests.pause(seconds)
+
+_quotas = {}
+_quotas_lock = threading.Lock()
+
+def get_quota(model_name: str) -> GeminiQuota:
+    """모델 이름에 해당하는 공유 GeminiQuota를 반환합니다."""
+    with _quotas_lock:
+        if model_name not in _quotas:
+            _quotas[model_name] = GeminiQuota(**MODEL_QUOTAS.get(model_name, DEFAULT_QUOTA))
+        return _quotas[model_name]
+
+def estimate_tokens(text) -> int:
+    """
+    토큰 수를 대략 추정합니다. (API 호출 없이)
+    영문 등 ASCII는 약 4글자당 1토큰, 한글 등 그 외 문자는 1글자당 1토큰으로 계산합니다.
+    """
+    if not isinstance(text, str):
+        text = str(text)
+    ascii_chars = sum(1 for c in text if ord(c) < 128)
+    return ascii_chars // 4 + (len(text) - ascii_chars) + 1
+
+def split_text_by_tokens(text: str, max_tokens: int) -> list:
+    """
+    text를 추정 토큰 수가 max_tokens 이하인 청크들로 나눕니다.
+    줄 경계에서 나누며, 한 줄이 max_tokens를 넘으면 글자 수 기준으로 다시 나눕니다.
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+    for line in text.splitlines(keepends=True):
+        line_tokens = estimate_tokens(line)
+        if line_tokens > max_tokens:
+            # 한 글자는 최대 1토큰으로 추정되므로 (max_tokens - 1)글자씩 자르면 한도를 넘지 않습니다.
+            step = max(1, max_tokens - 1)
+            pieces = [line[i:i + step] for i in range(0, len(line), step)]
+        else:
+            pieces = [line]
+        for piece in pieces:
+            piece_tokens = line_tokens if len(pieces) == 1 else estimate_tokens(piece)
+            if current and current_tokens + piece_tokens > max_tokens:
+                chunks.append("".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        chunks.append("".join(current))
+    return chunks
+
+def get_retry_delay(error: Exception) -> Optional[float]:
+    """429 응답에 포함된 서버의 재시도 힌트(RetryInfo)를 초 단위로 반환합니다. 없으면 None."""
+    for detail in getattr(error, "details", None) or []:
+        retry_delay = getattr(detail, "retry_delay", None)
+        if retry_delay is not None:
+            return retry_delay.seconds + retry_delay.nanos / 1e9
+    match = re.search(r"retry_delay\s*\{\s*seconds:\s*(\d+)", str(error)) or \
+        re.search(r"retry in ([\d.]+)\s*s", str(error), re.IGNORECASE)
+    if match:
+        return float(match.group(1))
+    return None
+
+def generate_content_with_retry(model, model_name: str, contents, max_retries: int = 3, max_delay_seconds: float = 60):
+    """
+    모델 한도에 맞춰 요청 간격을 조절하면서 model.generate_content(contents)를 호출합니다.
+
+    ResourceExhausted(HTTP 429)가 발생하면 서버의 재시도 힌트가 있으면 그만큼,
+    없으면 지터가 포함된 지수 백오프(최대 max_delay_seconds)만큼 기다린 뒤 재시도합니다.
+    기다리는 동안에는 같은 모델을 쓰는 다른 호출자들도 함께 멈춥니다.
+    max_retries번 재시도 후에도 실패하면 마지막 ResourceExhausted를 다시 발생시킵니다.
+    봇의 Gemini 호출은 모두 이 함수를 거치므로, 호출하는 쪽에서 따로 간격을 두거나 429를 재시도하지 않습니다.
+    """
+    ensure_configured()
+    quota = get_quota(model_name)
+    tokens = estimate_tokens(contents)
+    for attempt in range(max_retries + 1):
+        quota.acquire(tokens)
+        try:
+            return model.generate_content(contents)
+        except ResourceExhausted as e:
+            if attempt >= max_retries:
+                raise
+            hint = get_retry_delay(e)
+            delay = hint if hint is not None else backoff_delay(attempt, base=BACKOFF_BASE_SECONDS, cap=max_delay_seconds)
+            print(f"[Warning] Rate limit exceeded. Waiting for {delay:.1f} seconds... (Attempt {attempt + 1}/{max_retries})")
+            quota.pause(delay)
@@ -0,0 +1,225 @@
+import re
+import threading
+import unicodedata
+from typing import Optional, Tuple
+
+from geopy.geocoders import Nominatim
+
+from u.rapaellk.persistent_cache import PersistentCache, cache_path, make_cache_key
+from u.rapaellk.rate_limiter import TokenBucket
+from u.rapaellk.ttl_cache import TTLCache
+
+NOMINATIM_USER_AGENT = "rapaellk-weather-bot-v1"
+# Nominatim 사용 정책: 초당 최대 1회 요청
+_nominatim_bucket = TokenBucket(rate=1.0, capacity=1)
+_geolocator = None
+
+# 찾지 못한 이름은 잠시 기억하여 같은 오타로 Nominatim을 반복 호출하지 않습니다.
+NOT_FOUND_TTL_SECONDS = 3600
+
+# (표시 이름, 위도, 경도, 별칭...) 시·도는 청사, 시는 시청, 구는 구청 좌표입니다.
+# 서울의 '중구', '강서구'처럼 다른 도시에도 있는 이름은 '서울 중구' 형태로만 찾습니다.
+GAZETTEER = (
+    # 광역 자치단체
+    ("서울특별시", 37.5665, 126.9780, "서울", "서울시"),
+    ("부산광역시", 35.1796, 129.0756, "부산", "부산시"),
+    ("대구광역시", 35.8714, 128.6014, "대구", "대구시"),
+    ("인천광역시", 37.4563, 126.7052, "인천", "인천시"),
+    ("광주광역시", 35.1595, 126.8526, "광주", "광주시"),
+    ("대전광역시", 36.3504, 127.3845, "대전", "대전시"),
+    ("울산광역시", 35.5384, 129.3114, "울산", "울산시"),
+    ("세종특별자치시", 36.4800, 127.2890, "세종", "세종시"),
+    ("경기도", 37.2752, 127.0095, "경기"),
+    ("강원특별자치도", 37.8854, 127.7298, "강원도", "강원"),
+    ("충청북도", 36.6357, 127.4917, "충북"),
+    ("충청남도", 36.6588, 126.6728, "충남"),
+    ("전북특별자치도", 35.8203, 127.1088, "전라북도", "전북"),
+    ("전라남도", 34.8161, 126.4629, "전남"),
+    ("경상북도", 36.5760, 128.5056, "경북"),
+    ("경상남도", 35.2383, 128.6924, "경남"),
+    ("제주특별자치도", 33.4996, 126.5312, "제주도", "제주"),
+    # 주요 시
+    ("수원시", 37.2636, 127.0286, "수원"),
+    ("성남시", 37.4200, 127.1267, "성남"),
+    ("고양시", 37.6584, 126.8320, "고양"),
+    ("용인시", 37.2411, 127.1776, "용인"),
+    ("안양시", 37.3943, 126.9568, "안양"),
+    ("부천시", 37.5034, 126.7660, "부천"),
+    ("화성시", 37.1995, 126.8312, "화성"),
+    ("남양주시", 37.6360, 127.2165, "남양주"),
+    ("파주시", 37.7599, 126.7802, "파주"),
+    ("의정부시", 37.7381, 127.0337, "의정부"),
+    ("평택시", 36.9921, 127.1129, "평택"),
+    ("김포시", 37.6153, 126.7156, "김포"),
+    ("춘천시", 37.8813, 127.7298, "춘천"),
+    ("원주시", 37.3422, 127.9202, "원주"),
+    ("강릉시", 37.7519, 128.8761, "강릉"),
+    ("청주시", 36.6424, 127.4890, "청주"),
+    ("천안시", 36.8151, 127.1139, "천안"),
+    ("전주시", 35.8242, 127.1480, "전주"),
+    ("여수시", 34.7604, 127.6622, "여수"),
+    ("포항시", 36.0190, 129.3435, "포항"),
+    ("경주시", 35.8562, 129.2247, "경주"),
+    ("창원시", 35.2281, 128.6811, "창원"),
+    ("김해시", 35.2285, 128.8894, "김해"),
+    ("제주시", 33.4996, 126.5312),
+    ("서귀포시", 33.2541, 126.5601, "서귀포"),
+    # 서울 자치구
+    ("서울 종로구", 37.5735, 126.9790, "종로구", "종로"),
+    ("서울 중구", 37.5641, 126.9979),
+    ("서울 용산구", 37.5326, 126.9905, "용산구", "용산"),
+    ("서울 성동구", 37.5634, 127.0369, "성동구"),
+    ("서울 광진구", 37.5385, 127.0823, "광진구"),
+    ("서울 동대문구", 37.5744, 127.0396, "동대문구"),
+    ("서울 중랑구", 37.6066, 127.0927, "중랑구"),
+    ("서울 성북구", 37.5894, 127.0167, "성북구"),
+    ("서울 강북구", 37.6398, 127.0255, "강북구"),
+    ("서울 도봉구", 37.6688, 127.0471, "도봉구"),
+    ("서울 노원구", 37.6542, 127.0568, "노원구", "노원"),
+    ("서울 은평구", 37.6027, 126.9291, "은평구", "은평"),
+    ("서울 서대문구", 37.5791, 126.9368, "서대문구"),
+    ("서울 마포구", 37.5663, 126.9019, "마포구", "마포"),
+    ("서울 양천구", 37.5170, 126.8665, "양천구"),
+    ("서울 강서구", 37.5509, 126.8495),
+    ("서울 구로구", 37.4954, 126.8874, "구로구", "구로"),
+    ("서울 금천구", 37.4569, 126.8955, "금천구"),
+    ("서울 영등포구", 37.5264, 126.8962, "영등포구", "영등포"),
+    ("서울 동작구", 37.5124, 126.9393, "동작구"),
+    ("서울 관악구", 37.4784, 126.9516, "관악구", "관악"),
+    ("서울 서초구", 37.4837, 127.0324, "서초구", "서초"),
+    ("서울 강남구", 37.5172, 127.0473, "강남구", "강남"),
+    ("서울 송파구", 37.5145, 127.1059, "송파구", "송파"),
+    ("서울 강동구", 37.5301, 127.1238, "강동구"),
+    # 역, 공항, 명소
+    ("서울역", 37.5547, 126.9707),
+    ("강남역", 37.4979, 127.0276),
+    ("홍대입구역", 37.5572, 126.9245, "홍대", "홍대입구"),
+    ("여의도", 37.5219, 126.9245),
+    ("광화문", 37.5759, 126.9768),
+    ("경복궁", 37.5796, 126.9770),
+    ("잠실", 37.5133, 127.1001, "잠실역"),
+    ("코엑스", 37.5116, 127.0595, "COEX"),
+    ("롯데월드타워", 37.5126, 127.1025),
+    ("N서울타워", 37.5512, 126.9882, "남산서울타워", "남산타워", "남산"),
+    ("판교역", 37.3948, 127.1112, "판교"),
+    ("인천국제공항", 37.4602, 126.4407, "인천공항"),
+    ("김포국제공항", 37.5587, 126.7945, "김포공항"),
+    ("김해국제공항", 35.1795, 128.9382, "김해공항"),
+    ("제주국제공항", 33.5104, 126.4914, "제주공항"),
+    ("부산역", 35.1151, 129.0415),
+    ("해운대", 35.1587, 129.1604, "해운대해수욕장"),
+    ("대전역", 36.3322, 127.4343),
+    ("동대구역", 35.8797, 128.6285),
+    ("광주송정역", 35.1373, 126.7930),
+)
+
+_IGNORED_CHARACTERS = re.compile(r"[\s,.·\-_()]+")
+
+def normalize_place_name(name: str) -> str:
+    """
+    장소 이름을 캐시 키로 쓰기 위해 정규화합니다.
+    유니코드 NFC 정규화, 대소문자 통일(casefold), 공백과 구두점 제거를 하므로
+    '서울 역', '서울역', ' COEX ', 'coex'는 각각 같은 키가 됩니다.
+    """
+    return _IGNORED_CHARACTERS.sub("", unicodedata.normalize("NFC", name).casefold())
+
+# '서울 강남구'는 '서울시 강남구', '서울특별시 강남구'로도 찾을 수 있게 합니다.
+_REGION_PREFIX_VARIANTS = {"서울 ": ("서울시 ", "서울특별시 ")}
+
+def _build_gazetteer_index(gazetteer) -> dict:
+    index = {}
+    for display_name, lat, lon, *aliases in gazetteer:
+        names = [display_name, *aliases]
+        for prefix, variants in _REGION_PREFIX_VARIANTS.items():
+            if display_name.startswith(prefix):
+                names.extend(variant + display_name[len(prefix):] for variant in variants)
+        for name in names:
+            index.setdefault(normalize_place_name(name), (lat, lon, display_name))
+    return index
+
+def _get_geolocator():
+    global _geolocator
+    if _geolocator is None:
+        _geolocator = Nominatim(user_agent=NOMINATIM_USER_AGENT)
+    return _geolocator
+
+def nominatim_geocode(location_name: str, timeout: float = 10) -> Optional[Tuple[float, float]]:
+    """Nominatim으로 장소 이름의 좌표를 찾습니다. 사용 정책에 맞춰 초당 1회로 제한합니다. 없으면 None."""
+    _nominatim_bucket.acquire()
+    location = _get_geolocator().geocode(location_name, timeout=timeout)
+    if not location:
+        return None
+    print(f"입력: {location_name}")
+    print(f"주소: {location.address}")
+    print(f"위도: {location.latitude}")
+    print(f"경도: {location.longitude}")
+    return location.latitude, location.longitude
+
+class GeocodingCache:
+    """
+    장소 이름 -> 좌표(forward), 좌표 -> 장소 이름(reverse) 조회 결과를 SQLite에 보관하는 캐시입니다.
+
+    - forward: 정규화한 이름으로 내장 지명 사전(GAZETTEER), 디스크 캐시, Nominatim 순으로 찾습니다.
+      자주 쓰는 국내 지명은 네트워크 없이 바로 찾습니다.
+    - reverse: 좌표로 디스크 캐시를 먼저 찾고, 없으면 lookup(예: OWM reverse geocoding)을 호출해 저장합니다.
+    - 두 캐시 모두 봇을 다시 시작해도 유지됩니다.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 90 * 24 * 3600, max_entries: int = 5000, gazetteer=GAZETTEER):
+        self._cache = PersistentCache(path, ttl_seconds=ttl_seconds, max_entries=max_entries)
+        self._gazetteer = _build_gazetteer_index(gazetteer)
+        self._not_found = TTLCache(NOT_FOUND_TTL_SECONDS, max_entries=256)
+        self.gazetteer_hits = 0
+        self.network_lookups = 0
+
+    def forward(self, location_name: str, lookup=nominatim_geocode) -> Optional[Tuple[float, float]]:
+        """장소 이름의 (위도, 경도)를 반환합니다. 찾지 못하면 None."""
+        normalized = normalize_place_name(location_name)
+        entry = self._gazetteer.get(normalized)
+        if entry is not None:
+            self.gazetteer_hits += 1
+            return entry[0], entry[1]
+
+        key = make_cache_key("geocode_forward", normalized)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return tuple(cached)
+        if self._not_found.get(normalized):
+            return None
+
+        self.network_lookups += 1
+        coordinates = lookup(location_name)
+        if coordinates is None:
+            self._not_found.set(normalized, True)
+            return None
+        self._cache.set(key, list(coordinates))
+        return tuple(coordinates)
+
+    def reverse(self, lat: float, lon: float, lookup) -> str:
+        """좌표의 장소 이름을 반환합니다. 캐시에 없으면 lookup()의 결과를 저장하고 반환합니다."""
+        key = make_cache_key("geocode_reverse", round(lat, 4), round(lon, 4))
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        self.network_lookups += 1
+        name = lookup()
+        if name:
+            self._cache.set(key, name)
+        return name
+
+    def stats(self) -> dict:
+        stats = self._cache.stats()
+        stats.update({"gazetteer_hits": self.gazetteer_hits, "network_lookups": self.network_lookups})
+        return stats
+
+_geocoding_cache = None
+_geocoding_cache_lock = threading.Lock()
+
+def get_geocoding_cache() -> GeocodingCache:
+    """프로세스 전체에서 공유하는 GeocodingCache를 반환합니다. (처음 사용할 때 생성)"""
+    global _geocoding_cache
+    if _geocoding_cache is None:
+        with _geocoding_cache_lock:
+            if _geocoding_cache is None:
+                _geocoding_cache = GeocodingCache(cache_path("geocoding.sqlite3"))
+    return _geocoding_cache
@@ -1,21 +1,37 @@
-import wmill
-import requests
+import os
 import pprint
-from typing import Dict, Any
+import time
+from typing import Dict, Any, Optional, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
 import traceback
 import telegramify_markdown
 import json
-from geopy.geocoders import Nominatim
 
 import google.generativeai as genai
-import json
-import time
 from google.api_core.exceptions import ResourceExhausted
-from typing import Dict, Any
 
-genai.configure(api_key=wmill.get_variable("u/rapaellk/googleai_api_key_free"))
+from u.rapaellk.http_client import get_session
+from u.rapaellk.gemini_client import generate_content_with_retry
+from u.rapaellk.wmill_config import lazy_variable
+from u.rapaellk.ttl_cache import TTLCache
+from f.telegram_life_bot.weather_rules import build_suggestion
+from f.telegram_life_bot.geocoding_cache import get_geocoding_cache
+
+# 장소 목록은 자주 바뀌지 않으므로 메모리에 보관하고, 10분이 지나면 백그라운드에서 새로 가져옵니다.
+CONFIG_TTL_SECONDS = 600
+IMPORTANT_LOCATIONS = lazy_variable("u/rapaellk/important_locations", cast=json.loads, ttl=CONFIG_TTL_SECONDS)
 
-def process_weather_info_with_gemini(data: Dict[str, Any], max_retries=3, delay_seconds=60):
+# 외출 제안은 규칙(weather_rules)으로 만들고, Gemini는 문장을 다듬는 용도로만 사용합니다.
+# - "off": Gemini를 호출하지 않습니다.
+# - "followup": 규칙 기반 메시지를 먼저 보내고, 핸들러가 Gemini로 다듬은 메시지로 나중에 수정합니다. (기본값)
+# - "inline": 응답 전에 Gemini로 다듬습니다. (이전 동작, 응답이 Gemini 호출만큼 늦어짐)
+WEATHER_LLM_MODE = os.environ.get("WEATHER_LLM_MODE", "followup")
+
+def process_weather_info_with_gemini(data, max_retries=3, delay_seconds=60):
+    """
+    날씨 데이터(dict)를 번역하고 외출 제안을 다듬은 결과(dict)를 반환합니다.
+    data가 여러 장소의 목록이면 한 번의 호출로 처리하고, 같은 순서의 결과 목록을 반환합니다.
+    """
     # (1) 시스템 프롬프트: 모델의 역할, 규칙, 페르소나 정의
     SYSTEM_PROMPT = """
     당신은 날씨 데이터를 분석하여 사용자에게 조언을 주는 유용한 AI 비서입니다.
@@ -31,6 +47,7 @@ def process_weather_info_with_gemini(data: Dict[str, Any], max_retries=3, delay_
     - [긍정] 날씨와 공기 질이 모두 좋다면(예: 맑음, 강수확률 낮음, AQI 좋음/보통), 야외 활동하기 좋은 날씨라고 언급합니다.
     - [종합] 이 모든 조건을 종합하여 하나의 자연스러운 문단으로 'suggestion'을 만듭니다.
     - [강조] 특히 외출시 잊지 말아야 할 것(우산, 마스크, 외투, 선크림, 외출 자제 등)에 대한 키워드는 ☂️, 😷, 🧥, ☀️, 🏠 등의 적절한 이모지를 붙여서 강조해주세요.
+    - [초안] '제안' 필드는 위 규칙으로 미리 만든 초안입니다. 초안의 내용은 빠뜨리지 말고, 더 자연스러운 문장으로 다듬어 주세요.
     """
 
     # (2) 사용자 프롬프트 템플릿: 실제 데이터와 작업 지시
@@ -49,6 +66,25 @@ def process_weather_info_with_gemini(data: Dict[str, Any], max_retries=3, delay_
     }}
     """
 
+    # 여러 장소용 사용자 프롬프트: 입력 배열과 같은 순서, 같은 개수의 배열을 요청
+    BATCH_USER_PROMPT_TEMPLATE = """
+    다음은 여러 장소의 JSON 날씨 데이터 배열입니다. 각 장소를 따로 분석해 주세요.
+
+    [입력 데이터]
+    {input_data}
+
+    [출력 스키마]
+    입력 배열과 같은 순서, 같은 개수의 JSON 배열
+    [
+    {{
+    "location_ko": "번역된 위치 ('위치' 필드 번역)",
+    "summary_ko": "번역된 요약 ('요약' 필드 번역)",
+    "alert_ko": "번역된 경보 ('경보' 필드 번역, 없으면 빈 문자열)",
+    "suggestion": "시스템 프롬프트의 모든 규칙에 따라 생성된 종합 외출 제안 멘트"
+    }}
+    ]
+    """
+
     # (3) 생성 설정: Temperature 및 JSON 모드 설정
     GENERATION_CONFIG = genai.GenerationConfig(
         temperature=0.2,  # 일관된 논리 + 약간 자연스러운 문장
@@ -64,58 +100,99 @@ def process_weather_info_with_gemini(data: Dict[str, Any], max_retries=3, delay_
     )
     
     # 2. 사용자 프롬프트 완성
-    # (json.dumps로 데이터를 문자열로 변환)
-    user_prompt = USER_PROMPT_TEMPLATE.format(
-        input_data=json.dumps(data, indent=2, ensure_ascii=False)
+    # (json.dumps로 데이터를 문자열로 변환, 입력 토큰을 줄이기 위해 들여쓰기 없이)
+    is_batch = isinstance(data, list)
+    user_prompt = (BATCH_USER_PROMPT_TEMPLATE if is_batch else USER_PROMPT_TEMPLATE).format(
+        input_data=json.dumps(data, ensure_ascii=False, separators=(",", ":"))
     )
         
-    current_try = 0
-    while current_try <= max_retries:
-        try:
-            # Send the text to the model.
-            # The model already knows the rules from the SYSTEM_PROMPT.
-            response = model.generate_content(user_prompt)
-            
-            # The model, in JSON mode, should return a clean JSON string.
-            # We parse it into a Python dictionary.
-            result_json = json.loads(response.text)
-            return result_json
-
-        except ResourceExhausted as e:
-            # This exception is thrown on HTTP 429 (Rate Limit / Token Limit)
-            current_try += 1
-            if current_try > max_retries:
-                print(f"[Error] Max retries reached for input: {user_prompt[:50]}...")
-                print(f"Last error: {e}")
-                raise
-            
-            print(f"[Warning] Rate limit exceeded. Waiting for {delay_seconds} seconds... (Attempt {current_try}/{max_retries})")
-            time.sleep(delay_seconds)
-        
-        except json.JSONDecodeError as e:
-            # The model returned invalid JSON
-            print(f"[Error] Failed to decode JSON from model response.")
-            print(f"       Input text was: {user_prompt[:100]}...")
-            print(f"       Model response was: {response.text}")
-            raise e
-        
-        except Exception as e:
-            # Catch other potential errors (e.g., connection issues)
-            print(f"[Error] An unexpected error occurred: {e}")
-            raise e
+    try:
+        # Send the text to the model.
+        # The model already knows the rules from the SYSTEM_PROMPT.
+        response = generate_content_with_retry(
+            model, 'gemini-2.5-flash', user_prompt,
+            max_retries=max_retries, max_delay_seconds=delay_seconds
+        )
+
+        # The model, in JSON mode, should return a clean JSON string.
+        # We parse it into a Python dictionary.
+        result_json = json.loads(response.text)
+        if is_batch and (not isinstance(result_json, list) or len(result_json) != len(data)):
+            raise ValueError(f"Expected {len(data)} results from model, got: {response.text[:100]}")
+        return result_json
+
+    except ResourceExhausted as e:
+        # This exception is thrown on HTTP 429 (Rate Limit / Token Limit)
+        print(f"[Error] Max retries reached for input: {user_prompt[:50]}...")
+        print(f"Last error: {e}")
+        raise
+
+    except json.JSONDecodeError as e:
+        # The model returned invalid JSON
+        print(f"[Error] Failed to decode JSON from model response.")
+        print(f"       Input text was: {user_prompt[:100]}...")
+        print(f"       Model response was: {response.text}")
+        raise e
 
-    raise RuntimeError("Unknown error from AI process")
+    except Exception as e:
+        # Catch other potential errors (e.g., connection issues)
+        print(f"[Error] An unexpected error occurred: {e}")
+        raise e
 
 
-API_KEY = wmill.get_variable("u/rapaellk/open_weather_map_api_key")
+API_KEY = lazy_variable("u/rapaellk/open_weather_map_api_key")
 
 URL_WEATHER = "https://api.openweathermap.org/data/3.0/onecall"
 URL_POLLUTION = "https://api.openweathermap.org/data/2.5/air_pollution"
 URL_GEO_REVERSE = "http://api.openweathermap.org/geo/1.0/reverse"
 
-def get_location_name(lat: float, lon: float, api_key: str) -> str:
+# 세 API 호출을 동시에 보내고, 모두 합쳐 이 시간 안에 끝나지 않은 호출은 결과 없이 진행합니다.
+OWM_DEADLINE_SECONDS = 8
+_owm_executor = ThreadPoolExecutor(max_workers=12, thread_name_prefix="owm")
+
+# 좌표를 소수점 둘째 자리(약 1km 격자)로 반올림한 값을 캐시 키로 사용하고, API도 그 좌표로 호출합니다.
+COORD_PRECISION = 2
+# 데이터 종류별 캐시 유지 시간(초). 최종 보고서(Gemini 결과 포함)는 가장 짧은 값을 따릅니다.
+ONECALL_TTL_SECONDS = 10 * 60
+POLLUTION_TTL_SECONDS = 30 * 60
+GEO_TTL_SECONDS = 7 * 24 * 3600
+REPORT_TTL_SECONDS = ONECALL_TTL_SECONDS
+
+_onecall_cache = TTLCache(ONECALL_TTL_SECONDS, max_entries=256)
+_pollution_cache = TTLCache(POLLUTION_TTL_SECONDS, max_entries=256)
+_geo_cache = TTLCache(GEO_TTL_SECONDS, max_entries=1024)
+_report_cache = TTLCache(REPORT_TTL_SECONDS, max_entries=256)
+# Gemini로 다듬은 보고서. 있으면 규칙 기반 보고서 대신 사용합니다.
+_polished_cache = TTLCache(REPORT_TTL_SECONDS, max_entries=256)
+# 아침 05:30 작업이 미리 만든 보고서의 유지 시간. 버튼은 보통 몇 시간 안에 누르므로 넉넉하게 잡습니다.
+PREWARM_TTL_SECONDS = 4 * 3600
+# 아침 작업이 미리 만든 보고서(다듬으면 다듬은 것으로 교체). 아침 버튼 응답(prewarmed=True)만 사용하고,
+# 다른 명령은 REPORT_TTL_SECONDS가 지난 보고서를 받지 않도록 이 캐시를 보지 않습니다.
+_morning_cache = TTLCache(PREWARM_TTL_SECONDS, max_entries=64)
+
+def coordinate_bucket(lat: float, lon: float):
+    return round(lat, COORD_PRECISION), round(lon, COORD_PRECISION)
+
+def weather_cache_stats() -> dict:
+    return {
+        "onecall": _onecall_cache.stats(),
+        "pollution": _pollution_cache.stats(),
+        "geo": _geo_cache.stats(),
+        "report": _report_cache.stats(),
+        "polished": _polished_cache.stats(),
+        "morning": _morning_cache.stats(),
+        "geocoding": get_geocoding_cache().stats(),
+    }
+
+def get_location_name(lat: float, lon: float, api_key: str, timeout=None) -> str:
+    """
+    현재 위치 이름을 가져옵니다. 같은 좌표는 디스크 캐시(geocoding_cache)의 결과를 사용합니다.
+    """
+    return get_geocoding_cache().reverse(lat, lon, lambda: _fetch_location_name(lat, lon, api_key, timeout))
+
+def _fetch_location_name(lat: float, lon: float, api_key: str, timeout=None) -> str:
     """
-    One Call API 3.0을 호출하여 현재 위치 이름을 가져옵니다.
+    Geocoding API를 호출하여 현재 위치 이름을 가져옵니다.
     """
     print(f"위치 정보 요청 중... (lat: {lat}, lon: {lon})")
     params = {
@@ -124,12 +201,12 @@ def get_location_name(lat: float, lon: float, api_key: str) -> str:
         "appid": api_key,
         "limit": 1,
     }
-    response = requests.get(URL_GEO_REVERSE, params=params)
+    response = get_session().get(URL_GEO_REVERSE, params=params, timeout=timeout)
     response.raise_for_status() # 오류 발생 시 예외 처리
     city_info = response.json()[0]
     return city_info["local_names"]["kr"] if "kr" in city_info["local_names"] else city_info["name"]
 
-def get_weather_data(lat: float, lon: float, api_key: str) -> Dict[str, Any]:
+def get_weather_data(lat: float, lon: float, api_key: str, timeout=None) -> Dict[str, Any]:
     """
     One Call API 3.0을 호출하여 날씨 정보를 가져옵니다.
     """
@@ -142,11 +219,11 @@ def get_weather_data(lat: float, lon: float, api_key: str) -> Dict[str, Any]:
         "lang": "kr",       # 한국어
         "exclude": "minutely,hourly"
     }
-    response = requests.get(URL_WEATHER, params=params)
+    response = get_session().get(URL_WEATHER, params=params, timeout=timeout)
     response.raise_for_status() # 오류 발생 시 예외 처리
     return response.json()
 
-def get_air_pollution_data(lat: float, lon: float, api_key: str) -> Dict[str, Any]:
+def get_air_pollution_data(lat: float, lon: float, api_key: str, timeout=None) -> Dict[str, Any]:
     """
     Air Pollution API를 호출하여 대기 오염 정보를 가져옵니다.
     """
@@ -156,7 +233,7 @@ def get_air_pollution_data(lat: float, lon: float, api_key: str) -> Dict[str, An
         "lon": lon,
         "appid": api_key
     }
-    response = requests.get(URL_POLLUTION, params=params)
+    response = get_session().get(URL_POLLUTION, params=params, timeout=timeout)
     response.raise_for_status() # 오류 발생 시 예외 처리
     return response.json()
 
@@ -211,35 +288,59 @@ def get_co_level(value: float) -> str:
     if value < 15400: return POLLUTANT_LEVEL_MAP[4]
     return POLLUTANT_LEVEL_MAP[5]
 
-def parse_combined_data(current_location: str, weather_data: Dict[str, Any], pollution_data: Dict[str, Any]) -> Dict[str, Any]:
+def fetch_owm_data(lat: float, lon: float, deadline_seconds: float = OWM_DEADLINE_SECONDS):
+    """
+    위치 이름, 날씨, 대기 오염 API를 동시에 호출합니다. 세 호출은 하나의 마감 시간을 공유합니다.
+
+    날씨는 필수이므로 실패하면 예외를 발생시킵니다.
+    위치 이름을 가져오지 못하면 좌표를 이름으로 사용하고, 대기 오염 정보를 가져오지 못하면 None을 반환합니다.
+
+    Returns:
+        (위치 이름, 날씨 JSON, 대기 오염 JSON 또는 None)
+    """
+    deadline = time.monotonic() + deadline_seconds
+    api_key = API_KEY.get()
+    timeout = (min(5, deadline_seconds), deadline_seconds)
+    key = coordinate_bucket(lat, lon)
+    lat, lon = key
+
+    def cached(cache, fetch):
+        # 같은 격자의 동시 요청은 하나의 API 호출 결과를 함께 사용합니다.
+        return _owm_executor.submit(cache.get_or_load, key, lambda: fetch(lat, lon, api_key, timeout))
+
+    futures = {
+        "location": cached(_geo_cache, get_location_name),
+        "weather": cached(_onecall_cache, get_weather_data),
+        "pollution": cached(_pollution_cache, get_air_pollution_data),
+    }
+
+    def result(name):
+        try:
+            return futures[name].result(timeout=max(0.0, deadline - time.monotonic()))
+        except Exception as e:
+            if name == "weather":
+                raise
+            print(f"[Warning] Failed to get {name} data: {e!r}")
+            return None
+
+    weather_json = result("weather")
+    current_location = result("location") or f"{lat:.4f}, {lon:.4f}"
+    pollution_json = result("pollution")
+    return current_location, weather_json, pollution_json
+
+def parse_combined_data(current_location: str, weather_data: Dict[str, Any], pollution_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
     """
     두 API의 응답을 파싱하여 사용자가 요청한 형식의 딕셔너리로 조합합니다.
+    pollution_data가 None이면 대기 질 항목 없이 날씨 항목만 조합합니다.
     """
     # 'daily' 배열의 첫 번째 항목(오늘)을 사용합니다.
     today_forecast = weather_data["daily"][0]
     current_weather = weather_data["current"]
 
-    # 대기 오염 데이터의 첫 번째 항목을 사용합니다.
-    air_quality = pollution_data["list"][0]
-
-    # 개별 오염물질 값 추출 (API 응답에 따라 'no', 'nh3'는 없을 수 있음)
-    components = air_quality["components"] # 편의를 위해 변수 할당
-    val_pm2_5 = components.get("pm2_5", 0.0)
-    val_pm10 = components.get("pm10", 0.0)
-    val_co = components.get("co", 0.0)
-    val_o3 = components.get("o3", 0.0)
-    val_no2 = components.get("no2", 0.0)
-    val_so2 = components.get("so2", 0.0)
-    val_no = components.get("no", 0.0)
-    val_nh3 = components.get("nh3", 0.0)
-
     # 강우량, 강설량 (없을 경우 0)
     rainfall_mm = today_forecast.get("rain", 0.0)
     snowfall_mm = today_forecast.get("snow", 0.0)
 
-    # OWM의 AQI는 1~5의 값을 가집니다. (1=좋음, 5=매우나쁨)
-    aqi_map = {1: "좋음", 2: "보통", 3: "경계", 4: "나쁨", 5: "매우 나쁨"}
-
     combined_data = {
         "위치": current_location,
         "요약": today_forecast["summary"],
@@ -249,14 +350,38 @@ def parse_combined_data(current_location: str, weather_data: Dict[str, Any], pol
         "최고 기온 (°C)": today_forecast["temp"]["max"],
         "최저 기온 (°C)": today_forecast["temp"]["min"],
         "오늘 습도 (%)": today_forecast["humidity"],
-        "오늘 풍속 (m/s)" : str(today_forecast['wind_speed']) + f" (최대 {today_forecast['wind_gust']})" if 'wind_gust' in today_forecast else "",
+        "오늘 풍속 (m/s)" : str(today_forecast['wind_speed']) + (f" (최대 {today_forecast['wind_gust']})" if 'wind_gust' in today_forecast else ""),
         "오늘 체감기온 (°C)": f"낮: {today_forecast['feels_like']['day']}, 저녁: {today_forecast['feels_like']['eve']}, 밤: {today_forecast['feels_like']['night']}", 
         "오늘 강우량 (mm)": rainfall_mm,
         "오늘 강설량 (mm)": snowfall_mm,
         "오늘 강수 확률 (%)": today_forecast["pop"] * 100,
         "오늘 자외선 지수 (UVI)": today_forecast["uvi"],
         "경보": ", ".join([x["event"] for x in weather_data.get("alerts", [])]),
+    }
+    if pollution_data:
+        combined_data.update(parse_pollution_data(pollution_data))
+    return combined_data
+
+def parse_pollution_data(pollution_data: Dict[str, Any]) -> Dict[str, Any]:
+    """대기 오염 API 응답을 대기 질 항목들로 변환합니다."""
+    # 대기 오염 데이터의 첫 번째 항목을 사용합니다.
+    air_quality = pollution_data["list"][0]
+
+    # 개별 오염물질 값 추출 (API 응답에 따라 'no', 'nh3'는 없을 수 있음)
+    components = air_quality["components"] # 편의를 위해 변수 할당
+    val_pm2_5 = components.get("pm2_5", 0.0)
+    val_pm10 = components.get("pm10", 0.0)
+    val_co = components.get("co", 0.0)
+    val_o3 = components.get("o3", 0.0)
+    val_no2 = components.get("no2", 0.0)
+    val_so2 = components.get("so2", 0.0)
+    val_no = components.get("no", 0.0)
+    val_nh3 = components.get("nh3", 0.0)
+
+    # OWM의 AQI는 1~5의 값을 가집니다. (1=좋음, 5=매우나쁨)
+    aqi_map = {1: "좋음", 2: "보통", 3: "경계", 4: "나쁨", 5: "매우 나쁨"}
 
+    return {
         "대기질 지수 (AQI)": f"{air_quality['main']['aqi']} ({aqi_map.get(air_quality['main']['aqi'])})",
         # 등급표(이미지) 기준이 있는 항목들
         "미세먼지 (PM2.5)": f"{val_pm2_5:.2f} μg/m³ ({get_pm2_5_level(val_pm2_5)})",
@@ -270,36 +395,100 @@ def parse_combined_data(current_location: str, weather_data: Dict[str, Any], pol
         "일산화질소 (NO, μg/m³)": f"{val_no:.2f}", 
         "암모니아 (NH3, μg/m³)": f"{val_nh3:.2f}",
     }
-    
-    return combined_data
 
-def get_and_parse_data(lat: float, lon: float,):
+def get_and_parse_data(lat: float, lon: float, ttl: float = None, inline_polish: bool = True, prewarmed: bool = False):
+    """
+    좌표의 날씨 보고서(dict)를 반환합니다.
+    같은 좌표 격자의 보고서가 REPORT_TTL_SECONDS(또는 ttl) 안에 만들어졌으면 API 호출 없이 그대로 반환하고,
+    Gemini로 다듬은 보고서가 있으면 그것을 반환합니다.
+    inline_polish가 False이면 inline 모드에서도 Gemini를 호출하지 않습니다. (여러 장소를 묶어 다듬을 때)
+    prewarmed가 True이면(아침 버튼 응답) 아침 작업이 미리 만든 보고서를 먼저 찾습니다.
+    """
+    bucket = coordinate_bucket(lat, lon)
+    if prewarmed:
+        report = _morning_cache.get(bucket)
+        if report is not None:
+            return dict(report)
+    report = _report_cache.get_or_load(bucket, lambda: _build_report(lat, lon, inline_polish), ttl=ttl)
+    return dict(_polished_cache.get(bucket) or report)
+
+def _lookup_report(bucket, prewarmed: bool = False) -> Optional[Dict[str, Any]]:
+    """캐시에 있는 격자의 보고서(다듬은 것이 있으면 그것)를 반환합니다. 없으면 None."""
+    report = _morning_cache.get(bucket) if prewarmed else None
+    if report is None:
+        report = _polished_cache.get(bucket) or _report_cache.get(bucket)
+    return report
+
+def _gemini_input(report: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in report.items() if k != "제안 출처"}
+
+def _apply_polish(report: Dict[str, Any], processed_weather: Dict[str, Any]) -> Dict[str, Any]:
+    polished = dict(report)
+    polished["위치"] = processed_weather["location_ko"]
+    polished["요약"] = processed_weather["summary_ko"]
+    polished["경보"] = processed_weather["alert_ko"]
+    polished["제안"] = processed_weather["suggestion"]
+    polished["제안 출처"] = "Gemini"
+    return polished
+
+def polish_report(report: Dict[str, Any]) -> Dict[str, Any]:
+    """규칙 기반 보고서의 위치, 요약, 경보를 번역하고 제안 문장을 Gemini로 다듬은 사본을 반환합니다."""
+    return _apply_polish(report, process_weather_info_with_gemini(_gemini_input(report)))
+
+def polish_reports(reports: Dict[Any, Dict[str, Any]], prewarmed: bool = False) -> Dict[Any, Dict[str, Any]]:
+    """
+    여러 보고서({좌표 격자: 보고서})를 한 번의 Gemini 호출로 다듬고, 격자별로 캐시합니다.
+    prewarmed가 True이면 아침 작업이 만든 보고서는 만료 시각을 그대로 둔 채 다듬은 것으로 바꿉니다.
+    """
+    buckets = list(reports)
+    processed = process_weather_info_with_gemini([_gemini_input(reports[bucket]) for bucket in buckets])
+    polished = {}
+    for bucket, processed_weather in zip(buckets, processed):
+        polished[bucket] = _apply_polish(reports[bucket], processed_weather)
+        if not (prewarmed and _morning_cache.replace(bucket, polished[bucket])):
+            _polished_cache.set(bucket, polished[bucket])
+    return polished
+
+def get_polished_report(lat: float, lon: float, prewarmed: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    캐시된 보고서를 Gemini로 다듬어 반환합니다. (같은 격자는 한 번만 다듬음)
+    보고서가 캐시에 없거나(조회 실패) 이미 다듬어진 상태로 만들어졌으면 None을 반환합니다.
+    """
+    bucket = coordinate_bucket(lat, lon)
+    morning = _morning_cache.get(bucket) if prewarmed else None
+    if morning is not None:
+        if morning.get("제안 출처") != "규칙":
+            return None
+        polished = polish_report(morning)
+        _morning_cache.replace(bucket, polished)
+        return dict(polished)
+    report = _report_cache.get(bucket)
+    if report is None or report.get("제안 출처") != "규칙":
+        return None
+    return dict(_polished_cache.get_or_load(bucket, lambda: polish_report(report)))
+
+def _build_report(lat: float, lon: float, inline_polish: bool = True):
     print(f"{lat}, {lon}")
-    try:
-        current_location = get_location_name(lat, lon, API_KEY)
+    # 1. 위치 이름, 날씨, 대기 오염 API를 동시에 호출 (대기 오염은 실패해도 진행)
+    current_location, weather_json, pollution_json = fetch_owm_data(lat, lon)
 
-        # 1. 날씨 정보 API 호출
-        weather_json = get_weather_data(lat, lon, API_KEY)
-        
-        # 2. 대기 오염 API 호출
-        pollution_json = get_air_pollution_data(lat, lon, API_KEY)
-        
-        # 3. 두 데이터 조합 및 파싱
-        final_data = parse_combined_data(current_location, weather_json, pollution_json)
+    # 2. 두 데이터 조합 및 파싱
+    final_data = parse_combined_data(current_location, weather_json, pollution_json)
 
-        processed_weather = process_weather_info_with_gemini(final_data)
-        final_data["위치"] = processed_weather["location_ko"]
-        final_data["요약"] = processed_weather["summary_ko"]
-        final_data["경보"] = processed_weather["alert_ko"]
-        final_data["제안"] = processed_weather["suggestion"]
+    # 3. 규칙 기반 외출 제안 (inline 모드에서는 응답 전에 Gemini로 다듬음)
+    final_data["제안"] = build_suggestion(final_data)
+    final_data["제안 출처"] = "규칙"
+    if WEATHER_LLM_MODE == "inline" and inline_polish:
+        try:
+            final_data = polish_report(final_data)
+        except Exception as e:
+            print(f"[Warning] Gemini polish failed, using rule-based suggestion: {e!r}")
 
-        # 4. 결과 출력
-        print("\n--- 최종 날씨 및 대기 질 정보 ---")
-        pprint.pprint(final_data)
+    # 4. 결과 출력
+    print("\n--- 최종 날씨 및 대기 질 정보 ---")
+    pprint.pprint(final_data)
 
-        return final_data
-    except Exception:
-        raise
+    return final_data
 
 def escape_mdv2(text):
     return telegramify_markdown.markdownify(str(text)).strip()
@@ -338,7 +527,8 @@ def format_weather_for_telegram(data: dict) -> str:
     rain_amount = data.get('오늘 강우량 (mm)', 0.0)
     snow_amount = data.get('오늘 강설량 (mm)', 0.0)
 
-    # 섹션 4: 대기 질
+    # 섹션 4: 대기 질 (대기 오염 API가 실패했으면 없음)
+    has_air_quality = '대기질 지수 (AQI)' in data
     aqi = get_escaped('대기질 지수 (AQI)')
     # 키 이름에 '.'이 있으므로 수동으로 이스케이프
     pm25_key = '미세먼지 (PM2.5)'
@@ -393,11 +583,14 @@ def format_weather_for_telegram(data: dict) -> str:
 
     # 대기 질
     message_parts.append(f"\n*대기 질* 🍃")
-    message_parts.append(f"• *종합*: {aqi}")
-    # 키 이름의 특수문자(., 2.5)는 직접 이스케이프 처리
-    message_parts.append(f"• *미세\(PM2\.5\)*: {pm25}")
-    message_parts.append(f"• *초미세\(PM10\)*: {pm10}")
-    message_parts.append(f"• *오존\(O3\)*: {o3}")
+    if has_air_quality:
+        message_parts.append(f"• *종합*: {aqi}")
+        # 키 이름의 특수문자(., 2.5)는 직접 이스케이프 처리
+        message_parts.append(f"• *미세\(PM2\.5\)*: {pm25}")
+        message_parts.append(f"• *초미세\(PM10\)*: {pm10}")
+        message_parts.append(f"• *오존\(O3\)*: {o3}")
+    else:
+        message_parts.append(f"• 대기 질 정보를 가져오지 못했습니다\.")
 
     # 세부 정보 (스포일러)
     message_parts.append(f"\n{separator}\n")
@@ -409,20 +602,21 @@ def format_weather_for_telegram(data: dict) -> str:
     message_parts.append(f"• 오늘 체감: {feels_today}")
     message_parts.append(f"• 가시거리: {visibility}m")
     
-    message_parts.append(f"\n*세부 정보 \(대기\)*")
-    message_parts.append(f"• CO: {co}")
-    message_parts.append(f"• NO2: {no2}")
-    message_parts.append(f"• SO2: {so2}")
-    message_parts.append(f"• NO: {no}")
-    message_parts.append(f"• NH3: {nh3}")
+    if has_air_quality:
+        message_parts.append(f"\n*세부 정보 \(대기\)*")
+        message_parts.append(f"• CO: {co}")
+        message_parts.append(f"• NO2: {no2}")
+        message_parts.append(f"• SO2: {so2}")
+        message_parts.append(f"• NO: {no}")
+        message_parts.append(f"• NH3: {nh3}")
     message_parts.append(f"||") # 스포일러 끝
 
     # 모든 부분을 개행 문자로 연결
     return "\n".join(message_parts)
 
-def get_weather_message(lat: float, lon: float):
+def get_weather_message(lat: float, lon: float, prewarmed: bool = False):
     try:
-        location_data = get_and_parse_data(lat, lon)
+        location_data = get_and_parse_data(lat, lon, prewarmed=prewarmed)
         message = format_weather_for_telegram(location_data)
     except Exception as e:
         print(traceback.format_exc())
@@ -430,42 +624,176 @@ def get_weather_message(lat: float, lon: float):
     finally:
         return message
 
+def get_polished_weather_message(lat: float, lon: float, prewarmed: bool = False) -> Optional[str]:
+    """
+    followup 모드에서 이미 보낸 날씨 메시지를 대신할, Gemini로 다듬은 메시지를 반환합니다.
+    다듬을 필요가 없거나 실패하면 None을 반환합니다. (이미 보낸 메시지를 그대로 둠)
+    """
+    if WEATHER_LLM_MODE != "followup":
+        return None
+    try:
+        polished = get_polished_report(lat, lon, prewarmed=prewarmed)
+    except Exception as e:
+        print(f"[Warning] Gemini polish failed: {e!r}")
+        return None
+    return format_weather_for_telegram(polished) if polished else None
+
+# --- 여러 장소 날씨 (/weather_all, 아침 날씨) ---
+
+# important_locations 변수의 키와 메시지에 표시할 이름
+IMPORTANT_LOCATION_LABELS = {
+    "home": "🏠 집",
+    "office": "🏢 회사",
+    "parent_home": "👪 부모님 댁",
+}
+CURRENT_LOCATION_LABEL = "📍 현재 위치"
+
+_batch_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="weather-batch")
+
+def important_locations(*names: str) -> List[Tuple[str, float, float]]:
+    """important_locations 변수의 장소들을 (표시 이름, 위도, 경도) 목록으로 반환합니다. 이름이 없으면 모두."""
+    locations = IMPORTANT_LOCATIONS.get()
+    return [
+        (IMPORTANT_LOCATION_LABELS.get(name, name), *locations[name])
+        for name in (names or IMPORTANT_LOCATION_LABELS) if name in locations
+    ]
+
+def get_weather_batch(locations: List[Tuple[str, float, float]], prewarmed: bool = False) -> List[Tuple[str, Optional[Dict[str, Any]]]]:
+    """
+    여러 장소(표시 이름, 위도, 경도)의 날씨 보고서를 동시에 가져옵니다.
+    장소별 OWM 호출은 동시에 보내고, inline 모드에서도 Gemini는 모든 장소를 묶어 한 번만 호출합니다.
+    prewarmed는 get_and_parse_data()와 같습니다.
+
+    Returns:
+        [(표시 이름, 보고서 또는 None(조회 실패))]
+    """
+    reports = list(_batch_executor.map(lambda location: _load_batch_report(location, prewarmed), locations))
+    if WEATHER_LLM_MODE == "inline":
+        polished = _polish_batch(locations, reports, prewarmed)
+        if polished:
+            reports = polished
+    return [(name, report) for (name, _, _), report in zip(locations, reports)]
+
+def _load_batch_report(location, prewarmed: bool = False) -> Optional[Dict[str, Any]]:
+    name, lat, lon = location
+    try:
+        return get_and_parse_data(lat, lon, inline_polish=False, prewarmed=prewarmed)
+    except Exception as e:
+        print(f"[Error] Failed to get weather for {name}: {e!r}")
+        return None
+
+def _polish_batch(locations, reports, prewarmed: bool = False) -> Optional[list]:
+    """아직 다듬지 않은 보고서를 한 번의 Gemini 호출로 다듬습니다. 다듬을 것이 없거나 실패하면 None."""
+    pending = {}
+    for (_, lat, lon), report in zip(locations, reports):
+        if report is None:
+            continue
+        bucket = coordinate_bucket(lat, lon)
+        current = _lookup_report(bucket, prewarmed) or report
+        if current.get("제안 출처") == "규칙":
+            pending[bucket] = current
+    if not pending:
+        return None
+    try:
+        polish_reports(pending, prewarmed)
+    except Exception as e:
+        print(f"[Warning] Gemini batch polish failed: {e!r}")
+        return None
+    return [
+        None if report is None else dict(_lookup_report(coordinate_bucket(lat, lon), prewarmed) or report)
+        for (_, lat, lon), report in zip(locations, reports)
+    ]
+
+def format_weather_batch_for_telegram(reports: List[Tuple[str, Optional[Dict[str, Any]]]]) -> str:
+    """여러 장소의 날씨를 장소마다 몇 줄로 요약한 텔레그램 MarkdownV2 문자열로 변환합니다."""
+    message_parts = [f"*여러 장소 날씨 브리핑* 🌦"]
+    for name, data in reports:
+        message_parts.append("")
+        if data is None:
+            message_parts.append(f"*{escape_mdv2(name)}*")
+            message_parts.append(f"날씨 정보를 가져오지 못했습니다\.")
+            continue
+        message_parts.append(f"*{escape_mdv2(name)}* \| {escape_mdv2(data.get('위치', ''))}")
+        line = (
+            f"{data.get('오늘 날씨', 'N/A')}, {data.get('최저 기온 (°C)', 'N/A')}°C / {data.get('최고 기온 (°C)', 'N/A')}°C, "
+            f"강수 {round(data.get('오늘 강수 확률 (%)', 0))}%"
+        )
+        if '대기질 지수 (AQI)' in data:
+            line += f", 대기 {data['대기질 지수 (AQI)']}"
+        message_parts.append(f"• {escape_mdv2(line)}")
+        if data.get('경보'):
+            message_parts.append(f"• 🚨 _{escape_mdv2(data['경보'])}_")
+        if data.get('제안'):
+            message_parts.append(escape_mdv2(data['제안']))
+    return "\n".join(message_parts)
+
+def get_weather_batch_message(locations: List[Tuple[str, float, float]], prewarmed: bool = False) -> str:
+    try:
+        return format_weather_batch_for_telegram(get_weather_batch(locations, prewarmed))
+    except Exception as e:
+        print(traceback.format_exc())
+        return f"Failed to get weather: {e}"
+
+def get_polished_weather_batch_message(locations: List[Tuple[str, float, float]], prewarmed: bool = False) -> Optional[str]:
+    """get_polished_weather_message()의 여러 장소 버전. 모든 장소를 한 번의 Gemini 호출로 다듬습니다."""
+    if WEATHER_LLM_MODE != "followup":
+        return None
+    reports = [_lookup_report(coordinate_bucket(lat, lon), prewarmed) for _, lat, lon in locations]
+    polished = _polish_batch(locations, reports, prewarmed)
+    if not polished:
+        return None
+    return format_weather_batch_for_telegram([(name, report) for (name, _, _), report in zip(locations, polished)])
+
+def prewarm_weather(locations: List[Tuple[str, float, float]], ttl: float = PREWARM_TTL_SECONDS) -> int:
+    """
+    아침 버튼 응답에 쓸 장소들의 보고서를 새로 만들어 ttl 동안 _morning_cache에 넣어 둡니다.
+    다른 명령이 쓰는 캐시는 건드리지 않으며, Gemini로 다듬지도 않습니다. (polish_prewarmed_weather())
+    캐시에 넣은 장소 수를 반환합니다.
+    """
+    def build(location):
+        name, lat, lon = location
+        try:
+            _morning_cache.set(coordinate_bucket(lat, lon), _build_report(lat, lon, inline_polish=False), ttl=ttl)
+            return True
+        except Exception as e:
+            print(f"[Error] Failed to prewarm weather for {name}: {e!r}")
+            return False
+
+    return sum(_batch_executor.map(build, locations))
+
+def polish_prewarmed_weather(locations: List[Tuple[str, float, float]]):
+    """prewarm_weather()로 만든 보고서를 한 번의 Gemini 호출로 다듬어 둡니다. (버튼을 보낸 뒤 백그라운드에서 호출)"""
+    if WEATHER_LLM_MODE == "off":
+        return
+    reports = [_morning_cache.get(coordinate_bucket(lat, lon)) for _, lat, lon in locations]
+    _polish_batch(locations, reports, prewarmed=True)
+
+def get_important_location(name: str):
+    """important_locations 변수에 등록된 장소(home, office, parent_home)의 좌표를 반환합니다."""
+    return IMPORTANT_LOCATIONS.get().get(name)
+
 def get_home_weather():
-    locations = json.loads(wmill.get_variable("u/rapaellk/important_locations"))
-    location = locations.get("home")
-    return get_weather_message(*location)
+    return get_weather_message(*get_important_location("home"))
 
 def get_office_weather():
-    locations = json.loads(wmill.get_variable("u/rapaellk/important_locations"))
-    location = locations.get("office")
-    return get_weather_message(*location)
+    return get_weather_message(*get_important_location("office"))
 
 def get_parent_home_weather():
-    locations = json.loads(wmill.get_variable("u/rapaellk/important_locations"))
-    location = locations.get("parent_home")
-    return get_weather_message(*location)
+    return get_weather_message(*get_important_location("parent_home"))
 
-def _get_location_from_name(location_name:str):
-    try:
-        geolocator = Nominatim(user_agent="rapaellk-weather-bot-v1")
-        location = geolocator.geocode(location_name)
-
-        # 3. 결과 확인
-        if location:
-            print(f"입력: {location_name}")
-            print(f"주소: {location.address}")
-            print(f"위도: {location.latitude}")
-            print(f"경도: {location.longitude}")
-            return location.latitude, location.longitude
-        else:
-            raise RuntimeError("Cannot find location")
-
-    except Exception:
-        raise
+def get_location_from_name(location_name:str):
+    """
+    장소 이름의 (위도, 경도)를 반환합니다.
+    내장 지명 사전과 디스크 캐시를 먼저 찾고, 없을 때만 Nominatim을 호출합니다. (geocoding_cache)
+    """
+    location = get_geocoding_cache().forward(location_name)
+    if location is None:
+        raise RuntimeError("Cannot find location")
+    return location
 
 def get_weather_message_from_location_name(location_name:str):
     try:
-        lat, lon = _get_location_from_name(location_name)
+        lat, lon = get_location_from_name(location_name)
         message = get_weather_message(lat, lon)
         return message
     except Exception as e:
@@ -0,0 +1,69 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import brotli  # urllib3는 brotli가 설치되어 있을 때만 br 응답을 풀 수 있습니다.
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+# (connect timeout, read timeout). 요청마다 timeout을 넘기면 그 값이 우선합니다.
+DEFAULT_TIMEOUT = (5, 20)
+
+# 호스트별 커넥션 풀 개수와 풀 하나당 최대 커넥션 수
+POOL_CONNECTIONS = 32
+POOL_MAXSIZE = 32
+
+# 연결 실패와 일시적인 서버 오류만 재시도합니다.
+# POST는 재시도하지 않으며, 429는 호출하는 쪽(Telegram 큐, Gemini limiter 등)에서 처리합니다.
+DEFAULT_RETRY = Retry(
+    total=3,
+    connect=3,
+    read=2,
+    status=2,
+    backoff_factor=0.5,
+    status_forcelist=(500, 502, 503, 504),
+    allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+
+class _PooledSession(requests.Session):
+    """timeout을 지정하지 않은 요청에 DEFAULT_TIMEOUT을 적용하는 Session"""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        super().__init__()
+        self.default_timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.default_timeout)
+        return super().request(method, url, **kwargs)
+
+def create_session(timeout=DEFAULT_TIMEOUT, retry: Retry = DEFAULT_RETRY) -> requests.Session:
+    """
+    keep-alive 커넥션 풀, 압축 협상, 기본 timeout, 재시도 정책이 설정된 Session을 만듭니다.
+    보통은 get_session()으로 공유 Session을 사용하세요.
+    """
+    session = _PooledSession(timeout=timeout)
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({
+        "Accept-Encoding": ACCEPT_ENCODING,
+        "Connection": "keep-alive",
+    })
+    return session
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """프로세스 전체에서 공유하는 Session을 반환합니다. 여러 스레드에서 동시에 사용해도 됩니다."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
@@ -3,23 +3,37 @@ import telegram # pin: python-telegram-bot[job-queue]>=20.0
 import telegram.ext # repin: python-telegram-bot[job-queue]>=20.0
 from telegram.ext import Application, JobQueue
 
-import requests                 # subway_handlers.py 가 사용
+import requests                 # subway_handlers.py, get_weather.py 등이 http_client를 통해 사용
 import telegramify_markdown     # subway_handlers.py 가 사용
 import pytz                     # subway_handlers.py 와 weather_handlers.py 가 사용
 import holidayskr               # used by get_weather
-import geopy                    # used by get_weather
+import geopy                    # used by geocoding_cache
 import google.generativeai as genai # used by get_weather
 from google.api_core.exceptions import ResourceExhausted # used by get_weather
 import trafilatura # used by summarize_to_memos_handler
-import youtube_transcript_api # used by summarize_to_memos_handler
+import youtube_transcript_api # used by youtube_transcripts
 import json_repair # used by summarize_to_memos_handler
 import asyncio # used by summarize_to_memos_handler
 from playwright.sync_api import sync_playwright # used by summarize_to_memos_handler
+from playwright.async_api import async_playwright # used by browser_pool
 
 from f.telegram_life_bot import common_handlers
 from f.telegram_life_bot import subway_handlers
 from f.telegram_life_bot import weather_handlers
 from f.telegram_life_bot import summarize_to_memos_handler # [신규] 임포트 추가
+from f.telegram_life_bot import browser_pool
+from u.rapaellk.wmill_config import config_report
+from u.rapaellk.memos_outbox import get_memos_outbox
+
+async def post_init(application: Application):
+    # 요약 기능의 JS 렌더링 fallback이 사용할 브라우저를 봇 시작 시 미리 띄워 둡니다.
+    await browser_pool.start_browser_pool(application, max_concurrency=2)
+    # 이전 실행에서 보내지 못한 메모가 있으면 바로 보내기 시작합니다.
+    get_memos_outbox()
+
+async def post_shutdown(application: Application):
+    await summarize_to_memos_handler.shutdown(application)
+    await browser_pool.stop_browser_pool(application)
 
 def main():
     telegram_token = wmill.get_resource("u/rapaellk/telegram_token_resource_2")
@@ -33,6 +47,8 @@ def main():
         Application.builder()
         .token(telegram_token['token'])
         .job_queue(job_queue)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
         .build()
     )
 
@@ -42,6 +58,9 @@ def main():
     weather_handlers.register(application)
     summarize_to_memos_handler.register(application) # [신규] 등록 호출 추가
     
+    # import 시점에는 설정값을 가져오지 않으므로, 시작 시점까지 실제로 가져온 값과 미뤄진 값을 출력합니다.
+    print(f"Config report: {config_report()}")
+
     # 3. 봇 시작
     print("Bot application running polling...")
     application.run_polling()
\ No newline at end of file
@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from u.rapaellk.persistent_cache import cache_path
+from u.rapaellk.http_client import get_session
+from u.rapaellk.rate_limiter import backoff_delay
+from u.rapaellk.wmill_config import lazy_variable
+
+MEMOS_SERVER_ADDR = os.environ.get("MEMOS_SERVER_ADDR", "http://192.168.0.42:5230")
+MEMOS_TOKEN = lazy_variable("u/rapaellk/memos_token")
+
+# 재시도해도 결과가 바뀌지 않는 응답 (요청 자체가 잘못된 경우)
+_PERMANENT_ERRORS = {400, 401, 403, 404, 422}
+
+class MemosOutbox:
+    """
+    Memos 서버로 보낼 메모를 SQLite에 먼저 저장하고, 백그라운드 스레드가 비동기로 전송하는 outbox입니다.
+
+    - enqueue()는 메모를 디스크에 저장하고 바로 반환합니다. 서버가 느리거나 꺼져 있어도 요약 결과를 잃지 않습니다.
+    - 드레이너는 전송할 메모를 batch_size개씩 꺼내 공유 HTTP 세션(keep-alive 커넥션 풀)으로 동시에 보냅니다.
+    - 메모마다 고유한 memoId를 미리 정해 두고 같은 ID로 재시도하므로, 응답을 받지 못해 다시 보내도
+      서버에 메모가 중복 생성되지 않습니다. (이미 있으면 409를 받으며 성공으로 처리)
+    - 실패하면 지수 백오프로 재시도하고, max_attempts번 실패하거나 재시도해도 소용없는 응답(4xx)을 받으면
+      status='failed'로 남겨 둡니다.
+    """
+
+    def __init__(self, path: str, server_addr: str = None, token=None, batch_size: int = 8,
+                 max_attempts: int = 10, poll_interval: float = 5.0, retry_base_seconds: float = 2.0, timeout=(5, 30)):
+        self.server_addr = (server_addr or MEMOS_SERVER_ADDR).rstrip("/")
+        self._token = token
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.retry_base_seconds = retry_base_seconds
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._executor = ThreadPoolExecutor(max_workers=batch_size, thread_name_prefix="memos-outbox")
+        self.sent = 0
+        self.retried = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            " memo_id TEXT PRIMARY KEY,"
+            " body TEXT NOT NULL,"
+            " status TEXT NOT NULL DEFAULT 'pending',"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " next_attempt_at REAL NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_error TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(status, next_attempt_at)")
+
+    def _auth_token(self) -> str:
+        return self._token or MEMOS_TOKEN.get()
+
+    def enqueue(self, content: str, visibility: str = "PROTECTED") -> str:
+        """메모를 outbox에 저장하고 memoId를 반환합니다. 전송은 드레이너가 합니다."""
+        memo_id = uuid.uuid4().hex  # Memos의 ID 규칙(영숫자, 32자 이하)에 맞는 형식
+        body = {
+            "name": "",
+            "state": "NORMAL",
+            "content": content,
+            "visibility": visibility,
+            "pinned": False,
+        }
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO outbox (memo_id, body, next_attempt_at, created_at) VALUES (?, ?, ?, ?)",
+                (memo_id, json.dumps(body, ensure_ascii=False), now, now)
+            )
+        self._wakeup.set()
+        return memo_id
+
+    def _due(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT memo_id, body, attempts FROM outbox"
+                " WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY created_at LIMIT ?",
+                (time.time(), self.batch_size)
+            ).fetchall()
+
+    def _seconds_until_next(self) -> float:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(next_attempt_at) FROM outbox WHERE status = 'pending'"
+            ).fetchone()
+        if row[0] is None:
+            return self.poll_interval
+        return max(0.0, min(self.poll_interval, row[0] - time.time()))
+
+    def _post(self, memo_id: str, body: str):
+        """메모 하나를 보냅니다. (성공 여부, 재시도 가능 여부, 오류 메시지)를 반환합니다."""
+        try:
+            response = get_session().post(
+                f"{self.server_addr}/api/v1/memos",
+                params={"memoId": memo_id},
+                data=body.encode("utf-8"),
+                headers={"Authorization": f"Bearer {self._auth_token()}", "Content-Type": "application/json"},
+                timeout=self.timeout,
+            )
+        except Exception as e:
+            return False, True, str(e)
+        if response.status_code == 200 or response.status_code == 409:
+            return True, False, None
+        error = f"HTTP {response.status_code}: {response.text[:200]}"
+        return False, response.status_code not in _PERMANENT_ERRORS, error
+
+    def drain_once(self) -> int:
+        """지금 보낼 수 있는 메모를 한 배치 보내고, 보낸 메모 수를 반환합니다."""
+        rows = self._due()
+        if not rows:
+            return 0
+        results = list(self._executor.map(lambda row: self._post(row[0], row[1]), rows))
+        sent = 0
+        with self._lock:
+            for (memo_id, _, attempts), (ok, retryable, error) in zip(rows, results):
+                if ok:
+                    self._conn.execute("DELETE FROM outbox WHERE memo_id = ?", (memo_id,))
+                    sent += 1
+                elif retryable and attempts + 1 < self.max_attempts:
+                    self._conn.execute(
+                        "UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE memo_id = ?",
+                        (attempts + 1, time.time() + backoff_delay(attempts, base=self.retry_base_seconds, cap=600.0), error, memo_id)
+                    )
+                    self.retried += 1
+                else:
+                    print(f"[Error] Giving up on memo {memo_id}: {error}")
+                    self._conn.execute(
+                        "UPDATE outbox SET status = 'failed', attempts = ?, last_error = ? WHERE memo_id = ?",
+                        (attempts + 1, error, memo_id)
+                    )
+            self.sent += sent
+        return sent
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                if self.drain_once():
+                    continue  # 남은 메모가 있을 수 있으므로 바로 다음 배치를 확인합니다.
+            except Exception as e:
+                print(f"[Error] Memos outbox drain failed: {e}")
+            self._wakeup.wait(self._seconds_until_next())
+            self._wakeup.clear()
+
+    def start(self):
+        """드레이너 스레드를 시작합니다. 이전 실행에서 남은 메모도 함께 보냅니다."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="memos-outbox-drainer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def wait_until_empty(self, timeout: float = None) -> bool:
+        """보낼 메모(pending)가 없어질 때까지 기다립니다. timeout 안에 비면 True."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.pending_count():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox WHERE status = 'pending'").fetchone()[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            failed = self._conn.execute("SELECT COUNT(*) FROM outbox WHERE status = 'failed'").fetchone()[0]
+        return {"pending": self.pending_count(), "failed": failed, "sent": self.sent, "retried": self.retried}
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+def get_memos_outbox() -> MemosOutbox:
+    """프로세스 전체에서 공유하는 MemosOutbox를 반환합니다. (처음 사용할 때 드레이너 시작)"""
+    global _outbox
+    if _outbox is None:
+        with _outbox_lock:
+            if _outbox is None:
+                _outbox = MemosOutbox(cache_path("memos_outbox.sqlite3"))
+                _outbox.start()
+    return _outbox
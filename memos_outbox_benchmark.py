@@ -0,0 +1,102 @@
+import os
+import json
+import time
+import random
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import requests
+
+from u.rapaellk.memos_outbox import MemosOutbox
+
+class _StubMemosHandler(BaseHTTPRequestHandler):
+    """
+    Memos의 POST /api/v1/memos를 흉내 내는 스텁 서버.
+    latency_seconds만큼 기다린 뒤 응답하며, failure_rate 비율로 메모를 저장한 뒤 500을 반환합니다.
+    (응답이 유실된 상황) 같은 memoId가 다시 오면 409를 반환합니다.
+    """
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+    latency_seconds = 0.05
+    failure_rate = 0.0
+    memos = {}
+    lock = threading.Lock()
+
+    def do_POST(self):
+        parts = urlsplit(self.path)
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if parts.path != "/api/v1/memos":
+            self._reply(404, {"code": 5, "message": "not found"})
+            return
+        memo_id = parse_qs(parts.query).get("memoId", [None])[0] or os.urandom(8).hex()
+        time.sleep(self.latency_seconds)
+        with self.lock:
+            if memo_id in self.memos:
+                self._reply(409, {"code": 6, "message": "memo already exists"})
+                return
+            self.memos[memo_id] = json.loads(body)
+        if random.random() < self.failure_rate:
+            self._reply(500, {"code": 13, "message": "internal error"})
+            return
+        self._reply(200, {"name": f"memos/{memo_id}"})
+
+    def _reply(self, status: int, payload: dict):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def main(memo_count: int = 100, latency_ms: int = 50, failure_rate: float = 0.1):
+    """
+    로컬 스텁 Memos 서버를 띄워, 메모마다 새 연결로 하나씩 보내는 이전 방식과 MemosOutbox를 비교합니다.
+    outbox 쪽에서는 failure_rate 비율로 응답이 유실되어도 중복 없이 모든 메모가 한 번씩 저장되는지 확인합니다.
+    """
+    _StubMemosHandler.latency_seconds = latency_ms / 1000
+    _StubMemosHandler.memos = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubMemosHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server_addr = f"http://127.0.0.1:{server.server_port}"
+    contents = [f"### memo {i}\nbenchmark content {i}" for i in range(memo_count)]
+
+    try:
+        _StubMemosHandler.failure_rate = 0.0
+        started = time.perf_counter()
+        for content in contents:
+            requests.post(f"{server_addr}/api/v1/memos", json={"content": content}, headers={"Connection": "close"})
+        sequential_seconds = time.perf_counter() - started
+
+        _StubMemosHandler.memos = {}
+        _StubMemosHandler.failure_rate = failure_rate
+        with tempfile.TemporaryDirectory() as tmp:
+            outbox = MemosOutbox(os.path.join(tmp, "outbox.sqlite3"), server_addr=server_addr, token="stub",
+                                 poll_interval=0.1, retry_base_seconds=0.1)
+            started = time.perf_counter()
+            memo_ids = [outbox.enqueue(content) for content in contents]
+            enqueue_seconds = time.perf_counter() - started
+            outbox.start()
+            drained = outbox.wait_until_empty(timeout=120)
+            outbox_seconds = time.perf_counter() - started
+            outbox.stop()
+            stats = outbox.stats()
+    finally:
+        server.shutdown()
+
+    stored = _StubMemosHandler.memos
+    result = {
+        "memos": memo_count,
+        "sequential_seconds": round(sequential_seconds, 3),
+        "outbox_enqueue_seconds": round(enqueue_seconds, 4),
+        "outbox_drain_seconds": round(outbox_seconds, 3),
+        "outbox_drained": drained,
+        "outbox_stats": stats,
+        "all_stored_once": sorted(stored) == sorted(memo_ids),
+    }
+    print(result)
+    return result
@@ -1,27 +1,53 @@
-import wmill
 from typing import TypedDict
-import requests
 import telegramify_markdown
 import google.generativeai as genai
 import json
+import re
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from google.api_core.exceptions import ResourceExhausted
-import trafilatura
-from bs4 import BeautifulSoup
-from tavily import TavilyClient
 
-genai.configure(api_key=wmill.get_variable("u/rapaellk/googleai_api_key_free"))
+from u.rapaellk.persistent_cache import PersistentCache, cache_path, make_cache_key
+from u.rapaellk.extraction_cache import get_extraction_cache, extract_article_text
+from u.rapaellk.extraction_executor import get_extraction_executor
+from u.rapaellk.tavily_extract import extract_urls
+from u.rapaellk.gemini_client import generate_content_with_retry
+from u.rapaellk.telegram_sender import get_send_queue
+from u.rapaellk.wmill_config import lazy_variable, lazy_resource
 
-def process_text_with_gemini(text_input, max_retries=3, delay_seconds=60):
+TELEGRAM_CHAT_ID = lazy_variable("u/rapaellk/telegram_chat_id", cast=int)
+TELEGRAM_TOKEN = lazy_resource("u/rapaellk/telegram_token_resource")
+
+GEMINI_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+GEMINI_CACHE_MAX_ENTRIES = 5000
+_gemini_cache = None
+
+def get_gemini_cache() -> PersistentCache:
+    """Gemini 요약 결과 캐시를 반환합니다. (처음 사용할 때 생성)"""
+    global _gemini_cache
+    if _gemini_cache is None:
+        _gemini_cache = PersistentCache(
+            cache_path("gemini_summaries.sqlite3"),
+            ttl_seconds=GEMINI_CACHE_TTL_SECONDS,
+            max_entries=GEMINI_CACHE_MAX_ENTRIES,
+        )
+    return _gemini_cache
+
+def process_text_with_gemini(text_input, max_retries=3, delay_seconds=60, use_cache=True):
     """
     Processes a single text string using the Gemini API.
     
-    It follows the logic in SYSTEM_PROMPT and handles rate limiting.
+    It follows the logic in SYSTEM_PROMPT and handles rate limiting
+    through the shared per-model quota in gemini_client.
+    Results are cached on disk, keyed by a hash of the model name, system prompt,
+    generation config and input text, so repeated inputs skip the API call.
     
     Args:
         text_input (str): The raw English text to process.
         max_retries (int): Max number of retries on rate limit errors.
-        delay_seconds (int): Seconds to wait between retries.
+        delay_seconds (int): Upper bound of the backoff between retries
+            (a server retry hint, when present, takes precedence).
+        use_cache (bool): Whether to read from / write to the summary cache.
 
     Returns:
         dict: A dictionary in the format {'english': '...', 'korean': '...'}
@@ -44,51 +70,56 @@ def process_text_with_gemini(text_input, max_retries=3, delay_seconds=60):
         Do not include any other text, explanations, or markdown delimiters (like ```json).
     """
 
+    MODEL_NAME = 'gemini-2.5-flash'
+    GENERATION_CONFIG = {
+        "response_mime_type": "application/json",
+        "temperature": 0.0  # <-- Add this line for maximum predictability
+    }
+
+    cache_key = make_cache_key(MODEL_NAME, SYSTEM_PROMPT, GENERATION_CONFIG, text_input)
+    if use_cache:
+        cached = get_gemini_cache().get(cache_key)
+        if cached is not None:
+            return cached
+
     # Configure the model to use the system prompt and JSON output mode
     model = genai.GenerativeModel(
-        'gemini-2.5-flash',
+        MODEL_NAME,
         system_instruction=SYSTEM_PROMPT,
-        generation_config={
-            "response_mime_type": "application/json",
-            "temperature": 0.0  # <-- Add this line for maximum predictability
-        }
+        generation_config=GENERATION_CONFIG
     )
-    current_try = 0
-    while current_try <= max_retries:
-        try:
-            # Send the text to the model.
-            # The model already knows the rules from the SYSTEM_PROMPT.
-            response = model.generate_content(text_input)
-            
-            # The model, in JSON mode, should return a clean JSON string.
-            # We parse it into a Python dictionary.
-            result_json = json.loads(response.text)
-            return result_json
-
-        except ResourceExhausted as e:
-            # This exception is thrown on HTTP 429 (Rate Limit / Token Limit)
-            current_try += 1
-            if current_try > max_retries:
-                print(f"[Error] Max retries reached for input: {text_input[:50]}...")
-                print(f"Last error: {e}")
-                raise
-            
-            print(f"[Warning] Rate limit exceeded. Waiting for {delay_seconds} seconds... (Attempt {current_try}/{max_retries})")
-            time.sleep(delay_seconds)
-        
-        except json.JSONDecodeError as e:
-            # The model returned invalid JSON
-            print(f"[Error] Failed to decode JSON from model response.")
-            print(f"       Input text was: {text_input[:100]}...")
-            print(f"       Model response was: {response.text}")
-            raise e
-        
-        except Exception as e:
-            # Catch other potential errors (e.g., connection issues)
-            print(f"[Error] An unexpected error occurred: {e}")
-            raise e
+    try:
+        # Send the text to the model.
+        # The model already knows the rules from the SYSTEM_PROMPT.
+        response = generate_content_with_retry(
+            model, MODEL_NAME, text_input,
+            max_retries=max_retries, max_delay_seconds=delay_seconds
+        )
+
+        # The model, in JSON mode, should return a clean JSON string.
+        # We parse it into a Python dictionary.
+        result_json = json.loads(response.text)
+        if use_cache:
+            get_gemini_cache().set(cache_key, result_json)
+        return result_json
+
+    except ResourceExhausted as e:
+        # This exception is thrown on HTTP 429 (Rate Limit / Token Limit)
+        print(f"[Error] Max retries reached for input: {text_input[:50]}...")
+        print(f"Last error: {e}")
+        raise
 
-    raise RuntimeError("Unknown error from AI process")
+    except json.JSONDecodeError as e:
+        # The model returned invalid JSON
+        print(f"[Error] Failed to decode JSON from model response.")
+        print(f"       Input text was: {text_input[:100]}...")
+        print(f"       Model response was: {response.text}")
+        raise e
+
+    except Exception as e:
+        # Catch other potential errors (e.g., connection issues)
+        print(f"[Error] An unexpected error occurred: {e}")
+        raise e
 
 def split_string_by_lines(long_string: str, max_length: int = 4096) -> list[str]:
     """
@@ -108,53 +139,109 @@ def split_string_by_lines(long_string: str, max_length: int = 4096) -> list[str]
     하나의 청크를 구성하게 됩니다. 이 경우 해당 청크는 max_length를 초과할 수 있습니다.
     """
     
-    # 1. 문자열을 라인별로 나눕니다. (개행 문자를 보존합니다)
-    lines = long_string.splitlines(keepends=True)
-    
+    # 라인별로 나누되(개행 문자 보존), 라인 하나가 max_length 이상이면 그 라인이 단독 청크가 됩니다.
+    # 청크는 리스트에 모았다가 한 번에 join 합니다. (문자열 += 반복 없이 선형 시간)
+    return _pack_units(
+        long_string.splitlines(keepends=True),
+        max_length - 1,  # "이 길이 미만" 규칙
+        measure=len,
+        split_unit=lambda line: [line],
+    )
+
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+
+# 한 줄을 더 나눠야 할 때 쪼개지면 안 되는 Markdown 요소(링크, 굵게/기울임/취소선, 인라인 코드)와 일반 단어
+_MARKDOWN_TOKEN_RE = re.compile(
+    r"\[[^\]\n]*\]\([^)\n]*\)"   # [text](link)
+    r"|\*\*[^\n]+?\*\*"          # **bold**
+    r"|__[^\n]+?__"              # __bold__
+    r"|~~[^\n]+?~~"              # ~~strike~~
+    r"|`[^`\n]*`"                # `code`
+    r"|\S+"
+)
+
+def _pack_units(units, max_length: int, measure, split_unit) -> list[str]:
+    """
+    units를 순서대로 이어 붙여 measure 기준 max_length 이하의 청크로 만듭니다. (한 번의 순회)
+    unit 하나가 max_length보다 길면 split_unit(unit)의 결과를 각각 별도 청크로 추가합니다.
+    """
     chunks = []
-    current_chunk = ""
-    
-    for line in lines:
-        # 2. 만약 한 줄 자체가 max_length보다 긴 경우 (예외 케이스)
-        #    "라인을 자르지 않는다"는 규칙을 우선합니다.
-        if len(line) >= max_length:
-            # 현재까지 누적된 청크가 있다면 먼저 추가합니다.
-            if current_chunk:
-                chunks.append(current_chunk)
-            
-            # 이 긴 라인을 그 자체로 하나의 청크로 추가합니다.
-            chunks.append(line)
-            
-            # 현재 청크를 리셋하고 다음 라인으로 넘어갑니다.
-            current_chunk = ""
+    current = []
+    current_length = 0
+    for unit in units:
+        length = measure(unit)
+        if length > max_length:
+            if current:
+                chunks.append("".join(current))
+                current, current_length = [], 0
+            chunks.extend(split_unit(unit))
             continue
-            
-        # 3. 현재 라인을 추가했을 때 max_length를 초과하는지 확인합니다.
-        if len(current_chunk) + len(line) >= max_length:
-            # 초과한다면, 현재까지의 청크를 리스트에 추가합니다.
-            if current_chunk: # 빈 문자열이 아닐 경우에만 추가
-                chunks.append(current_chunk)
-            
-            # 새 청크는 현재 라인으로 시작합니다.
-            current_chunk = line
-        else:
-            # 4. max_length를 초과하지 않으면, 현재 청크에 라인을 누적합니다.
-            current_chunk += line
-            
-    # 5. 마지막에 current_chunk에 남아있는 문자열이 있다면 추가합니다.
-    if current_chunk:
-        chunks.append(current_chunk)
-        
+        if current and current_length + length > max_length:
+            chunks.append("".join(current))
+            current, current_length = [], 0
+        current.append(unit)
+        current_length += length
+    if current:
+        chunks.append("".join(current))
     return chunks
 
+def telegram_escaped_length(text: str) -> int:
+    """
+    text를 MarkdownV2로 변환(telegramify_markdown.markdownify)했을 때의 길이입니다.
+    여러 조각을 이어 붙일 때 생기는 개행 1글자를 포함합니다.
+    """
+    return len(telegramify_markdown.markdownify(text)) + 1
+
+def _iter_markdown_blocks(text: str):
+    """빈 줄로 구분되는 블록(다이제스트 항목 하나, 문단 하나 등)을 순서대로 반환합니다. 코드 블록(```)은 중간에 나누지 않습니다."""
+    block = []
+    in_fence = False
+    for line in text.splitlines(keepends=True):
+        block.append(line)
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+        if not in_fence and not line.strip():
+            yield "".join(block)
+            block = []
+    if block:
+        yield "".join(block)
+
+def split_markdown_for_telegram(text: str, max_length: int = TELEGRAM_MAX_MESSAGE_LENGTH, measure=telegram_escaped_length) -> list[str]:
+    """
+    Markdown 문자열을 텔레그램 메시지 청크로 나눕니다.
+
+    각 청크의 길이는 MarkdownV2로 이스케이프한 뒤의 길이(measure)로 계산하므로,
+    전송 직전에 이스케이프하더라도 max_length를 넘지 않습니다.
+    빈 줄로 구분되는 블록 단위로 묶으며, 블록 하나가 너무 길 때만 라인 단위로,
+    라인 하나가 너무 길 때만 단어 단위로 나눕니다. 링크, 굵게 등의 Markdown 요소는 절대 중간에서 자르지 않습니다.
+    각 블록의 길이는 한 번만 계산하고, 청크는 리스트에 모았다가 join 합니다.
+
+    Args:
+        text (str): 분할할 Markdown 문자열.
+        max_length (int): 이스케이프 후 기준 청크의 최대 길이.
+        measure (callable): 조각의 길이를 계산하는 함수.
+
+    Returns:
+        list[str]: 이스케이프하기 전의 Markdown 청크 리스트.
+    """
+    def split_line(line):
+        ending = "\n" if line.endswith("\n") else ""
+        words = [token + " " for token in _MARKDOWN_TOKEN_RE.findall(line)]
+        pieces = _pack_units(words, max_length, measure, split_unit=lambda word: [word])
+        return [piece.rstrip(" ") + "\n" for piece in pieces[:-1]] + [pieces[-1].rstrip(" ") + ending] if pieces else []
+
+    def split_block(block):
+        return _pack_units(block.splitlines(keepends=True), max_length, measure, split_unit=split_line)
+
+    return _pack_units(_iter_markdown_blocks(text), max_length, measure, split_unit=split_block)
+
 class telegram(TypedDict):
     token: str
 
-def send_to_telegram(message: str, chat_id: int = int(wmill.get_variable("u/rapaellk/telegram_chat_id")), escaped: bool = False, token = wmill.get_resource("u/rapaellk/telegram_token_resource"), reply_markup=None):
-    telegram_url = f"https://api.telegram.org/bot{token['token']}/sendMessage"
+def _build_telegram_payload(message: str, chat_id: int, escaped: bool = False, reply_markup=None) -> dict:
     text = message
     if not escaped:
-        text = telegramify_markdown.markdownify(message),
+        text = telegramify_markdown.markdownify(message)
     payload = {
         "chat_id": chat_id,
         "text": text,
@@ -162,71 +249,214 @@ def send_to_telegram(message: str, chat_id: int = int(wmill.get_variable("u/rapa
     }
     if reply_markup:
         payload["reply_markup"] = reply_markup
-    response = requests.post(telegram_url, data=payload)
-    return response.json()
+    return payload
+
+def send_to_telegram(message: str, chat_id: int = None, escaped: bool = False, token = None, reply_markup=None):
+    """
+    메시지 하나를 전송 큐(telegram_sender)를 통해 보내고, 전송이 끝나면 API 응답(JSON)을 반환합니다.
+    chat_id, token을 생략하면 Windmill 설정값을 사용합니다. (처음 사용할 때 한 번만 가져옴)
+    """
+    chat_id = chat_id if chat_id is not None else TELEGRAM_CHAT_ID.get()
+    token = token if token is not None else TELEGRAM_TOKEN.get()
+    payload = _build_telegram_payload(message, chat_id, escaped, reply_markup)
+    return get_send_queue().submit(token['token'], payload).result()
 
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.127 Safari/537.36'
 }
 
-def send_long_message_to_telegram(message: str, chat_id: int = int(wmill.get_variable("u/rapaellk/telegram_chat_id")), token = wmill.get_resource("u/rapaellk/telegram_token_resource")):
-    splitted_msg = split_string_by_lines(message)
-    for m in splitted_msg:
-        send_to_telegram(m, chat_id, token=token)
+def send_long_message_to_telegram(message: str, chat_id: int = None, token = None):
+    """
+    긴 메시지를 MarkdownV2 이스케이프 후 길이 기준의 청크로 나누어 한꺼번에 전송 큐에 넣고, 모두 전송될 때까지 기다립니다.
+    큐가 순서를 보장하므로 청크는 나눈 순서대로 도착합니다.
+    """
+    chat_id = chat_id if chat_id is not None else TELEGRAM_CHAT_ID.get()
+    token = token if token is not None else TELEGRAM_TOKEN.get()
+    splitted_msg = split_markdown_for_telegram(message)
+    send_queue = get_send_queue()
+    futures = [send_queue.submit(token['token'], _build_telegram_payload(m, chat_id)) for m in splitted_msg]
+    return [future.result() for future in futures]
+
+class TelegramDigestStream:
+    """
+    완성된 다이제스트 항목을 받는 대로 텔레그램 메시지 크기 단위로 묶어 바로 전송합니다.
+
+    항목을 add()로 추가하다가 다음 항목을 붙이면 (MarkdownV2 이스케이프 후 길이 기준으로) max_length를 넘게 되는 순간,
+    지금까지 모인 청크를 즉시 전송합니다. 첫 청크의 앞에는 title이 붙습니다.
+    with 블록으로 사용하면 블록을 빠져나갈 때(예외가 발생한 경우 포함) 남은 항목을 전송하므로,
+    뒤쪽 항목에서 실패하더라도 앞서 완성된 항목은 유실되지 않습니다.
+
+    첫 항목은 다음 항목을 기다리지 않고 title과 함께 바로 전송하므로 첫 헤드라인은 곧바로 도착합니다.
+    그 뒤로는 max_delay_seconds가 지정되면, 청크가 가득 차지 않았더라도 가장 먼저 모인 항목이
+    그보다 오래 기다린 경우 다음 add() 때 함께 전송합니다.
+
+    add()에 item_id를 넘기면 해당 항목이 실제로 전송된 뒤 delivered_ids에 기록됩니다.
+    청크 중 하나라도 전송에 실패하면 그 청크의 항목들은 delivered_ids에 넣지 않고 예외를 발생시키므로,
+    다음 실행에서 다시 전송됩니다.
+    """
+
+    def __init__(self, title: str, max_length: int = TELEGRAM_MAX_MESSAGE_LENGTH, empty_message: str = None, max_delay_seconds: float = 3, chat_id: int = None, token=None):
+        self.title = title
+        self.max_length = max_length
+        self.empty_message = empty_message
+        self.max_delay_seconds = max_delay_seconds
+        self.delivered_ids = []
+        self.item_count = 0
+        self._send_kwargs = {}
+        if chat_id is not None:
+            self._send_kwargs["chat_id"] = chat_id
+        if token is not None:
+            self._send_kwargs["token"] = token
+        self._parts = [title]
+        self._length = telegram_escaped_length(title)
+        self._pending_ids = []
+        self._has_items = False
+        self._pending_since = None
+
+    def add(self, item_text: str, item_id=None):
+        """완성된 항목 하나를 추가합니다. 청크가 가득 차면 먼저 전송합니다."""
+        item_length = telegram_escaped_length(item_text)
+        if self._has_items and self._length + item_length > self.max_length:
+            self.flush()
+        self._parts.append(item_text)
+        self._length += item_length
+        self._has_items = True
+        self.item_count += 1
+        if item_id is not None:
+            self._pending_ids.append(item_id)
+        if self.item_count == 1:
+            self.flush()
+        elif self._pending_since is None:
+            self._pending_since = time.monotonic()
+        elif self.max_delay_seconds is not None and time.monotonic() - self._pending_since >= self.max_delay_seconds:
+            self.flush()
+
+    def flush(self):
+        """모인 항목을 전송합니다."""
+        if not self._has_items:
+            return
+        message = "".join(self._parts)
+        pending_ids = self._pending_ids
+        # 전송 전에 비워 두어, 실패 후 __exit__에서 다시 flush()해도 같은 청크를 중복 전송하지 않습니다.
+        self._parts = []
+        self._length = 0
+        self._pending_ids = []
+        self._has_items = False
+        self._pending_since = None
+        print(message)
+        # 청크 중 하나라도 전송에 실패하면 send_long_message_to_telegram()이 TelegramAPIError 등을 발생시킵니다.
+        send_long_message_to_telegram(message, **self._send_kwargs)
+        self.delivered_ids.extend(pending_ids)
+
+    def close(self):
+        """남은 항목을 전송합니다. 항목이 하나도 없었다면 empty_message(있을 경우)를 전송합니다."""
+        if self.item_count == 0 and self.empty_message:
+            self.add(self.empty_message)
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # 실패하더라도 이미 완성된 항목은 전송합니다. 원래 예외는 그대로 전달됩니다.
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[Error] Failed to flush partial digest: {e}")
+        return False
 
 def _get_content_from_link_tabily(url):
     try:
-        tavily_client = TavilyClient(wmill.get_variable("u/rapaellk/TAVILY_API_KEY"))
-        response = tavily_client.extract(urls=url, extract_depth="advanced")
-        #print(response)
-        #return response
-        if not response.get("results"):
-            return None
-        return response["results"][0]["raw_content"]
+        return extract_urls([url]).get(url)
     except Exception as e:
         print(e)
         return None
 
 def _get_content_from_link_trafilatura(url):
     try:
-        response = requests.get(
-            url, 
-            headers=HEADERS,  # 준비된 헤더 사용
-            timeout=10        # 10초 이상 걸리면 중단
-        )
-        if response.status_code != 200:
-            print("Failed to get html")
-            return None
-        downloaded_html = response.text
-        if downloaded_html is None:
-            print("Empty html")
-            return None
-        full_text = trafilatura.extract(
-            downloaded_html,
-            output_format='txt',      # 'txt' (기본값), 'json', 'xml' 등
-            include_comments=False,   # 댓글 제외
-            include_tables=False,     # 표(테이블) 제외
-            no_fallback=False         # 기본 추출 실패 시 다른 방법 시도
-        )
-        if not full_text:
-            print("too short html")
-            return None
-        return full_text
+        # 같은 링크는 추출 캐시에서 가져오고, 오래된 항목은 조건부 GET으로 재검증합니다.
+        return get_extraction_cache().fetch_text(url, extract_article_text, headers=HEADERS, timeout=10)
     except Exception as e:
         print(e)
         return None
 
-def get_content_from_link(url):
+def get_content_from_link(url, tavily_fallback=True):
+    """
+    링크의 본문을 가져옵니다. trafilatura로 추출한 본문이 100자 미만이면 Tavily로 다시 시도합니다.
+    여러 링크를 처리할 때는 tavily_fallback=False로 호출하고 DeferredTavilyFallback으로 모아서 요청하세요.
+    """
     content = _get_content_from_link_trafilatura(url)
-    if not content or len(content) < 100:
-        return _get_content_from_link_tabily(url)
+    if tavily_fallback and needs_tavily_fallback(content):
+        content = _get_content_from_link_tabily(url)
+        if content:
+            get_extraction_cache().store(url, content, source="tavily")
+    return content
+
+def needs_tavily_fallback(content) -> bool:
+    return not content or len(content) < 100
 
 def remove_html_tags_bs4(html_string):
     """
     Removes HTML tags from a string using BeautifulSoup and extracts pure text.
     """
-    soup = BeautifulSoup(html_string, 'html.parser')
-    return soup.get_text()
+    # 긴 HTML은 프로세스 풀에서 파싱하여 GIL을 오래 잡지 않도록 합니다.
+    return get_extraction_executor().extract(html_string, "text")
+
+
+def iter_staged_pipeline(items, stages, workers):
+    """
+    items를 여러 단계(stage)로 구성된 파이프라인으로 동시에 처리합니다.
+
+    각 단계는 크기가 제한된 별도의 스레드 풀에서 실행되고, 이전 단계의 반환값이
+    다음 단계의 입력이 됩니다. 단계 함수가 None을 반환하면 이후 단계는 건너뛰고
+    해당 항목의 결과는 None이 됩니다.
+
+    Args:
+        items: 처리할 입력 목록.
+        stages (list[callable]): 순서대로 실행할 단계 함수 목록.
+        workers (list[int]): 각 단계의 최대 동시 실행 수 (stages와 같은 길이).
+
+    Yields:
+        각 항목의 최종 결과. 입력 순서를 그대로 유지하며, 앞선 항목이 끝나는 대로 바로 반환됩니다.
+        단계에서 발생한 예외는 해당 항목의 차례에 다시 발생합니다.
+    """
+    if len(stages) != len(workers):
+        raise ValueError("stages and workers must have the same length")
+
+    executors = [
+        ThreadPoolExecutor(max_workers=max(1, w), thread_name_prefix=f"pipeline-stage{i}")
+        for i, w in enumerate(workers)
+    ]
+
+    def run_stage(stage_index, value, result_future):
+        try:
+            output = stages[stage_index](value)
+        except Exception as e:
+            result_future.set_exception(e)
+            return
+        if output is None or stage_index + 1 == len(stages):
+            result_future.set_result(output)
+            return
+        try:
+            executors[stage_index + 1].submit(run_stage, stage_index + 1, output, result_future)
+        except RuntimeError as e:
+            # 소비자가 중간에 중단하여 executor가 이미 종료된 경우
+            result_future.set_exception(e)
+
+    result_futures = []
+    try:
+        for item in items:
+            result_future = Future()
+            executors[0].submit(run_stage, 0, item, result_future)
+            result_futures.append(result_future)
+        for result_future in result_futures:
+            yield result_future.result()
+    finally:
+        for executor in executors:
+            executor.shutdown(wait=False, cancel_futures=True)
 
 
 def main(x: str):
@@ -0,0 +1,124 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+# 여러 스크립트 실행(run) 간에 유지되어야 하는 캐시 파일들이 저장되는 디렉터리
+DEFAULT_CACHE_DIR = os.environ.get("RAPAELLK_CACHE_DIR", "/tmp/rapaellk_cache")
+
+def cache_path(filename: str) -> str:
+    """DEFAULT_CACHE_DIR 아래의 캐시 파일 경로를 반환합니다. (디렉터리가 없으면 생성)"""
+    os.makedirs(DEFAULT_CACHE_DIR, exist_ok=True)
+    return os.path.join(DEFAULT_CACHE_DIR, filename)
+
+def make_cache_key(*parts) -> str:
+    """
+    여러 값을 조합하여 내용 기반(content-addressed) 캐시 키를 만듭니다.
+    문자열이 아닌 값(dict 등)은 정렬된 JSON으로 직렬화한 뒤 해시합니다.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, str):
+            part = json.dumps(part, sort_keys=True, ensure_ascii=False, default=str)
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")  # 구분자: ("ab", "c")와 ("a", "bc")가 같은 키가 되지 않도록
+    return digest.hexdigest()
+
+class PersistentCache:
+    """
+    SQLite 기반의 디스크 key-value 캐시입니다.
+
+    - 값은 JSON으로 직렬화되어 저장됩니다.
+    - ttl_seconds가 지난 항목은 조회 시 만료 처리됩니다. (None이면 만료 없음)
+    - 항목 수가 max_entries를 넘으면 가장 오래 사용되지 않은 항목부터 제거합니다. (LRU)
+    - hit/miss 횟수를 기록합니다.
+
+    하나의 인스턴스를 여러 스레드에서 공유해도 안전합니다.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = None, max_entries: int = 10000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed_at ON cache(accessed_at)")
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def get(self, key: str, default=None):
+        """키에 해당하는 값을 반환합니다. 없거나 만료되었으면 default를 반환합니다."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return default
+            value, created_at = row
+            if self._is_expired(created_at, now):
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self.misses += 1
+                return default
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(value)
+
+    def set(self, key: str, value):
+        """값을 저장합니다. 저장 후 항목 수가 max_entries를 넘으면 LRU 순으로 제거합니다."""
+        now = time.time()
+        serialized = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, serialized, now, now)
+            )
+            if self.max_entries is not None:
+                self._conn.execute(
+                    "DELETE FROM cache WHERE key IN ("
+                    " SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def purge_expired(self) -> int:
+        """만료된 항목을 모두 삭제하고 삭제된 개수를 반환합니다."""
+        if self.ttl_seconds is None:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM cache WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+            return cursor.rowcount
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def stats(self) -> dict:
+        """hit/miss 횟수, 적중률, 현재 항목 수를 반환합니다."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+            "entries": len(self),
+        }
@@ -0,0 +1,68 @@
+import time
+import random
+import threading
+
+class TokenBucket:
+    """
+    스레드 안전한 토큰 버킷입니다.
+
+    초당 rate 개의 토큰이 capacity까지 채워지며, acquire()는 필요한 만큼의 토큰이
+    모일 때까지 기다립니다. pause()로 일정 시간 동안 모든 호출자를 멈출 수 있습니다.
+    (예: 서버가 알려준 retry 시간)
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated_at
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated_at = now
+
+    def try_acquire(self, amount: float = 1) -> float:
+        """
+        토큰을 바로 가져갈 수 있으면 가져가고 0을 반환합니다.
+        그렇지 않으면 아무것도 가져가지 않고, 기다려야 하는 시간(초)을 반환합니다.
+        capacity보다 큰 요청은 버킷이 가득 찼을 때 한 번에 허용합니다.
+        """
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            self._refill(now)
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.rate
+
+    def acquire(self, amount: float = 1, timeout: float = None) -> bool:
+        """토큰을 얻을 때까지 기다립니다. timeout 안에 얻지 못하면 False를 반환합니다."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(amount)
+            if wait <= 0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """지금부터 seconds 동안 토큰을 내주지 않습니다. 더 긴 pause가 이미 걸려 있으면 유지합니다."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+            self._updated_at = self._paused_until
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """지수 백오프 + full jitter: [0, min(cap, base * 2^attempt)] 구간의 임의 값을 반환합니다."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
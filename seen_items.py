@@ -0,0 +1,102 @@
+import time
+import sqlite3
+import threading
+from typing import Iterable, Optional
+
+from u.rapaellk.persistent_cache import cache_path
+
+# 전송 기록을 보관하는 기간. 이 기간이 지난 기록은 자동으로 삭제됩니다.
+DEFAULT_RETENTION_SECONDS = 30 * 24 * 60 * 60
+
+def get_item_id(item) -> Optional[str]:
+    """
+    RSS 항목에서 고유 ID를 추출합니다.
+    RSS 표준에 따라 'guid'가 가장 신뢰할 수 있는 고유 식별자입니다.
+    'guid'가 없으면 'link' (URL)를, 그것도 없으면 'title'을 사용합니다.
+    """
+    if 'guid' in item:
+        return item.guid
+    if 'link' in item:
+        return item.link
+    if 'title' in item:
+        # 제목은 변경되거나 중복될 수 있어 신뢰성이 가장 낮습니다.
+        return item.title
+    return None  # 고유 ID로 사용할 만한 키가 없음
+
+class SeenItemStore:
+    """
+    피드별(source)로 이미 전송한 항목 ID를 기록하는 SQLite 기반 저장소입니다.
+
+    - (source, item_id) 단위로 기록하며, 새 항목만 추가(insert)합니다.
+    - source별 ID 목록은 처음 조회할 때 메모리의 set으로 읽어 두므로 포함 여부 확인은 O(1)입니다.
+    - retention_seconds가 지난 기록은 저장소를 열 때 삭제됩니다.
+    """
+
+    def __init__(self, path: str = None, retention_seconds: float = DEFAULT_RETENTION_SECONDS):
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        self._seen = {}  # source -> set(item_id)
+        self._conn = sqlite3.connect(path or cache_path("seen_items.sqlite3"), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen_items ("
+            " source TEXT NOT NULL,"
+            " item_id TEXT NOT NULL,"
+            " seen_at REAL NOT NULL,"
+            " PRIMARY KEY (source, item_id)) WITHOUT ROWID"
+        )
+        self.purge_expired()
+
+    def _load(self, source: str) -> set:
+        # self._lock을 잡은 상태에서 호출해야 합니다.
+        if source not in self._seen:
+            rows = self._conn.execute("SELECT item_id FROM seen_items WHERE source = ?", (source,))
+            self._seen[source] = {row[0] for row in rows}
+        return self._seen[source]
+
+    def has_source(self, source: str) -> bool:
+        """source에 대한 기록이 하나라도 있는지 확인합니다."""
+        with self._lock:
+            return bool(self._load(source))
+
+    def is_seen(self, source: str, item_id) -> bool:
+        with self._lock:
+            return str(item_id) in self._load(source)
+
+    def filter_unseen(self, source: str, items: Iterable, key=lambda x: x) -> list:
+        """items 중 아직 전송하지 않은 항목만 순서를 유지하여 반환합니다."""
+        with self._lock:
+            seen = self._load(source)
+            return [item for item in items if str(key(item)) not in seen]
+
+    def mark_seen(self, source: str, item_ids: Iterable):
+        """item_ids를 전송 완료로 기록합니다. 이미 기록된 ID는 무시합니다."""
+        now = time.time()
+        with self._lock:
+            seen = self._load(source)
+            new_ids = {str(item_id) for item_id in item_ids if item_id is not None} - seen
+            if not new_ids:
+                return
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO seen_items (source, item_id, seen_at) VALUES (?, ?, ?)",
+                [(source, item_id, now) for item_id in new_ids]
+            )
+            seen.update(new_ids)
+
+    def purge_expired(self) -> int:
+        """retention_seconds가 지난 기록을 삭제하고 삭제된 개수를 반환합니다."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM seen_items WHERE seen_at < ?", (time.time() - self.retention_seconds,)
+            )
+            self._seen.clear()
+            return cursor.rowcount
+
+_seen_item_store = None
+
+def get_seen_item_store() -> SeenItemStore:
+    """프로세스 전체에서 공유하는 SeenItemStore를 반환합니다. (처음 사용할 때 생성)"""
+    global _seen_item_store
+    if _seen_item_store is None:
+        _seen_item_store = SeenItemStore()
+    return _seen_item_store
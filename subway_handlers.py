@@ -1,6 +1,3 @@
-import wmill
-
-import requests
 from datetime import time
 import telegramify_markdown
 import traceback
@@ -18,6 +15,8 @@ from telegram.ext import (
 )
 # [중요] 공통 모듈에서 cancel 함수 import
 from f.telegram_life_bot.common_handlers import cancel
+from u.rapaellk.http_client import get_session
+from u.rapaellk.wmill_config import lazy_variable
 
 # --- 지하철 관련 상수 ---
 subway_lines = {
@@ -50,7 +49,8 @@ train_emoji_map = {
 }
 
 GET_STATION = 0 # 지하철 대화 상태
-MY_CHAT_ID = wmill.get_variable("u/rapaellk/telegram_chat_id")
+MY_CHAT_ID = lazy_variable("u/rapaellk/telegram_chat_id")
+SUBWAY_API_KEY = lazy_variable("u/rapaellk/seoul_subway_api_key", ttl=3600)
 
 # --- 지하철 헬퍼 함수 ---
 def is_integer(s):
@@ -61,8 +61,8 @@ def is_integer(s):
         return False
 
 def subway_arrival(station: str, line=None, updown=None):
-    api_addr = f'http://swopenAPI.seoul.go.kr/api/subway/{wmill.get_variable("u/rapaellk/seoul_subway_api_key")}/json/realtimeStationArrival/0/99/{station}'
-    response = requests.get(api_addr)
+    api_addr = f'http://swopenAPI.seoul.go.kr/api/subway/{SUBWAY_API_KEY.get()}/json/realtimeStationArrival/0/99/{station}'
+    response = get_session().get(api_addr)
     if response.status_code != 200:
         raise RuntimeError("Cannot retrieve subway info")
     response_json=response.json()
@@ -162,7 +162,7 @@ async def send_scheduled_guri_info(context: telegram.ext.ContextTypes.DEFAULT_TY
     try:
         # [수정] 정보를 보내는 대신, 버튼과 함께 질문을 보냅니다.
         await context.bot.send_message(
-            chat_id=MY_CHAT_ID,
+            chat_id=MY_CHAT_ID.get(),
             text=telegramify_markdown.markdownify("**[자동]** 구리역 서울행 실시간 도착 정보를 받으시겠습니까?"),
             reply_markup=reply_markup,
             parse_mode='MarkdownV2'
@@ -171,7 +171,7 @@ async def send_scheduled_guri_info(context: telegram.ext.ContextTypes.DEFAULT_TY
         print(f"Error in scheduled job (sending question): {e}")
         print(traceback.format_exc())
         await context.bot.send_message(
-            chat_id=MY_CHAT_ID,
+            chat_id=MY_CHAT_ID.get(),
             text=f"스케줄된 질문 전송 중 오류 발생: {e}"
         )
 
@@ -244,6 +244,6 @@ def register(app: Application):
     print("Scheduled subway job (Mon-Fri 8:02 KST) successfully.")
 
 #def main(station: str):
-#    api_addr = f'http://swopenAPI.seoul.go.kr/api/subway/{wmill.get_variable("u/rapaellk/seoul_subway_api_key")}/json/realtimeStationArrival/0/99/{station}'
+#    api_addr = f'http://swopenAPI.seoul.go.kr/api/subway/{SUBWAY_API_KEY.get()}/json/realtimeStationArrival/0/99/{station}'
 #    response = requests.get(api_addr)
 #    print(response)
\ No newline at end of file
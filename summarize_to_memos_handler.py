@@ -1,10 +1,5 @@
-import wmill
-import requests
 import json
-import trafilatura
-import time
 import re
-from youtube_transcript_api import YouTubeTranscriptApi
 import json_repair
 import traceback
 import telegram # pin: python-telegram-bot[job-queue]>=20.0
@@ -15,6 +10,7 @@ from telegram.ext import (
     MessageHandler, filters, ContextTypes
 )
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from playwright.sync_api import sync_playwright
 
 import google.generativeai as genai
@@ -23,11 +19,19 @@ from google.api_core.exceptions import ResourceExhausted
 # [중요] 공통 모듈에서 cancel 함수 import
 try:
     from f.telegram_life_bot.common_handlers import cancel
+    from f.telegram_life_bot.browser_pool import get_browser_pool
+    from f.telegram_life_bot.fair_work_queue import FairWorkQueue
+    from f.telegram_life_bot.youtube_transcripts import get_transcript
 except ImportError:
     # 로컬 테스트 등을 위한 fallback
     from common_handlers import cancel
+    from browser_pool import get_browser_pool
+    from fair_work_queue import FairWorkQueue
+    from youtube_transcripts import get_transcript
 
-genai.configure(api_key=wmill.get_variable("u/rapaellk/googleai_api_key_free"))
+from u.rapaellk.extraction_cache import get_extraction_cache, extract_article_text
+from u.rapaellk.gemini_client import generate_content_with_retry, estimate_tokens, split_text_by_tokens
+from u.rapaellk.memos_outbox import get_memos_outbox
 
 def process_text_with_gemini(text_input, max_retries=3, delay_seconds=60):
     # This system prompt contains all the logic you requested.
@@ -57,107 +61,140 @@ def process_text_with_gemini(text_input, max_retries=3, delay_seconds=60):
             "temperature": 0.0  # <-- Add this line for maximum predictability
         }
     )
-    current_try = 0
-    while current_try <= max_retries:
+    try:
+        # Send the text to the model.
+        # The model already knows the rules from the SYSTEM_PROMPT.
+        response = generate_content_with_retry(
+            model, 'gemini-2.5-flash', text_input,
+            max_retries=max_retries, max_delay_seconds=delay_seconds
+        )
+
+        # The model, in JSON mode, should return a clean JSON string.
+        # We parse it into a Python dictionary.
+        result_json = json_repair.loads(response.text)
+        return result_json
+
+    except ResourceExhausted as e:
+        # This exception is thrown on HTTP 429 (Rate Limit / Token Limit)
+        print(f"[Error] Max retries reached for input: {text_input[:50]}...")
+        print(f"Last error: {e}")
+        raise
+
+    except json.JSONDecodeError as e:
+        # The model returned invalid JSON
+        print(f"[Error] Failed to decode JSON from model response.")
+        print(f"       Input text was: {text_input[:100]}...")
+        print(f"       Model response was: {response.text}")
+        raise e
+
+    except Exception as e:
+        # Catch other potential errors (e.g., connection issues)
+        print(f"[Error] An unexpected error occurred: {e}")
+        raise e
+
+# 한 번의 Gemini 요청에 넣는 입력의 최대 추정 토큰 수. 이보다 긴 입력은 나누어 요약한 뒤 합칩니다.
+TOKEN_BUDGET = 30_000
+# /summarize_to_memos <url> <토큰 수>로 지정할 수 있는 범위
+MIN_TOKEN_BUDGET = 2_000
+MAX_TOKEN_BUDGET = 500_000
+MAP_WORKERS = 4
+MAX_MAP_ROUNDS = 3
+
+MAP_SYSTEM_PROMPT = """
+You are summarizing one part of a longer document (an article or a video transcript).
+Write detailed notes of this part in plain markdown bullet points, in the same language as the input.
+Keep all key facts, names, numbers, arguments and conclusions. Remove advertisements and content that is out of context.
+Do not add an introduction or a conclusion of your own. Return only the notes.
+"""
+
+def _summarize_chunk(chunk: str, max_retries=3, delay_seconds=60) -> str:
+    model = genai.GenerativeModel(
+        'gemini-2.5-flash',
+        system_instruction=MAP_SYSTEM_PROMPT,
+        generation_config={"temperature": 0.0}
+    )
+    response = generate_content_with_retry(
+        model, 'gemini-2.5-flash', chunk,
+        max_retries=max_retries, max_delay_seconds=delay_seconds
+    )
+    return response.text
+
+def summarize_long_text(text_input: str, token_budget: int = TOKEN_BUDGET, map_workers: int = MAP_WORKERS):
+    """
+    긴 입력을 map-reduce 방식으로 요약합니다.
+
+    입력이 token_budget 이하면 process_text_with_gemini()를 한 번 호출합니다.
+    그보다 길면 token_budget 크기의 청크로 나누어 각 청크를 병렬로 요약(map)하고,
+    청크 요약들을 합친 결과로 process_text_with_gemini()를 호출(reduce)합니다.
+    합친 요약도 token_budget을 넘으면 같은 과정을 반복합니다. (최대 MAX_MAP_ROUNDS번)
+    그래도 token_budget을 넘으면 앞부분만 token_budget에 맞게 잘라 reduce합니다.
+    """
+    with ThreadPoolExecutor(max_workers=map_workers, thread_name_prefix="summarize-map") as executor:
+        # 요약이 줄어들지 않는 경우에도 끝나도록 반복 횟수를 제한합니다.
+        for _ in range(MAX_MAP_ROUNDS):
+            if estimate_tokens(text_input) <= token_budget:
+                break
+            chunks = split_text_by_tokens(text_input, token_budget)
+            print(f"Input is about {estimate_tokens(text_input)} tokens. Summarizing {len(chunks)} chunks in parallel...")
+            # 순서를 유지하여 합칩니다. 요청 간격은 gemini_client의 공유 한도가 조절합니다.
+            text_input = "\n\n".join(executor.map(_summarize_chunk, chunks))
+    if estimate_tokens(text_input) > token_budget:
+        print(f"Summary is still about {estimate_tokens(text_input)} tokens after {MAX_MAP_ROUNDS} rounds. Truncating to {token_budget} tokens.")
+        text_input = split_text_by_tokens(text_input, token_budget)[0]
+    return process_text_with_gemini(text_input)
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.127 Safari/537.36'
+}
+
+def _get_html_with_playwright(url):
+    # 봇에서 실행 중이면 Application이 띄워 둔 브라우저 풀을 사용합니다.
+    pool = get_browser_pool()
+    if pool is not None:
         try:
-            # Send the text to the model.
-            # The model already knows the rules from the SYSTEM_PROMPT.
-            response = model.generate_content(text_input)
-            
-            # The model, in JSON mode, should return a clean JSON string.
-            # We parse it into a Python dictionary.
-            result_json = json_repair.loads(response.text)
-            return result_json
-
-        except ResourceExhausted as e:
-            # This exception is thrown on HTTP 429 (Rate Limit / Token Limit)
-            current_try += 1
-            if current_try > max_retries:
-                print(f"[Error] Max retries reached for input: {text_input[:50]}...")
-                print(f"Last error: {e}")
-                raise
-            
-            print(f"[Warning] Rate limit exceeded. Waiting for {delay_seconds} seconds... (Attempt {current_try}/{max_retries})")
-            time.sleep(delay_seconds)
-        
-        except json.JSONDecodeError as e:
-            # The model returned invalid JSON
-            print(f"[Error] Failed to decode JSON from model response.")
-            print(f"       Input text was: {text_input[:100]}...")
-            print(f"       Model response was: {response.text}")
-            raise e
-        
+            return pool.fetch_html_threadsafe(url)
         except Exception as e:
-            # Catch other potential errors (e.g., connection issues)
-            print(f"[Error] An unexpected error occurred: {e}")
-            raise e
-
-    raise RuntimeError("Unknown error from AI process")
+            print(f"Failed to get html: {e}. Give up")
+            return None
 
-def get_content_from_link(url):
-    HEADERS = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.127 Safari/537.36'
-    }
-    try:
+    with sync_playwright() as p:
+        browser = None
         try:
-            response = requests.get(
-                url, 
-                headers=HEADERS,  # 준비된 헤더 사용
-                timeout=10        # 10초 이상 걸리면 중단
-            )
-            if response.status_code != 200:
+            browser = p.chromium.launch()
+            page = browser.new_page()
+            page.goto(url)
+            downloaded_html = page.content()
+            if not downloaded_html:
                 raise RuntimeError("Failed to get html")
-            downloaded_html = response.text
-            if downloaded_html is None:
-                raise RuntimeError("Empty html")
+            return downloaded_html
         except Exception as e:
-            print(f"Failed to get html: {e}. Try heavier way...")
-            with sync_playwright() as p:
-                try:
-                    browser = p.chromium.launch()
-                    page = browser.new_page()
-                    page.goto(url)
-                    downloaded_html = page.content()
-                    browser.close()
-                    if not downloaded_html:
-                        raise RuntimeError("Failed to get html")
-                except Exception:
-                    print(f"Failed to get html: {e}. Give up")
-                    return None
-        full_text = trafilatura.extract(
-            downloaded_html,
-            output_format='txt',      # 'txt' (기본값), 'json', 'xml' 등
-            include_comments=False,   # 댓글 제외
-            include_tables=False,     # 표(테이블) 제외
-            no_fallback=False         # 기본 추출 실패 시 다른 방법 시도
-        )
-        if not full_text:
-            print("too short html")
+            print(f"Failed to get html: {e}. Give up")
             return None
-        return full_text
+        finally:
+            if browser is not None:
+                browser.close()
+
+def get_content_from_link(url, on_extract=None):
+    def extract(html):
+        if on_extract:
+            on_extract()
+        return extract_article_text(html)
+
+    try:
+        # 같은 링크를 다시 요약할 때는 추출 캐시의 본문을 사용합니다. (네트워크와 추출 모두 생략)
+        return get_extraction_cache().fetch_text(
+            url, extract, headers=HEADERS, timeout=10, fallback_html=_get_html_with_playwright
+        )
     except Exception as e:
         print(e)
         return None
 
-def post_memo(content: str):
-    memos_server_addr = "http://192.168.0.42:5230"
-    headers = {
-        'Authorization':'Bearer ' + wmill.get_variable("u/rapaellk/memos_token"),
-        "Content-Type": "application/json"
-    }
-
-    json={
-      "name": "",
-      "state": "NORMAL",
-      "content": content,
-      "visibility": "PROTECTED",
-      "pinned": False,
-    }
-
-    response = requests.post(
-        f"{memos_server_addr}/api/v1/memos", headers=headers, json=json
-    )
-    return response.json()
+def post_memo(content: str) -> str:
+    """
+    메모를 outbox에 넣고 memoId를 반환합니다.
+    실제 전송은 outbox의 백그라운드 드레이너가 하며, 서버가 응답하지 않으면 같은 memoId로 재시도합니다.
+    """
+    return get_memos_outbox().enqueue(content)
 
 def parseYoutubeURL(url:str)->str:
    data = re.findall(r"(?:v=|\/)([0-9A-Za-z_-]{11}).*", url)
@@ -165,30 +202,36 @@ def parseYoutubeURL(url:str)->str:
        return data[0]
    return ""
 
-def summarize_to_memos(url:str):
+def summarize_to_memos(url:str, progress=None, token_budget: int = TOKEN_BUDGET):
+    """
+    url의 내용을 요약하여 Memos에 저장합니다. 성공하면 True, 실패하면 None을 반환합니다.
+    progress가 주어지면 각 단계("fetch", "extract", "llm", "post")를 시작할 때 단계 이름으로 호출합니다.
+    token_budget은 한 번의 Gemini 요청에 넣는 입력의 최대 추정 토큰 수입니다. (summarize_long_text())
+    """
+    def report(stage):
+        if progress:
+            progress(stage)
+
     content = ""
+    report("fetch")
     if "youtube.com" in url.lower() or "youtu.be" in url.lower():
         video_id = parseYoutubeURL(url)
         if not video_id:
             return None
-        ytt_api = YouTubeTranscriptApi()
-        transcript_list = ytt_api.list(video_id)
-        try:
-            transcript = transcript_list.find_manually_created_transcript(['ko', 'en'])
-        except Exception:
-            try:
-                transcript = transcript_list.find_generated_transcript(['ko', 'en'])
-            except Exception:
-                return None
-        fetched_transcript = transcript.fetch()
-        content = "\n".join([x.text for x in fetched_transcript.snippets])
-        print(content)
+        transcript = get_transcript(video_id)
+        if not transcript:
+            return None
+        report("extract")
+        content = transcript["text"]
+        print(f"Transcript: {transcript['language']} (generated={transcript['is_generated']}), "
+              f"{len(transcript['offsets'])} segments, {len(content)} chars")
     else:
-        content = get_content_from_link(url)
+        content = get_content_from_link(url, on_extract=lambda: report("extract"))
     if not content:
         return None
+    report("llm")
     try:
-        ai_processed_content = process_text_with_gemini(content)
+        ai_processed_content = summarize_long_text(content, token_budget=token_budget)
         print(ai_processed_content)
     except Exception:
         return None
@@ -201,48 +244,102 @@ def summarize_to_memos(url:str):
     final_content = f"### {title} {tags}\n{summarization}\n" + (f"---\n{translated_in_korean}" if translated_in_korean else "") + f"[원본 링크]({url})"
     print(final_content)
 
-    response = post_memo(final_content)
-    print(response)
-    if hasattr(response, "code"):
-        return None
+    report("post")
+    memo_id = post_memo(final_content)
+    print(f"Memo {memo_id} queued for posting")
     return True # well done
 
 # 대화 상태 정의
 GET_URL = 0
 
-async def _process_summary(update: Update, context: ContextTypes.DEFAULT_TYPE, url: str):
-    """
-    URL 요약 로직을 실제로 실행하고 사용자에게 응답하는 헬퍼 함수
-    """
-    await update.message.reply_text(f"요청을 처리 중입니다: {url}\n(내용에 따라 시간이 걸릴 수 있습니다...)")
-    
-    try:
-        # --- [중요] ---
-        # 만약 summarize_to_memos 함수가 오래 걸리는 작업(LLM API 호출 등)이라면
-        # 봇 전체가 멈출 수 있습니다.
-        # 이 경우, 아래와 같이 별도 스레드에서 실행해야 합니다.
-        success = await asyncio.to_thread(summarize_to_memos, url)
-        
-        # (만약 summarize_to_memos가 이미 async def로 정의된 비동기 함수라면)
-        # success = await summarize_to_memos(url) 
-
-        if success is True:
-            await update.message.reply_text("✅ 완료되었습니다.")
-        else: # None 또는 False 반환 시
-            await update.message.reply_text("❌ 실패하였습니다.")
+# 동시에 처리하는 요약 작업 수 (register()에서 변경 가능)
+SUMMARIZE_WORKERS = 2
+
+STAGE_MESSAGES = {
+    "fetch": "🔄 1/4 페이지를 가져오는 중...",
+    "extract": "🔄 2/4 본문을 추출하는 중...",
+    "llm": "🔄 3/4 요약하는 중...",
+    "post": "🔄 4/4 Memos에 저장하는 중...",
+}
 
+class SummarizeJob:
+    """대기열에 들어간 요약 요청 하나. 상태 메시지를 수정하여 진행 상황을 보여줍니다."""
+
+    def __init__(self, url: str, status_message, token_budget: int = TOKEN_BUDGET):
+        self.url = url
+        self.status_message = status_message
+        self.token_budget = token_budget
+        self.started = False
+        self.position = 0
+        self._edit_lock = asyncio.Lock()
+
+    async def set_status(self, text: str):
+        async with self._edit_lock:
+            try:
+                await self.status_message.edit_text(f"{self.url}\n{text}")
+            except Exception as e:
+                print(f"Failed to update status message: {e}")
+
+_summarize_queue = None
+_summarize_executor = None
+
+async def _refresh_waiting_positions():
+    """앞선 작업이 시작되어 순번이 바뀐 대기 작업들의 상태 메시지를 수정합니다."""
+    for position, job in enumerate(_summarize_queue.waiting(), start=1):
+        if job.position != position:
+            job.position = position
+            await job.set_status(f"⏳ 대기 중 ({position}번째)")
+
+async def _run_summary_job(job: SummarizeJob):
+    """요약 작업 큐의 워커가 실행합니다. 블로킹 작업은 요약 전용 스레드 풀에서 실행합니다."""
+    job.started = True
+    loop = asyncio.get_running_loop()
+    await _refresh_waiting_positions()
+
+    def progress(stage):
+        # 워커 스레드에서 호출되므로 이벤트 루프에 상태 메시지 수정을 예약합니다.
+        asyncio.run_coroutine_threadsafe(job.set_status(STAGE_MESSAGES[stage]), loop)
+
+    try:
+        success = await loop.run_in_executor(_summarize_executor, summarize_to_memos, job.url, progress, job.token_budget)
+        final_text = "✅ 완료되었습니다." if success is True else "❌ 실패하였습니다."
     except Exception as e:
         print(traceback.format_exc()) # 오류 로그
-        await update.message.reply_text(f"처리 중 오류가 발생했습니다: {e}")
+        final_text = f"처리 중 오류가 발생했습니다: {e}"
+    await job.set_status(final_text)
+
+async def _process_summary(update: Update, context: ContextTypes.DEFAULT_TYPE, url: str, token_budget: int = TOKEN_BUDGET):
+    """
+    URL 요약 요청을 작업 큐에 넣고 바로 반환합니다.
+    처리는 큐의 워커가 하므로, 요약이 진행되는 동안에도 다른 명령어(지하철, 날씨 등)는 바로 처리됩니다.
+    """
+    status_message = await update.message.reply_text(f"{url}\n요청을 접수했습니다.")
+    job = SummarizeJob(url, status_message, token_budget)
+    position = await _summarize_queue.submit(update.effective_user.id, job)
+    if not job.started:
+        job.position = position
+        await job.set_status(f"⏳ 대기 중 ({position}번째)")
 
 async def summarize_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """/summarize_to_memos 명령어의 진입점"""
     args = context.args
     
     if args:
-        # 1. 인자(/summarize_to_memos <url>)가 있는 경우
+        # 1. 인자(/summarize_to_memos <url> [토큰 수])가 있는 경우
         url = args[0]
-        await _process_summary(update, context, url)
+        token_budget = TOKEN_BUDGET
+        if len(args) > 1:
+            try:
+                token_budget = int(args[1].replace(",", "").replace("_", ""))
+            except ValueError:
+                token_budget = None
+            if token_budget is None or not MIN_TOKEN_BUDGET <= token_budget <= MAX_TOKEN_BUDGET:
+                await update.message.reply_text(
+                    f"토큰 수는 {MIN_TOKEN_BUDGET}에서 {MAX_TOKEN_BUDGET} 사이의 숫자로 입력해주세요.\n"
+                    "예: /summarize_to_memos <url> 50000"
+                )
+                return ConversationHandler.END
+        await _process_summary(update, context, url, token_budget)
         return ConversationHandler.END # 대화 즉시 종료
     else:
         # 2. 인자가 없는 경우, URL을 물어봄
@@ -268,8 +365,12 @@ async def receive_url(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int
     return ConversationHandler.END # 대화 종료
 
 # --- ⭐️ (3) 외부 노출용 등록 함수 ⭐️ ---
-def register(app: Application):
-    """요약 대화 핸들러를 Application에 등록합니다."""
+def register(app: Application, workers: int = SUMMARIZE_WORKERS):
+    """요약 대화 핸들러를 Application에 등록합니다. workers는 동시에 처리하는 요약 작업 수입니다."""
+    global _summarize_queue, _summarize_executor
+    # asyncio 기본 스레드 풀을 다른 핸들러와 나눠 쓰지 않도록 요약 전용 스레드 풀을 사용합니다.
+    _summarize_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="summarize")
+    _summarize_queue = FairWorkQueue(_run_summary_job, workers=workers)
     
     summary_conv_handler = ConversationHandler(
         entry_points=[CommandHandler("summarize_to_memos", summarize_command)],
@@ -284,3 +385,10 @@ def register(app: Application):
     
     app.add_handler(summary_conv_handler)
     print("Summarize handler registered successfully.")
+
+async def shutdown(app: Application):
+    """Application 종료 시 요약 작업 큐와 스레드 풀을 정리합니다."""
+    if _summarize_queue is not None:
+        await _summarize_queue.close()
+    if _summarize_executor is not None:
+        _summarize_executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,71 @@
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor
+
+from u.rapaellk.tavily_extract import extract_urls, DeferredTavilyFallback
+
+class _StubTavilyHandler(BaseHTTPRequestHandler):
+    """Tavily /extract API를 흉내 내는 스텁. 요청마다 latency_seconds만큼 기다린 뒤 URL별 본문을 돌려줍니다."""
+
+    latency_seconds = 0.5
+    requests = 0
+
+    def do_POST(self):
+        if self.path != "/extract":
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        type(self).requests += 1
+        time.sleep(self.latency_seconds)
+        payload = json.dumps({
+            "results": [{"url": url, "raw_content": f"content of {url} " * 20} for url in body["urls"]],
+            "failed_results": [],
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def main(url_count: int = 10, latency_ms: int = 500):
+    """
+    로컬 스텁 서버를 띄워 URL별 Tavily 호출과 DeferredTavilyFallback으로 묶은 호출을 비교합니다.
+    실제 Tavily API나 API 키는 사용하지 않습니다.
+    """
+    _StubTavilyHandler.latency_seconds = latency_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubTavilyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    urls = [f"https://example.com/article/{i}" for i in range(url_count)]
+
+    def extract(batch):
+        return extract_urls(batch, base_url=base_url, api_key="stub")
+
+    try:
+        _StubTavilyHandler.requests = 0
+        started = time.perf_counter()
+        per_url = {url: extract([url]).get(url) for url in urls}
+        per_url_result = {"seconds": round(time.perf_counter() - started, 3), "requests": _StubTavilyHandler.requests}
+
+        _StubTavilyHandler.requests = 0
+        started = time.perf_counter()
+        fallback = DeferredTavilyFallback(expected=url_count, extract=extract)
+        with ThreadPoolExecutor(max_workers=url_count) as pool:
+            batched = dict(zip(urls, pool.map(lambda url: fallback.request(url).result(), urls)))
+        batched_result = {"seconds": round(time.perf_counter() - started, 3), "requests": _StubTavilyHandler.requests}
+    finally:
+        server.shutdown()
+
+    result = {
+        "urls": url_count,
+        "per_url": per_url_result,
+        "batched": batched_result,
+        "same_contents": per_url == batched,
+    }
+    print(result)
+    return result
@@ -0,0 +1,124 @@
+import os
+import threading
+from concurrent.futures import Future
+
+from u.rapaellk.http_client import get_session
+from u.rapaellk.extraction_cache import canonicalize_url
+from u.rapaellk.wmill_config import lazy_variable
+
+TAVILY_API_KEY = lazy_variable("u/rapaellk/TAVILY_API_KEY")
+# 로컬 스텁 서버로 테스트할 때는 환경 변수로 주소를 바꿉니다.
+TAVILY_API_BASE_URL = os.environ.get("TAVILY_API_BASE_URL", "https://api.tavily.com")
+# Tavily extract API가 한 번에 받는 최대 URL 수
+MAX_URLS_PER_REQUEST = 20
+
+def extract_urls(urls, extract_depth: str = "advanced", base_url: str = None, api_key: str = None, timeout: int = 60) -> dict:
+    """
+    Tavily extract API로 여러 URL의 본문을 한 번에 가져옵니다.
+
+    TavilyClient를 매번 만드는 대신 공유 HTTP 세션으로 직접 호출하며,
+    MAX_URLS_PER_REQUEST개씩 나누어 요청합니다.
+
+    Returns:
+        dict: {url: raw_content}. 추출에 실패한 URL은 포함되지 않습니다.
+    """
+    urls = list(dict.fromkeys(urls))  # 순서를 유지하며 중복 제거
+    if not urls:
+        return {}
+    endpoint = f"{(base_url or TAVILY_API_BASE_URL).rstrip('/')}/extract"
+    headers = {"Authorization": f"Bearer {api_key or TAVILY_API_KEY.get()}"}
+    contents = {}
+    for start in range(0, len(urls), MAX_URLS_PER_REQUEST):
+        batch = urls[start:start + MAX_URLS_PER_REQUEST]
+        response = get_session().post(
+            endpoint, json={"urls": batch, "extract_depth": extract_depth}, headers=headers, timeout=timeout
+        )
+        response.raise_for_status()
+        body = response.json()
+        # 응답의 URL이 정규화되어 돌아오는 경우에도 요청한 URL로 되돌려 매핑합니다.
+        requested = {canonicalize_url(url): url for url in batch}
+        for result in body.get("results", []):
+            url = result.get("url") or ""
+            if url not in batch:
+                url = requested.get(canonicalize_url(url), url)
+            if result.get("raw_content"):
+                contents[url] = result["raw_content"]
+        for failed in body.get("failed_results", []):
+            print(f"[Warning] Tavily failed to extract {failed.get('url')}: {failed.get('error')}")
+    return contents
+
+class DeferredTavilyFallback:
+    """
+    여러 항목의 Tavily 추출 요청을 모았다가 한 번의 extract 호출로 처리합니다.
+
+    파이프라인의 각 항목은 Tavily가 필요하면 request(url)로 Future를 받고, 필요 없으면 decline()을 호출합니다.
+    다음 중 하나가 되면 모인 URL을 한 번에 요청하고, 결과를 각 Future에 돌려줍니다.
+    - expected개의 항목이 모두 request() 또는 decline()을 호출했을 때
+    - 모인 URL이 max_batch개가 되었을 때
+    - 첫 요청 후 max_wait_seconds가 지났을 때 (일부 항목이 중간에 실패한 경우 대비)
+
+    Future의 결과는 추출된 본문이며, 추출하지 못했으면 None입니다.
+    """
+
+    def __init__(self, expected: int, max_batch: int = MAX_URLS_PER_REQUEST, max_wait_seconds: float = 5.0, extract=extract_urls):
+        self.expected = expected
+        self.max_batch = max_batch
+        self.max_wait_seconds = max_wait_seconds
+        self._extract = extract
+        self._pending = []  # (url, future)
+        self._answered = 0
+        self._timer = None
+        self._lock = threading.Lock()
+        self.batches = 0
+
+    def request(self, url: str) -> Future:
+        future = Future()
+        with self._lock:
+            self._pending.append((url, future))
+            self._answered += 1
+            if self._timer is None and self.max_wait_seconds is not None:
+                self._timer = threading.Timer(self.max_wait_seconds, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+            ready = self._ready()
+        if ready:
+            self.flush()
+        return future
+
+    def decline(self):
+        with self._lock:
+            self._answered += 1
+            ready = self._ready()
+        if ready:
+            self.flush()
+
+    def _ready(self) -> bool:
+        return self._pending and (self._answered >= self.expected or len(self._pending) >= self.max_batch)
+
+    def flush(self):
+        """모인 요청을 지금 바로 처리합니다."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not pending:
+            return
+        self.batches += 1
+        try:
+            contents = self._extract([url for url, _ in pending])
+        except Exception as e:
+            print(f"[Error] Tavily batch extract failed: {e}")
+            contents = {}
+        for url, future in pending:
+            future.set_result(contents.get(url))
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -1,90 +1,88 @@
 import wmill
-import feedparser
 from datetime import datetime, timedelta, timezone
 import calendar # For converting struct_time to UTC timestamp
-import ssl
 import traceback
-from typing import Set, Dict, Any, Optional, List, TypedDict
+from typing import Set, Dict, Any, List, TypedDict
 import json
 
-from u.rapaellk.news_parsing_utils import get_content_from_link, process_text_with_gemini, send_long_message_to_telegram, send_to_telegram
+from u.rapaellk.news_parsing_utils import get_content_from_link, process_text_with_gemini, send_to_telegram, get_gemini_cache, TelegramDigestStream
+from u.rapaellk.seen_items import get_item_id, get_seen_item_store
+from u.rapaellk.feed_fetcher import fetch_feed, save_feed_validators
+from u.rapaellk.telegram_sender import get_send_queue
 
-def get_item_id(item) -> Optional[str]:
-    """
-    RSS 항목에서 고유 ID를 추출합니다.
-    RSS 표준에 따라 'guid'가 가장 신뢰할 수 있는 고유 식별자입니다.
-    'guid'가 없으면 'link' (URL)를, 그것도 없으면 'title'을 사용합니다.
-    """
-    if 'guid' in item:
-        return item.guid
-    if 'link' in item:
-        return item.link
-    if 'title' in item:
-        # 제목은 변경되거나 중복될 수 있어 신뢰성이 가장 낮습니다.
-        return item.title
-    return None  # 고유 ID로 사용할 만한 키가 없음
+GOOGLE_DEVELOPERS_SEEN_VARIABLE = "u/rapaellk/google_developer_yesterday_rss"
 
 def main():
     now_utc = datetime.now(timezone.utc)
     cutoff_time_utc = now_utc - timedelta(hours=24)
     rss_feed_dict = {
         "OpenAI News": "https://openai.com/news/rss.xml",
-        "Google Developers Blog": "https://developers.googleblog.com/rss/", # no pub date so need to store yesterday and compare with today
+        "Google Developers Blog": "https://developers.googleblog.com/rss/", # no pub date so rely on the seen-item store only
         "Google DeepMind Blog": "https://blog.google/technology/google-deepmind/rss/",
         "Google Research Blog": "https://research.google/blog/rss/",
         "Meta Engineering Blog": "https://engineering.fb.com/feed/",
         "Slack Engineering Blog": "https://slack.engineering/feed/",
         "Netflix Tech Blog": "https://netflixtechblog.com/feed/"
     }
+    seen_store = get_seen_item_store()
+    # 새 글이 없는 블로그는 블로그마다 메시지를 보내지 않고, 마지막에 한 줄로 모아서 알립니다.
+    no_update_blogs = []
     for blog_name, feedurl in rss_feed_dict.items():
         try:
-            if blog_name == "Netflix Tech Blog":
-                if hasattr(ssl, '_create_unverified_context'):
-                    ssl._create_default_https_context = ssl._create_unverified_context
-            feed = feedparser.parse(feedurl)
+            # Netflix Tech Blog은 인증서 검증에 실패하므로 검증을 건너뜁니다.
+            feed = fetch_feed(feedurl, verify=(blog_name != "Netflix Tech Blog"))
             message_title = f"**Recent updates on {blog_name}**\n"
-            message_to_send = ""
-            if blog_name == "Google Developers Blog":
-                yesterday_list = json.loads(wmill.get_variable("u/rapaellk/google_developer_yesterday_rss"))
-                yesterday_set = set(yesterday_list)
-                today_set = set()
-            for index, entry in enumerate(feed.entries):
-                if hasattr(entry, 'published_parsed'):
-                    pub_struct_time = entry.published_parsed
-                    pub_timestamp_utc = calendar.timegm(pub_struct_time)
-                    pub_datetime_utc = datetime.fromtimestamp(pub_timestamp_utc, timezone.utc)
-                    if pub_datetime_utc < cutoff_time_utc:
-                        break
-                elif blog_name == "Google Developers Blog":
-                    item_id = get_item_id(entry)
-                    today_set.add(item_id)
-                    if item_id in yesterday_set:
-                        continue
-                else:
-                    if index > 2:
-                        break
-                if blog_name == "Netflix Tech Blog":
-                    description = entry.content[0]['value']
-                elif blog_name == "Google Research Blog" or "Google DeepMind Blog":
-                    description = get_content_from_link(entry.link)
-                else:
-                    description = entry.description
-                if description:
-                    ai_processed_descriptions = process_text_with_gemini(description)
-                    if not ai_processed_descriptions:
-                        raise RuntimeError("Failed to retrieve ai summary")
-                    message_to_send += f"* [{entry.title}]({entry.link})\n{ai_processed_descriptions['english']}\n{ai_processed_descriptions['korean']}\n\n"
-                else:
-                    message_to_send += f"* [{entry.title}]({entry.link})\nCannot find its content...\n\n"
-            if not message_to_send:
-                message_to_send += "no update today"
-            print(message_to_send)
-            send_long_message_to_telegram(message_title + message_to_send)
-            if blog_name == "Google Developers Blog":
-                today_list = list(today_set)
-                wmill.set_variable("u/rapaellk/google_developer_yesterday_rss", json.dumps(today_list))
+            stream = TelegramDigestStream(message_title)
+            if feed.not_modified:
+                no_update_blogs.append(blog_name)
+                continue
+            if blog_name == "Google Developers Blog" and not seen_store.has_source(blog_name):
+                # 캐시 파일이 없으면(첫 실행, 워커 변경 등) Windmill 변수에 저장된 목록에서 다시 채웁니다.
+                seen_store.mark_seen(blog_name, json.loads(wmill.get_variable(GOOGLE_DEVELOPERS_SEEN_VARIABLE)))
+            try:
+                with stream:
+                    for index, entry in enumerate(feed.entries):
+                        item_id = get_item_id(entry)
+                        if seen_store.is_seen(blog_name, item_id):
+                            continue
+                        if hasattr(entry, 'published_parsed'):
+                            pub_struct_time = entry.published_parsed
+                            pub_timestamp_utc = calendar.timegm(pub_struct_time)
+                            pub_datetime_utc = datetime.fromtimestamp(pub_timestamp_utc, timezone.utc)
+                            if pub_datetime_utc < cutoff_time_utc:
+                                break
+                        elif blog_name != "Google Developers Blog" and index > 2:
+                            break
+                        if blog_name == "Netflix Tech Blog":
+                            description = entry.content[0]['value']
+                        elif blog_name == "Google Research Blog" or "Google DeepMind Blog":
+                            description = get_content_from_link(entry.link)
+                        else:
+                            description = entry.description
+                        if description:
+                            ai_processed_descriptions = process_text_with_gemini(description)
+                            if not ai_processed_descriptions:
+                                raise RuntimeError("Failed to retrieve ai summary")
+                            stream.add(f"* [{entry.title}]({entry.link})\n{ai_processed_descriptions['english']}\n{ai_processed_descriptions['korean']}\n\n", item_id=item_id)
+                        else:
+                            stream.add(f"* [{entry.title}]({entry.link})\nCannot find its content...\n\n", item_id=item_id)
+            finally:
+                # 실패하더라도 이미 전송된 항목은 다음 실행에서 다시 보내지 않습니다.
+                seen_store.mark_seen(blog_name, stream.delivered_ids)
+                if blog_name == "Google Developers Blog":
+                    # 발행일이 없는 피드라 본 항목 목록이 유일한 기준이므로, 캐시 파일(/tmp)이 사라져도
+                    # 다시 보내지 않도록 현재 피드에서 본 항목 ID를 Windmill 변수에도 기록합니다.
+                    seen_ids = [item_id for item_id in map(get_item_id, feed.entries) if seen_store.is_seen(blog_name, item_id)]
+                    wmill.set_variable(GOOGLE_DEVELOPERS_SEEN_VARIABLE, json.dumps(seen_ids))
+            if stream.item_count == 0:
+                no_update_blogs.append(blog_name)
+            save_feed_validators(feed)
         except Exception as e:
             print(traceback.format_exc())
             message = f"""Error on handling blog {blog_name}: `{e}`"""
             send_to_telegram(message)
+    if no_update_blogs:
+        send_to_telegram(f"No updates today: {', '.join(no_update_blogs)}")
+    print(f"Gemini cache stats: {get_gemini_cache().stats()}")
+    print(f"Telegram send queue: {get_send_queue().metrics()}")
     return "done"
\ No newline at end of file
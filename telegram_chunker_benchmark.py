@@ -0,0 +1,70 @@
+import time
+import telegramify_markdown
+
+from u.rapaellk.news_parsing_utils import split_markdown_for_telegram, TELEGRAM_MAX_MESSAGE_LENGTH
+
+def _build_digest(size_bytes: int) -> str:
+    """실제 다이제스트와 비슷한 형태(링크, 굵게, 이스케이프 대상 문자, 한글)의 테스트 문자열을 만듭니다."""
+    parts = ["**Top News on Hacker News:**\n"]
+    total = len(parts[0])
+    index = 0
+    while total < size_bytes:
+        item = (
+            f"* [Show HN: project_{index} (v1.{index % 10}) - a *fast* thing](https://example.com/items/{index}?ref=hn_top)\n"
+            f"The author explains why it's 3.5x faster than the previous version! See **benchmarks** for details.\n"
+            f"저자는 이 프로젝트가 이전 버전보다 3.5배 빠른 이유를 설명합니다. 자세한 내용은 벤치마크를 참고하세요.\n\n"
+        )
+        parts.append(item)
+        total += len(item)
+        index += 1
+    return "".join(parts)
+
+def _legacy_split(long_string: str, max_length: int = TELEGRAM_MAX_MESSAGE_LENGTH) -> list:
+    """비교용: 이전 방식(문자열 += 누적, 이스케이프 전 글자 수 기준)"""
+    chunks = []
+    current_chunk = ""
+    for line in long_string.splitlines(keepends=True):
+        if len(line) >= max_length:
+            if current_chunk:
+                chunks.append(current_chunk)
+            chunks.append(line)
+            current_chunk = ""
+            continue
+        if len(current_chunk) + len(line) >= max_length:
+            if current_chunk:
+                chunks.append(current_chunk)
+            current_chunk = line
+        else:
+            current_chunk += line
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
+
+def _measure(split_func, text: str, repeat: int):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        chunks = split_func(text)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    escaped_lengths = [len(telegramify_markdown.markdownify(chunk)) for chunk in chunks]
+    return {
+        "seconds": round(best, 4),
+        "chunks": len(chunks),
+        "max_escaped_length": max(escaped_lengths),
+        "chunks_over_limit": sum(1 for length in escaped_lengths if length > TELEGRAM_MAX_MESSAGE_LENGTH),
+    }
+
+def main(size_bytes: int = 1_000_000, repeat: int = 3):
+    """
+    size_bytes 크기의 다이제스트를 만들어 청크 분할 시간을 측정합니다.
+    이전 방식은 이스케이프 후 4096자를 넘는 청크를 만들 수 있으므로 chunks_over_limit도 함께 비교합니다.
+    """
+    text = _build_digest(size_bytes)
+    result = {
+        "input_chars": len(text),
+        "legacy": _measure(_legacy_split, text, repeat),
+        "markdown_aware": _measure(split_markdown_for_telegram, text, repeat),
+    }
+    print(result)
+    return result
@@ -0,0 +1,182 @@
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+from u.rapaellk.http_client import get_session
+from u.rapaellk.rate_limiter import TokenBucket, backoff_delay
+
+TELEGRAM_API_URL = "https://api.telegram.org/bot{token}/{method}"
+
+# 텔레그램 Bot API 권장 한도: 전체 초당 30건, 같은 채팅에는 초당 1건 정도
+GLOBAL_MESSAGES_PER_SECOND = 30
+PER_CHAT_MESSAGES_PER_SECOND = 1
+PER_CHAT_BURST = 3
+# 채팅별 워커 스레드는 이 시간 동안 보낼 메시지가 없으면 종료됩니다. (다음 메시지가 오면 다시 생성)
+CHAT_WORKER_IDLE_SECONDS = 60
+
+class TelegramAPIError(Exception):
+    """재시도 후에도 텔레그램 API가 ok가 아닌 응답을 준 경우. result에 응답(JSON)이 들어 있습니다."""
+
+    def __init__(self, result: dict):
+        super().__init__(f"Telegram API error {result.get('error_code')}: {result.get('description')}")
+        self.result = result
+
+class TelegramSendQueue:
+    """
+    텔레그램 Bot API 요청을 보내는 프로세스 단위 전송 큐입니다.
+
+    - 채팅마다 대기열과 워커 스레드를 따로 두고 FIFO 순서로 보내므로, 같은 채팅에서는 먼저 넣은 메시지가 먼저 도착합니다.
+    - 전역 토큰 버킷과 채팅별 토큰 버킷으로 요청 간격을 조절합니다.
+    - 429 응답을 받으면 parameters.retry_after 만큼 해당 채팅을 멈췄다가 같은 메시지를 다시 보냅니다.
+      (그 채팅의 뒤에 있는 메시지는 먼저 보내지 않으므로 순서가 유지되고, 다른 채팅은 계속 전송됩니다.)
+    - 네트워크 오류와 5xx는 지터가 포함된 지수 백오프로 재시도합니다.
+    - 재시도 후에도 실패하면 Future에 예외(TelegramAPIError 등)가 설정됩니다.
+    - metrics()로 큐 길이, 전송/재시도/실패 횟수, 전송 지연 시간을 확인할 수 있습니다.
+    """
+
+    def __init__(self, global_rate: float = GLOBAL_MESSAGES_PER_SECOND, per_chat_rate: float = PER_CHAT_MESSAGES_PER_SECOND,
+                 per_chat_burst: int = PER_CHAT_BURST, max_retries: int = 5):
+        self.per_chat_rate = per_chat_rate
+        self.per_chat_burst = per_chat_burst
+        self.max_retries = max_retries
+        self._global_bucket = TokenBucket(rate=global_rate, capacity=global_rate)
+        self._chat_buckets = {}
+        self._chat_queues = {}  # chat_id -> queue.Queue (워커 스레드가 살아 있는 채팅만)
+        self._workers_lock = threading.Lock()
+        self._unfinished = 0
+        self._all_done = threading.Condition()
+        self._metrics_lock = threading.Lock()
+        self._sent = 0
+        self._failed = 0
+        self._retried = 0
+        self._total_latency = 0.0
+        self._max_latency = 0.0
+
+    def submit(self, token: str, payload: dict, method: str = "sendMessage") -> Future:
+        """
+        요청을 해당 채팅의 대기열에 넣고 Future를 반환합니다.
+        Future의 결과는 텔레그램 API의 JSON 응답({"ok": true, ...})입니다.
+        재시도 후에도 실패하면 결과 대신 예외(TelegramAPIError 또는 네트워크 예외)가 설정됩니다.
+        """
+        future = Future()
+        chat_id = payload.get("chat_id")
+        with self._all_done:
+            self._unfinished += 1
+        with self._workers_lock:
+            chat_queue = self._chat_queues.get(chat_id)
+            if chat_queue is None:
+                chat_queue = self._chat_queues[chat_id] = queue.Queue()
+                threading.Thread(target=self._run, args=(chat_id, chat_queue),
+                                 name=f"telegram-send-queue-{chat_id}", daemon=True).start()
+            chat_queue.put((token, method, payload, future, time.monotonic()))
+        return future
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        with self._workers_lock:
+            if chat_id not in self._chat_buckets:
+                self._chat_buckets[chat_id] = TokenBucket(rate=self.per_chat_rate, capacity=self.per_chat_burst)
+            return self._chat_buckets[chat_id]
+
+    def _run(self, chat_id, chat_queue: queue.Queue):
+        while True:
+            try:
+                item = chat_queue.get(timeout=CHAT_WORKER_IDLE_SECONDS)
+            except queue.Empty:
+                with self._workers_lock:
+                    # submit()도 같은 잠금 안에서 넣으므로, 비어 있음을 확인한 뒤에는 새 메시지가 들어올 수 없습니다.
+                    if chat_queue.empty():
+                        del self._chat_queues[chat_id]
+                        return
+                continue
+            token, method, payload, future, enqueued_at = item
+            try:
+                future.set_result(self._send_with_retry(token, method, payload))
+            except Exception as e:
+                with self._metrics_lock:
+                    self._failed += 1
+                future.set_exception(e)
+            else:
+                latency = time.monotonic() - enqueued_at
+                with self._metrics_lock:
+                    self._total_latency += latency
+                    self._max_latency = max(self._max_latency, latency)
+            finally:
+                with self._all_done:
+                    self._unfinished -= 1
+                    self._all_done.notify_all()
+
+    def _send_with_retry(self, token: str, method: str, payload: dict) -> dict:
+        chat_bucket = self._chat_bucket(payload.get("chat_id"))
+        url = TELEGRAM_API_URL.format(token=token, method=method)
+        for attempt in range(self.max_retries + 1):
+            chat_bucket.acquire()
+            self._global_bucket.acquire()
+            try:
+                response = get_session().post(url, data=payload)
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = backoff_delay(attempt)
+                print(f"[Warning] Telegram request failed: {e}. Retrying in {delay:.1f} seconds...")
+                time.sleep(delay)
+                self._count_retry()
+                continue
+
+            try:
+                result = response.json()
+            except ValueError:
+                result = {"ok": False, "error_code": response.status_code, "description": response.text[:200]}
+            if not isinstance(result, dict):
+                result = {"ok": False, "error_code": response.status_code, "description": str(result)[:200]}
+            if response.status_code == 429 and attempt < self.max_retries:
+                retry_after = result.get("parameters", {}).get("retry_after", 1)
+                print(f"[Warning] Telegram rate limit. Retrying after {retry_after} seconds...")
+                chat_bucket.pause(retry_after)
+                self._count_retry()
+                continue
+            if response.status_code >= 500 and attempt < self.max_retries:
+                time.sleep(backoff_delay(attempt))
+                self._count_retry()
+                continue
+
+            if not result.get("ok"):
+                # 실패 횟수는 _run()에서 예외를 받아 셉니다.
+                print(f"[Error] Telegram API error: {result}")
+                raise TelegramAPIError(result)
+            with self._metrics_lock:
+                self._sent += 1
+            return result
+
+    def _count_retry(self):
+        with self._metrics_lock:
+            self._retried += 1
+
+    def wait_until_empty(self):
+        """큐에 들어간 모든 요청이 처리될 때까지 기다립니다."""
+        with self._all_done:
+            self._all_done.wait_for(lambda: self._unfinished == 0)
+
+    def metrics(self) -> dict:
+        with self._metrics_lock:
+            completed = self._sent + self._failed
+            return {
+                "queue_depth": sum(q.qsize() for q in list(self._chat_queues.values())),
+                "sent": self._sent,
+                "failed": self._failed,
+                "retried": self._retried,
+                "avg_latency_seconds": (self._total_latency / completed) if completed else 0.0,
+                "max_latency_seconds": self._max_latency,
+            }
+
+_send_queue = None
+_send_queue_lock = threading.Lock()
+
+def get_send_queue() -> TelegramSendQueue:
+    """프로세스 전체에서 공유하는 TelegramSendQueue를 반환합니다. (처음 사용할 때 워커 시작)"""
+    global _send_queue
+    if _send_queue is None:
+        with _send_queue_lock:
+            if _send_queue is None:
+                _send_queue = TelegramSendQueue()
+    return _send_queue
@@ -1,27 +1,46 @@
 # import wmill
-import feedparser
-import requests
 import traceback
 
-from u.rapaellk.news_parsing_utils import get_content_from_link, process_text_with_gemini, send_long_message_to_telegram, send_to_telegram, remove_html_tags_bs4
+from u.rapaellk.news_parsing_utils import get_content_from_link, needs_tavily_fallback, process_text_with_gemini, send_to_telegram, remove_html_tags_bs4, iter_staged_pipeline, get_gemini_cache, TelegramDigestStream
+from u.rapaellk.seen_items import get_item_id, get_seen_item_store
+from u.rapaellk.feed_fetcher import fetch_feed, save_feed_validators
+from u.rapaellk.telegram_sender import get_send_queue
+from u.rapaellk.http_client import get_session
+from u.rapaellk.extraction_cache import get_extraction_cache
+from u.rapaellk.tavily_extract import DeferredTavilyFallback
 
 def techmeme():
     try:
         message_title = "**Top News on Techmeme:**\n"
         rss_url = 'https://www.techmeme.com/feed.xml'
-        feed = feedparser.parse(rss_url)
-        message_to_send = ""
-        for entry in feed.entries:
-            description = remove_html_tags_bs4(entry.description)
-            if description:
-                ai_processed_descriptions = process_text_with_gemini(remove_html_tags_bs4(description))
-                if not ai_processed_descriptions:
-                    raise RuntimeError("Failed to retrieve ai summary")
-                message_to_send += f"* [{entry.title}]({entry.link})\n{ai_processed_descriptions['english']}\n{ai_processed_descriptions['korean']}\n\n"
-            else:
-                message_to_send += f"* [{entry.title}]({entry.link})\nCannot find its content...\n\n"
-        print(message_to_send)
-        send_long_message_to_telegram(message_title + message_to_send)
+        feed = fetch_feed(rss_url)
+        if feed.not_modified:
+            print("Techmeme feed not modified")
+            return
+        seen_store = get_seen_item_store()
+        entries = seen_store.filter_unseen("Techmeme", feed.entries, key=get_item_id)
+        if not entries:
+            print("No new items on Techmeme")
+            save_feed_validators(feed)
+            return
+        stream = TelegramDigestStream(message_title)
+        try:
+            with stream:
+                for entry in entries:
+                    description = remove_html_tags_bs4(entry.description)
+                    if description:
+                        ai_processed_descriptions = process_text_with_gemini(remove_html_tags_bs4(description))
+                        if not ai_processed_descriptions:
+                            raise RuntimeError("Failed to retrieve ai summary")
+                        stream.add(f"* [{entry.title}]({entry.link})\n{ai_processed_descriptions['english']}\n{ai_processed_descriptions['korean']}\n\n", item_id=get_item_id(entry))
+                    else:
+                        stream.add(f"* [{entry.title}]({entry.link})\nCannot find its content...\n\n", item_id=get_item_id(entry))
+        finally:
+            # 실패하더라도 이미 전송된 항목은 다음 실행에서 다시 보내지 않습니다.
+            seen_store.mark_seen("Techmeme", stream.delivered_ids)
+        save_feed_validators(feed)
+        print(f"Gemini cache stats: {get_gemini_cache().stats()}")
+        print(f"Telegram send queue: {get_send_queue().metrics()}")
     except Exception as e:
         print(traceback.format_exc())
         message = f"""Error on handling techmeme: `{e}`"""
@@ -30,30 +49,101 @@ def techmeme():
 HN_TOP_STORIES_URL = "https://hacker-news.firebaseio.com/v0/topstories.json"
 HN_ITEM_URL = "https://hacker-news.firebaseio.com/v0/item/{id}.json"
 
-def hacker_news(limit=10):
+def _fetch_hn_item(item_id):
+    """[Stage 1] HN 아이템 상세 정보를 가져옵니다. 링크가 없는 아이템(Ask HN 등)은 건너뜁니다."""
+    item_details = get_session().get(HN_ITEM_URL.format(id=item_id), timeout=10).json()
+    if item_details and 'url' in item_details:
+        return item_details
+    return None
+
+def _extract_hn_item(item_details, tavily_fallback):
+    """[Stage 2] 아이템 링크에서 본문을 추출합니다. 본문이 짧으면 Tavily 요청을 모아두고 Future를 함께 반환합니다."""
+    link = item_details.get('url')
+    content = get_content_from_link(link, tavily_fallback=False)
+    if needs_tavily_fallback(content):
+        return item_details.get('title'), link, content, tavily_fallback.request(link)
+    tavily_fallback.decline()
+    return item_details.get('title'), link, content, None
+
+def _resolve_hn_fallback(extracted):
+    """[Stage 3] 모아서 보낸 Tavily 요청의 결과를 기다려 본문을 채웁니다."""
+    title, link, content, tavily_future = extracted
+    if tavily_future is not None:
+        tavily_content = tavily_future.result()
+        if tavily_content:
+            get_extraction_cache().store(link, tavily_content, source="tavily")
+            content = tavily_content
+    return title, link, content
+
+def _summarize_hn_item(extracted):
+    """[Stage 4] 본문을 요약/번역하여 메시지 항목을 만듭니다."""
+    title, link, description = extracted
+    if description:
+        ai_processed_descriptions = process_text_with_gemini(remove_html_tags_bs4(description))
+        if not ai_processed_descriptions:
+            raise RuntimeError("Failed to retrieve ai summary")
+        return f"* [{title}]({link})\n{ai_processed_descriptions['english']}\n{ai_processed_descriptions['korean']}\n\n"
+    return f"* [{title}]({link})\nCannot find its content...\n\n"
+
+def hacker_news(limit=10, fetch_workers=8, extract_workers=4, summarize_workers=2):
     """
     Hacker News의 현재 Top 스토리를 가져옵니다.
+
+    아이템 조회 -> 본문 추출 -> Tavily 보완 -> 요약의 4단계 파이프라인으로 처리하며,
+    단계별로 크기가 제한된 스레드 풀에서 여러 아이템을 동시에 처리합니다.
+    trafilatura로 본문을 충분히 얻지 못한 아이템들은 모아서 한 번의 Tavily 호출로 보완합니다.
+    메시지의 순서는 top_ids의 순서를 그대로 유지하며, 앞쪽 항목이 완성되는 대로 바로 전송합니다.
+    이전 실행에서 이미 전송한 아이템은 조회하기 전에 건너뜁니다.
     """
     print("Hacker News Top 스토리를 가져오는 중...")
     try:
         message_title = "**Top News on Hacker News:**\n"
-        message_to_send = ""
-        top_ids = requests.get(HN_TOP_STORIES_URL).json()
-        for item_id in top_ids[:limit]:
-            item_details = requests.get(HN_ITEM_URL.format(id=item_id)).json()
-            if item_details and 'url' in item_details:
-                title = item_details.get('title')
-                link = item_details.get('url')
-                description = get_content_from_link(link)
-                if description:
-                    ai_processed_descriptions = process_text_with_gemini(remove_html_tags_bs4(description))
-                    if not ai_processed_descriptions:
-                        raise RuntimeError("Failed to retrieve ai summary")
-                    message_to_send += f"* [{title}]({link})\n{ai_processed_descriptions['english']}\n{ai_processed_descriptions['korean']}\n\n"
-                else:
-                    message_to_send += f"* [{title}]({link})\nCannot find its content...\n\n"
-        print(message_to_send)       
-        send_long_message_to_telegram(message_title + message_to_send)
+        top_ids = get_session().get(HN_TOP_STORIES_URL, timeout=10).json()
+        seen_store = get_seen_item_store()
+        new_ids = seen_store.filter_unseen("Hacker News", top_ids[:limit])
+        if not new_ids:
+            print("No new items on Hacker News")
+            return
+        tavily_fallback = DeferredTavilyFallback(expected=len(new_ids))
+
+        def fetch(item_id):
+            try:
+                item_details = _fetch_hn_item(item_id)
+            except Exception:
+                tavily_fallback.decline()
+                raise
+            if item_details is None:
+                tavily_fallback.decline()
+            return item_details
+
+        def extract(item_details):
+            try:
+                return _extract_hn_item(item_details, tavily_fallback)
+            except Exception:
+                tavily_fallback.decline()
+                raise
+
+        results = iter_staged_pipeline(
+            new_ids,
+            stages=[fetch, extract, _resolve_hn_fallback, _summarize_hn_item],
+            # Tavily 결과를 기다리는 단계는 CPU를 쓰지 않으므로 모든 아이템이 동시에 기다릴 수 있게 합니다.
+            workers=[fetch_workers, extract_workers, len(new_ids), summarize_workers],
+        )
+        stream = TelegramDigestStream(message_title)
+        skipped_ids = []
+        try:
+            with stream:
+                for item_id, entry_message in zip(new_ids, results):
+                    if entry_message:
+                        stream.add(entry_message, item_id=item_id)
+                    else:
+                        skipped_ids.append(item_id)  # 링크가 없는 아이템
+        finally:
+            seen_store.mark_seen("Hacker News", stream.delivered_ids + skipped_ids)
+        print(f"Gemini cache stats: {get_gemini_cache().stats()}")
+        print(f"Extraction cache stats: {get_extraction_cache().stats()}")
+        print(f"Tavily fallback batches: {tavily_fallback.batches}")
+        print(f"Telegram send queue: {get_send_queue().metrics()}")
     except Exception as e:
         print(traceback.format_exc())
         message = f"Failed to get news from Hacker News: `{e}`"
@@ -63,14 +153,26 @@ def geeknews():
     try:
         message_title = "**Top News on GeekNews:**\n"
         rss_url = 'https://feeds.feedburner.com/geeknews-feed'
-        feed = feedparser.parse(rss_url)
-        print(feed)
-        message_to_send = ""
-        for entry in feed.entries:
-            description = remove_html_tags_bs4(entry.content[0]['value'])
-            message_to_send += f"* [{entry.title}]({entry.link})\n{description}\n\n" # No need to translate as it's Korean
-        print(message_to_send)
-        send_long_message_to_telegram(message_title + message_to_send)
+        feed = fetch_feed(rss_url)
+        if feed.not_modified:
+            print("GeekNews feed not modified")
+            return
+        print(feed.feed)
+        seen_store = get_seen_item_store()
+        entries = seen_store.filter_unseen("GeekNews", feed.entries, key=get_item_id)
+        if not entries:
+            print("No new items on GeekNews")
+            save_feed_validators(feed)
+            return
+        stream = TelegramDigestStream(message_title)
+        try:
+            with stream:
+                for entry in entries:
+                    description = remove_html_tags_bs4(entry.content[0]['value'])
+                    stream.add(f"* [{entry.title}]({entry.link})\n{description}\n\n", item_id=get_item_id(entry)) # No need to translate as it's Korean
+        finally:
+            seen_store.mark_seen("GeekNews", stream.delivered_ids)
+        save_feed_validators(feed)
     except Exception as e:
         print(traceback.format_exc())
         message = f"Failed to get news from GeekNews: {e}"
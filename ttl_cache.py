@@ -0,0 +1,103 @@
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+class TTLCache:
+    """
+    스레드 안전한 메모리 TTL 캐시입니다.
+
+    - 항목마다 만료 시각을 가지며, 기본 ttl_seconds 대신 항목별 ttl을 지정할 수 있습니다.
+    - 항목 수가 max_entries를 넘으면 가장 오래 사용되지 않은 항목부터 제거합니다. (LRU)
+    - get_or_load()는 같은 키를 동시에 요청하면 loader를 한 번만 실행하고,
+      나머지 호출자는 그 결과를 함께 기다립니다. (single-flight)
+      loader에서 발생한 예외는 캐시하지 않고 기다리던 모든 호출자에게 전달합니다.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (value, 만료 시각)
+        self._inflight = {}            # key -> Future
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _get_locked(self, key, now: float):
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        value, expires_at = entry
+        if now >= expires_at:
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def get(self, key, default=None):
+        with self._lock:
+            found, value = self._get_locked(key, time.monotonic())
+        return value if found else default
+
+    def set(self, key, value, ttl: float = None):
+        with self._lock:
+            self._set_locked(key, value, ttl)
+
+    def replace(self, key, value) -> bool:
+        """만료 시각은 그대로 두고 key의 값만 바꿉니다. 항목이 없거나 만료되었으면 False를 반환합니다."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() >= entry[1]:
+                return False
+            self._entries[key] = (value, entry[1])
+            return True
+
+    def _set_locked(self, key, value, ttl: float = None):
+        self._entries[key] = (value, time.monotonic() + (self.ttl_seconds if ttl is None else ttl))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_or_load(self, key, loader, ttl: float = None):
+        """캐시된 값을 반환합니다. 없으면 loader()를 한 번만 실행하여 저장하고 반환합니다."""
+        with self._lock:
+            found, value = self._get_locked(key, time.monotonic())
+            if found:
+                self.hits += 1
+                return value
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                owner = False
+            else:
+                self.misses += 1
+                future = self._inflight[key] = Future()
+                owner = True
+        if not owner:
+            return future.result()
+
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._set_locked(key, value, ttl)
+            del self._inflight[key]
+        future.set_result(value)
+        return value
+
+    def invalidate(self, key=None):
+        """key 항목을 지웁니다. key가 None이면 모두 지웁니다."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced, "entries": len(self._entries)}
@@ -1,4 +1,4 @@
-import wmill
+import asyncio
 import traceback
 from datetime import time
 import pytz
@@ -14,11 +14,14 @@ from telegram.ext import (
 
 # [중요] 공통 모듈에서 cancel 함수 import
 from f.telegram_life_bot.common_handlers import cancel
+from u.rapaellk.wmill_config import lazy_variable
 
 # [중요] 기존 날씨 스크립트 import
 from f.telegram_life_bot.get_weather import (
-    get_home_weather, get_office_weather, get_parent_home_weather, 
-    get_weather_message_from_location_name, get_weather_message
+    get_important_location, get_location_from_name,
+    get_weather_message, get_polished_weather_message,
+    important_locations, get_weather_batch_message, get_polished_weather_batch_message,
+    prewarm_weather, polish_prewarmed_weather, coordinate_bucket, CURRENT_LOCATION_LABEL
 )
 
 # --- 날씨 관련 상수 ---
@@ -26,10 +29,58 @@ CB_MORNING_DYNAMIC_CURRENT = "morning_dynamic_current"
 CB_MORNING_DYNAMIC_ALL = "morning_dynamic_all"
 GET_LOCATION = 1
 AWAIT_MORNING_LOCATION = 2
-MY_CHAT_ID = wmill.get_variable("u/rapaellk/telegram_chat_id")
+MY_CHAT_ID = lazy_variable("u/rapaellk/telegram_chat_id")
+# 아침 작업이 미리 날씨를 가져올 최근 조회 위치 (bot_data에 최근 것부터 보관)
+RECENT_LOCATIONS_KEY = "recent_weather_locations"
+RECENT_LOCATIONS_LIMIT = 3
 
 # --- 날씨 헬퍼 함수 ---
-async def _process_and_reply_weather_info(update: Update, args, reply_markup=None):
+def _remember_location(context: ContextTypes.DEFAULT_TYPE, lat: float, lon: float):
+    """조회한 좌표를 최근 위치 목록의 맨 앞에 기록합니다. (같은 격자는 하나만 유지)"""
+    recent = context.bot_data.setdefault(RECENT_LOCATIONS_KEY, [])
+    bucket = coordinate_bucket(lat, lon)
+    recent[:] = [(lat, lon)] + [loc for loc in recent if coordinate_bucket(*loc) != bucket][:RECENT_LOCATIONS_LIMIT - 1]
+
+async def _polish_weather_reply(message: telegram.Message, original_text: str, lat: float, lon: float, prewarmed: bool = False):
+    """
+    규칙 기반으로 먼저 보낸 날씨 메시지를 Gemini로 다듬은 메시지로 수정합니다. (followup 모드)
+    Gemini 호출은 스레드에서 실행하며, 실패하면 처음 보낸 메시지를 그대로 둡니다.
+    """
+    try:
+        polished = await asyncio.to_thread(get_polished_weather_message, lat, lon, prewarmed)
+        if polished and polished != original_text:
+            await message.edit_text(polished, parse_mode='MarkdownV2')
+    except Exception as e:
+        print(f"[Warning] Failed to polish weather message: {e!r}")
+
+async def _reply_weather(update: Update, context: ContextTypes.DEFAULT_TYPE, lat: float, lon: float, reply_markup=None, prewarmed: bool = False):
+    """
+    좌표의 날씨를 바로 응답하고, 다듬은 메시지로 수정하는 작업을 백그라운드로 예약합니다.
+    prewarmed는 아침 버튼 응답에서만 True로, 아침 작업이 미리 만든 보고서를 사용합니다.
+    """
+    _remember_location(context, lat, lon)
+    msg = await asyncio.to_thread(get_weather_message, lat, lon, prewarmed)
+    sent = await update.message.reply_text(msg, parse_mode='MarkdownV2', reply_markup=reply_markup)
+    context.application.create_task(_polish_weather_reply(sent, msg, lat, lon, prewarmed))
+
+async def _polish_weather_batch_reply(message: telegram.Message, original_text: str, locations, prewarmed: bool = False):
+    """_polish_weather_reply()의 여러 장소 버전. 모든 장소를 한 번의 Gemini 호출로 다듬습니다."""
+    try:
+        polished = await asyncio.to_thread(get_polished_weather_batch_message, locations, prewarmed)
+        if polished and polished != original_text:
+            await message.edit_text(polished, parse_mode='MarkdownV2')
+    except Exception as e:
+        print(f"[Warning] Failed to polish weather message: {e!r}")
+
+async def _reply_weather_batch(update: Update, context: ContextTypes.DEFAULT_TYPE, locations, reply_markup=None, prewarmed: bool = False):
+    """여러 장소(표시 이름, 위도, 경도)의 날씨를 한 메시지로 응답합니다. (장소별 조회는 동시에 실행)"""
+    for _, lat, lon in locations:
+        _remember_location(context, lat, lon)
+    msg = await asyncio.to_thread(get_weather_batch_message, locations, prewarmed)
+    sent = await update.message.reply_text(msg, parse_mode='MarkdownV2', reply_markup=reply_markup)
+    context.application.create_task(_polish_weather_batch_reply(sent, msg, locations, prewarmed))
+
+async def _process_and_reply_weather_info(update: Update, context: ContextTypes.DEFAULT_TYPE, args, reply_markup=None):
     """날씨 정보를 처리하고 사용자에게 응답하는 헬퍼 함수"""
     msg = ""
     if not args:
@@ -37,29 +88,31 @@ async def _process_and_reply_weather_info(update: Update, args, reply_markup=Non
     else:
         try:
             location_name = " ".join(args)
-            msg = get_weather_message_from_location_name(location_name)
+            lat, lon = await asyncio.to_thread(get_location_from_name, location_name)
+            await _reply_weather(update, context, lat, lon, reply_markup=reply_markup)
+            return
         except Exception as e:
             print(traceback.format_exc())
             msg = f"Error on running command: {e}"
     
     await update.message.reply_text(
         msg, 
-        parse_mode='MarkdownV2',
         reply_markup=reply_markup
     )
 
 # --- 날씨 명령어 핸들러 ---
 async def weather_home(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    msg = get_home_weather()
-    await update.message.reply_text(msg, parse_mode='MarkdownV2')
+    await _reply_weather(update, context, *await asyncio.to_thread(get_important_location, "home"))
 
 async def weather_office(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    msg = get_office_weather()
-    await update.message.reply_text(msg, parse_mode='MarkdownV2')
+    await _reply_weather(update, context, *await asyncio.to_thread(get_important_location, "office"))
 
 async def weather_parent_home(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    msg = get_parent_home_weather()
-    await update.message.reply_text(msg, parse_mode='MarkdownV2')
+    await _reply_weather(update, context, *await asyncio.to_thread(get_important_location, "parent_home"))
+
+async def weather_all(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/weather_all: 등록된 모든 장소(집, 회사, 부모님 댁)의 날씨를 한 메시지로 보여줍니다."""
+    await _reply_weather_batch(update, context, await asyncio.to_thread(important_locations))
 
 
 # --- 날씨 대화 핸들러 (1) - /weather_location ---
@@ -67,7 +120,7 @@ async def weather_location(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """/weather_location 명령어의 진입점."""
     args = context.args
     if args:
-        await _process_and_reply_weather_info(update, args, reply_markup=None)
+        await _process_and_reply_weather_info(update, context, args, reply_markup=None)
         return ConversationHandler.END
     else:
         location_button = KeyboardButton(text="📍 현재 위치로 날씨 보기", request_location=True)
@@ -87,7 +140,7 @@ async def weather_location(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def receive_location_name(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """GET_LOCATION 상태에서 사용자의 '텍스트' 입력을 받아 처리합니다."""
     args = update.message.text.split()
-    await _process_and_reply_weather_info(update, args, reply_markup=ReplyKeyboardRemove())
+    await _process_and_reply_weather_info(update, context, args, reply_markup=ReplyKeyboardRemove())
     return ConversationHandler.END
 
 async def receive_location_coordinates(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -96,12 +149,7 @@ async def receive_location_coordinates(update: Update, context: ContextTypes.DEF
         user_location = update.message.location
         latitude = user_location.latitude
         longitude = user_location.longitude
-        msg = get_weather_message(latitude, longitude)
-        await update.message.reply_text(
-            msg,
-            parse_mode='MarkdownV2',
-            reply_markup=ReplyKeyboardRemove()
-        )
+        await _reply_weather(update, context, latitude, longitude, reply_markup=ReplyKeyboardRemove())
     except Exception as e:
         print(traceback.format_exc())
         msg = f"Error on processing location: {e}"
@@ -159,17 +207,16 @@ async def receive_morning_location(update: Update, context: ContextTypes.DEFAULT
     choice = context.user_data.get('morning_weather_choice')
     
     try:
-        # 1. '현재 위치' 날씨는 항상 전송
-        print(f"Calling get_weather_message({lat}, {lon})")
-        msg_current = get_weather_message(lat, lon)
-        # 키보드를 제거하며 첫 번째 메시지 전송
-        await update.message.reply_text(msg_current, parse_mode='MarkdownV2', reply_markup=ReplyKeyboardRemove())
-
-        # 2. '회사' 날씨 추가 전송
+        # '현재 위치' 날씨는 항상 전송하고, '회사'를 선택했으면 같은 메시지에 함께 보여줌
         if choice == CB_MORNING_DYNAMIC_ALL:
-            print("Calling get_office_weather()")
-            msg_office = get_office_weather()
-            await update.message.reply_text(msg_office, parse_mode='MarkdownV2')
+            # '현재 위치'와 '회사' 날씨를 동시에 조회하여 한 메시지로 전송
+            print(f"Calling get_weather_batch_message(current=({lat}, {lon}), office)")
+            locations = [(CURRENT_LOCATION_LABEL, lat, lon)] + await asyncio.to_thread(important_locations, "office")
+            await _reply_weather_batch(update, context, locations, reply_markup=ReplyKeyboardRemove(), prewarmed=True)
+        else:
+            # '현재 위치' 날씨만 전송 (키보드 제거)
+            print(f"Calling get_weather_message({lat}, {lon})")
+            await _reply_weather(update, context, lat, lon, reply_markup=ReplyKeyboardRemove(), prewarmed=True)
         
     except Exception as e:
          print(traceback.format_exc())
@@ -184,11 +231,42 @@ async def receive_morning_location(update: Update, context: ContextTypes.DEFAULT
 
 
 # --- 날씨 스케줄 콜백 ---
+async def _prewarm_locations(context: telegram.ext.ContextTypes.DEFAULT_TYPE) -> list:
+    """아침에 미리 가져올 장소: 회사, 집, 최근 조회한 위치 (같은 격자는 한 번만)"""
+    # important_locations 변수가 캐시에 없으면 Windmill API를 호출하므로 스레드에서 읽습니다.
+    locations = await asyncio.to_thread(important_locations, "office", "home")
+    recent = [(CURRENT_LOCATION_LABEL, lat, lon) for lat, lon in context.bot_data.get(RECENT_LOCATIONS_KEY, [])]
+    seen = set()
+    unique = []
+    for location in locations + recent:
+        bucket = coordinate_bucket(location[1], location[2])
+        if bucket not in seen:
+            seen.add(bucket)
+            unique.append(location)
+    return unique
+
+async def _polish_prewarmed(locations):
+    """미리 가져온 보고서를 Gemini로 다듬어 둡니다. 실패하면 버튼 응답이 그때 다듬습니다."""
+    try:
+        await asyncio.to_thread(polish_prewarmed_weather, locations)
+    except Exception as e:
+        print(f"[Warning] Failed to polish prewarmed weather: {e!r}")
+
 async def send_daily_weather_options(context: telegram.ext.ContextTypes.DEFAULT_TYPE):
     """
     스케줄에 따라 아침 날씨 선택 버튼을 전송합니다.
+    버튼을 보내기 전에 회사, 집, 최근 위치의 날씨를 미리 가져와 두므로, 버튼을 누른 뒤에는 현재 위치만 조회합니다.
+    Gemini로 다듬는 일은 버튼을 보낸 뒤 백그라운드에서 합니다.
     """
     print("Running scheduled job: send_daily_weather_options")
+    locations = []
+    try:
+        locations = await _prewarm_locations(context)
+        warmed = await asyncio.to_thread(prewarm_weather, locations)
+        print(f"Prewarmed weather for {warmed}/{len(locations)} locations")
+    except Exception as e:
+        # 미리 가져오지 못해도 버튼은 보냅니다. (버튼을 누르면 그때 조회)
+        print(f"[Warning] Failed to prewarm weather: {e!r}")
     try:
         # 1. Inline Keyboard 버튼 2개 생성
         keyboard = [
@@ -209,15 +287,17 @@ async def send_daily_weather_options(context: telegram.ext.ContextTypes.DEFAULT_
         
         # 2. MY_CHAT_ID로 메시지 전송
         await context.bot.send_message(
-            chat_id=MY_CHAT_ID,
+            chat_id=MY_CHAT_ID.get(),
             text="좋은 아침입니다! ☀️\n조회할 날씨 종류를 선택하세요:",
             reply_markup=reply_markup
         )
+        if locations:
+            context.application.create_task(_polish_prewarmed(locations))
     except Exception as e:
         print(f"Error in scheduled job (send_daily_weather_options): {e}")
         print(traceback.format_exc())
         await context.bot.send_message(
-            chat_id=MY_CHAT_ID,
+            chat_id=MY_CHAT_ID.get(),
             text=f"스케줄된 아침 날씨 옵션 전송 중 오류 발생: {e}"
         )
 
@@ -258,6 +338,7 @@ def register(app: Application):
     app.add_handler(CommandHandler("weather_home", weather_home))
     app.add_handler(CommandHandler("weather_office", weather_office))
     app.add_handler(CommandHandler("weather_parent_home", weather_parent_home))
+    app.add_handler(CommandHandler("weather_all", weather_all))
 
     # 4. 스케줄링 등록
     kst = pytz.timezone('Asia/Seoul')
@@ -0,0 +1,139 @@
+import re
+from typing import Dict, Any, Optional
+
+# 외출 제안 규칙의 기준값
+RAIN_POP_THRESHOLD = 30          # 강수 확률 (%)
+HEAVY_RAIN_POP_THRESHOLD = 70
+UVI_HIGH = 6
+UVI_VERY_HIGH = 8
+DIURNAL_RANGE_THRESHOLD = 10     # 최고/최저 기온 차 (°C)
+STRONG_WIND_THRESHOLD = 7        # 풍속 (m/s)
+BAD_AIR_LEVELS = ("나쁨", "매우 나쁨")
+
+# 강조할 키워드와 이모지. 템플릿에서는 {umbrella} 처럼 영문 이름으로 사용합니다.
+KEYWORDS = {
+    "umbrella": ("우산", "☂️"),
+    "mask": ("마스크", "😷"),
+    "stay_in": ("외출 자제", "🏠"),
+    "sunscreen": ("선크림", "☀️"),
+    "jacket": ("겉옷", "🧥"),
+    "wind": ("바람", "💨"),
+    "alert": ("기상 경보", "🚨"),
+    "outdoor": ("야외 활동", "🌿"),
+}
+
+# 규칙별 문장 템플릿. 키워드 뒤의 조사는 템플릿에 직접 적습니다.
+TEMPLATES = {
+    "alert": "{alert}({events})가 발효 중이에요. 최신 소식을 꼭 확인하세요.",
+    "rain": "오늘 비 올 확률이 {pop:.0f}%예요. 나갈 때 {umbrella}을 챙기세요.",
+    "rain_heavy": "오늘 비 올 확률이 {pop:.0f}%로 높아요. {umbrella}을 꼭 챙기세요.",
+    "air_bad": "{pollutants} 수치가 나쁨 수준이에요. 외출할 때는 {mask}를 착용하세요.",
+    "air_very_bad": "{pollutants} 수치가 매우 나쁨 수준이에요. 가능하면 {stay_in}하고, 나갈 때는 {mask}를 꼭 착용하세요.",
+    "uvi_high": "자외선 지수가 {uvi:.1f}로 높아요. 외출 전 {sunscreen}을 바르세요.",
+    "uvi_very_high": "자외선 지수가 {uvi:.1f}로 매우 높아요. {sunscreen}과 모자, 선글라스를 챙기세요.",
+    "diurnal_range": "일교차가 {range:g}도로 커요({low:g}°C ~ {high:g}°C). {jacket}을 챙겨 체온 조절에 유의하세요.",
+    "wind": "{wind}이 초속 {speed:.1f}m로 강하게 불어요.",
+    "wind_gust": "{wind}이 초속 {speed:.1f}m(순간 최대 {gust:g}m)로 강하게 불어요.",
+    "fine": "하늘도 공기도 좋아서 {outdoor}하기 좋은 날이에요.",
+    "fine_weather_only": "비 소식 없이 무난한 날씨예요. {outdoor}하기 좋아요.",
+}
+
+# 대기질 규칙이 살펴보는 항목과 제안에 쓰는 이름
+AIR_FIELDS = (
+    ("대기질 지수 (AQI)", "대기질 지수"),
+    ("미세먼지 (PM2.5)", "미세먼지"),
+    ("초미세먼지 (PM10)", "초미세먼지"),
+    ("오존 (O3)", "오존"),
+)
+
+_NUMBER_PATTERN = re.compile(r"-?\d+(?:\.\d+)?")
+
+def highlight(name: str) -> str:
+    """키워드를 이모지와 굵은 글씨(Markdown)로 강조합니다."""
+    keyword, emoji = KEYWORDS[name]
+    return f"{emoji} **{keyword}**"
+
+def _numbers(value) -> list:
+    """값(숫자 또는 '3.2 (최대 5)' 같은 문자열)에 들어 있는 숫자들을 반환합니다."""
+    if isinstance(value, (int, float)):
+        return [float(value)]
+    return [float(x) for x in _NUMBER_PATTERN.findall(str(value or ""))]
+
+def _number(data: Dict[str, Any], key: str) -> Optional[float]:
+    numbers = _numbers(data.get(key))
+    return numbers[0] if numbers else None
+
+def _air_level(value) -> Optional[str]:
+    """'4 (나쁨)' 형식의 값에서 괄호 안 등급을 꺼냅니다."""
+    match = re.search(r"\(([^)]*)\)\s*$", str(value or ""))
+    return match.group(1) if match else None
+
+# --- 규칙: 조건이 맞으면 (템플릿 이름, 템플릿 값)을, 아니면 None을 반환 ---
+
+def _alert_rule(data):
+    events = data.get("경보")
+    if events:
+        return "alert", {"events": events}
+
+def _rain_rule(data):
+    pop = _number(data, "오늘 강수 확률 (%)")
+    if pop is not None and pop >= RAIN_POP_THRESHOLD:
+        return ("rain_heavy" if pop >= HEAVY_RAIN_POP_THRESHOLD else "rain"), {"pop": pop}
+
+def _air_rule(data):
+    levels = [(label, _air_level(data.get(key))) for key, label in AIR_FIELDS]
+    very_bad = [label for label, level in levels if level == "매우 나쁨"]
+    if very_bad:
+        return "air_very_bad", {"pollutants": ", ".join(very_bad)}
+    bad = [label for label, level in levels if level in BAD_AIR_LEVELS]
+    if bad:
+        return "air_bad", {"pollutants": ", ".join(bad)}
+
+def _uvi_rule(data):
+    uvi = _number(data, "오늘 자외선 지수 (UVI)")
+    if uvi is not None and uvi >= UVI_HIGH:
+        return ("uvi_very_high" if uvi >= UVI_VERY_HIGH else "uvi_high"), {"uvi": uvi}
+
+def _diurnal_range_rule(data):
+    high = _number(data, "최고 기온 (°C)")
+    low = _number(data, "최저 기온 (°C)")
+    if high is not None and low is not None and high - low >= DIURNAL_RANGE_THRESHOLD:
+        return "diurnal_range", {"range": round(high - low, 1), "high": high, "low": low}
+
+def _wind_rule(data):
+    numbers = _numbers(data.get("오늘 풍속 (m/s)"))
+    if numbers and numbers[0] >= STRONG_WIND_THRESHOLD:
+        if len(numbers) > 1:
+            return "wind_gust", {"speed": numbers[0], "gust": numbers[1]}
+        return "wind", {"speed": numbers[0]}
+
+# 제안 문장에 나오는 순서대로 적용합니다.
+RULES = (_alert_rule, _rain_rule, _air_rule, _uvi_rule, _diurnal_range_rule, _wind_rule)
+
+def _fine_day(data) -> Optional[str]:
+    """아무 규칙에도 걸리지 않았을 때의 긍정 멘트. 대기질이 '경계'면 아무 말도 하지 않습니다."""
+    if "대기질 지수 (AQI)" not in data:
+        return "fine_weather_only"
+    if _air_level(data.get("대기질 지수 (AQI)")) in ("좋음", "보통"):
+        return "fine"
+    return None
+
+def render(template: str, **values) -> str:
+    keywords = {name: highlight(name) for name in KEYWORDS}
+    return TEMPLATES[template].format(**keywords, **values)
+
+def matched_rules(data: Dict[str, Any]) -> list:
+    """parse_combined_data()의 결과에 맞는 (템플릿 이름, 템플릿 값) 목록을 반환합니다."""
+    matched = [result for result in (rule(data) for rule in RULES) if result]
+    if not matched:
+        fine = _fine_day(data)
+        if fine:
+            matched.append((fine, {}))
+    return matched
+
+def build_suggestion(data: Dict[str, Any]) -> str:
+    """
+    날씨 데이터로 외출 제안 문단을 만듭니다. (LLM 없이 규칙과 템플릿만 사용)
+    챙겨야 할 것(우산, 마스크, 겉옷 등)은 이모지와 굵은 글씨로 강조합니다.
+    """
+    return " ".join(render(template, **values) for template, values in matched_rules(data))
@@ -0,0 +1,147 @@
+import time
+import threading
+import wmill
+
+class LazyConfigValue:
+    """
+    Windmill 변수/리소스를 처음 get() 할 때 가져와 메모리에 보관하는 값입니다.
+
+    모듈 최상단이나 함수 기본 인자에서 wmill.get_variable()을 바로 호출하면
+    import만 해도 원격 호출이 일어나므로, 대신 이 객체를 선언해 두고 필요할 때 get()을 호출합니다.
+
+    - cast: 가져온 원본 값을 변환하는 함수 (예: int, json.loads). 원본 값이 바뀔 때만 다시 변환합니다.
+    - ttl: 지정하면 값을 가져온 지 ttl초가 지난 뒤의 get()은 메모리의 값을 그대로 반환하면서
+      백그라운드에서 새 값을 가져옵니다. (None이면 프로세스가 끝날 때까지 유지)
+    - invalidate()로 값을 버리면 다음 get()에서 다시 가져옵니다.
+    """
+
+    def __init__(self, kind: str, path: str, cast=None, ttl: float = None):
+        self.kind = kind
+        self.path = path
+        self.cast = cast
+        self.ttl = ttl
+        self._raw = None
+        self._casted = None
+        self._cast_lock = threading.Lock()
+        _declared.append(self)
+
+    def get(self):
+        value = _get(self.kind, self.path, self.ttl)
+        if not self.cast:
+            return value
+        with self._cast_lock:
+            if self._raw is not value:
+                self._casted = self.cast(value)
+                self._raw = value
+            return self._casted
+
+    def invalidate(self):
+        invalidate(self.path, self.kind)
+
+    def is_loaded(self) -> bool:
+        return (self.kind, self.path) in _values
+
+    def __repr__(self):
+        return f"LazyConfigValue({self.kind}:{self.path}, loaded={self.is_loaded()})"
+
+_FETCHERS = {
+    "variable": wmill.get_variable,
+    "resource": wmill.get_resource,
+}
+
+_values = {}         # (kind, path) -> (value, 가져온 시각)
+_fetch_times = {}    # (kind, path) -> 가져오는 데 걸린 시간(초)
+_declared = []       # 선언된 LazyConfigValue 목록
+_key_locks = {}
+_refreshing = set()  # 백그라운드에서 새로 가져오는 중인 key
+_lock = threading.Lock()
+
+def _key_lock(key) -> threading.Lock:
+    with _lock:
+        return _key_locks.setdefault(key, threading.Lock())
+
+def _fetch(key):
+    kind, path = key
+    started = time.perf_counter()
+    value = _FETCHERS[kind](path)
+    _fetch_times[key] = time.perf_counter() - started
+    _values[key] = (value, time.monotonic())
+    return value
+
+def _refresh_in_background(key):
+    with _lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def refresh():
+        try:
+            with _key_lock(key):
+                _fetch(key)
+        except Exception as e:
+            # 실패하면 기존 값을 계속 사용하고, 다음 get()에서 다시 시도합니다.
+            print(f"[Warning] Failed to refresh {key[0]} {key[1]}: {e}")
+        finally:
+            with _lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=refresh, name="wmill-config-refresh", daemon=True).start()
+
+def _get(kind: str, path: str, ttl: float = None):
+    key = (kind, path)
+    entry = _values.get(key)
+    if entry is None:
+        # 같은 값을 여러 스레드가 동시에 요청해도 원격 호출은 한 번만 합니다.
+        with _key_lock(key):
+            entry = _values.get(key)
+            if entry is None:
+                return _fetch(key)
+    value, fetched_at = entry
+    if ttl is not None and time.monotonic() - fetched_at >= ttl:
+        _refresh_in_background(key)
+    return value
+
+def lazy_variable(path: str, cast=None, ttl: float = None) -> LazyConfigValue:
+    return LazyConfigValue("variable", path, cast, ttl)
+
+def lazy_resource(path: str, cast=None, ttl: float = None) -> LazyConfigValue:
+    return LazyConfigValue("resource", path, cast, ttl)
+
+def get_variable(path: str, ttl: float = None):
+    """
+    wmill.get_variable()과 같지만, 가져온 값을 메모리에 보관했다가 반환합니다.
+    ttl을 지정하면 ttl초가 지난 뒤에는 백그라운드에서 새 값을 가져옵니다.
+    """
+    return _get("variable", path, ttl)
+
+def get_resource(path: str, ttl: float = None):
+    """
+    wmill.get_resource()과 같지만, 가져온 값을 메모리에 보관했다가 반환합니다.
+    ttl을 지정하면 ttl초가 지난 뒤에는 백그라운드에서 새 값을 가져옵니다.
+    """
+    return _get("resource", path, ttl)
+
+def invalidate(path: str, kind: str = "variable"):
+    """보관 중인 값을 버립니다. 다음 조회 때 Windmill에서 다시 가져옵니다."""
+    _values.pop((kind, path), None)
+
+def invalidate_all():
+    """보관 중인 모든 값을 버립니다."""
+    _values.clear()
+
+def config_report() -> dict:
+    """
+    지금까지 가져온 설정값과 걸린 시간, 그리고 선언되었지만 아직 가져오지 않은 값을 보고합니다.
+
+    import_cost_saved_seconds는 아직 가져오지 않은 값의 개수에 평균 조회 시간을 곱한 추정치로,
+    이전처럼 import 시점에 모두 가져왔다면 추가로 들었을 시간입니다.
+    """
+    fetched = {f"{kind}:{path}": round(seconds, 4) for (kind, path), seconds in _fetch_times.items()}
+    deferred = sorted({f"{value.kind}:{value.path}" for value in _declared if not value.is_loaded()})
+    average = (sum(_fetch_times.values()) / len(_fetch_times)) if _fetch_times else 0.0
+    return {
+        "fetched": fetched,
+        "total_fetch_seconds": round(sum(_fetch_times.values()), 4),
+        "deferred": deferred,
+        "import_cost_saved_seconds": round(average * len(deferred), 4),
+    }
@@ -0,0 +1,77 @@
+import threading
+
+from youtube_transcript_api import YouTubeTranscriptApi
+
+from u.rapaellk.persistent_cache import PersistentCache, cache_path, make_cache_key
+
+DEFAULT_LANGUAGES = ("ko", "en")
+
+_transcript_cache = None
+_transcript_cache_lock = threading.Lock()
+
+def get_transcript_cache() -> PersistentCache:
+    """영상 ID와 언어별 자막을 보관하는 캐시를 반환합니다. (처음 사용할 때 생성)"""
+    global _transcript_cache
+    if _transcript_cache is None:
+        with _transcript_cache_lock:
+            if _transcript_cache is None:
+                _transcript_cache = PersistentCache(
+                    cache_path("youtube_transcripts.sqlite3"), ttl_seconds=90 * 24 * 3600, max_entries=1000
+                )
+    return _transcript_cache
+
+def _compact(fetched_transcript) -> dict:
+    """
+    자막 조각들을 하나의 텍스트와 조각별 (텍스트 시작 위치, 영상 시작 시각(초)) 목록으로 저장합니다.
+    조각마다 dict를 두는 것보다 작고, 텍스트 위치로 영상 시각을 다시 찾을 수 있습니다.
+    """
+    lines = []
+    offsets = []
+    position = 0
+    for snippet in fetched_transcript.snippets:
+        offsets.append([position, round(snippet.start, 2)])
+        lines.append(snippet.text)
+        position += len(snippet.text) + 1  # "\n"
+    return {"text": "\n".join(lines), "offsets": offsets}
+
+def _candidate_tracks(transcript_list, languages):
+    """직접 만든 자막, 자동 생성 자막 순으로 languages에 맞는 가장 좋은 트랙을 찾습니다."""
+    candidates = []
+    for find in (transcript_list.find_manually_created_transcript, transcript_list.find_generated_transcript):
+        try:
+            candidates.append(find(list(languages)))
+        except Exception:
+            pass
+    return candidates
+
+def _fetch_track(transcript):
+    try:
+        return transcript.fetch()
+    except Exception as e:
+        print(f"Failed to fetch {transcript.language_code} transcript (generated={transcript.is_generated}): {e}")
+        return None
+
+def get_transcript(video_id: str, languages=DEFAULT_LANGUAGES):
+    """
+    영상의 자막을 반환합니다. (dict: text, offsets, language, is_generated) 자막이 없으면 None.
+
+    영상 ID와 선호 언어 목록으로 캐시를 먼저 확인하므로, 같은 영상을 다시 요약할 때는 자막 API를 호출하지 않습니다.
+    캐시에 없으면 직접 만든 자막을 먼저 가져오고, 그 트랙이 없거나 가져오지 못했을 때만 자동 생성 자막을 가져옵니다.
+    """
+    cache = get_transcript_cache()
+    key = make_cache_key("youtube_transcript", video_id, list(languages))
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    transcript_list = YouTubeTranscriptApi().list(video_id)
+    for transcript in _candidate_tracks(transcript_list, languages):
+        fetched_transcript = _fetch_track(transcript)
+        if fetched_transcript is None:
+            continue
+        result = _compact(fetched_transcript)
+        result["language"] = transcript.language_code
+        result["is_generated"] = transcript.is_generated
+        cache.set(key, result)
+        return result
+    return None